@@ -1,12 +1,53 @@
+from operator import attrgetter
+
 from django.contrib import admin
+from .ballot import invalidate_ballot_structure, invalidate_candidate_ballots
+from .search import roster_changed
+from .turnout import student_changed, student_state
 from .models import Election, Student, Position, Candidate, Vote, User
 
 
+class BallotStructureAdminMixin:
+    """
+    Invalidate the cached ballot structure when an admin edits it. The
+    edited object's election id is read from `ballot_election_field`, a
+    dotted attribute path.
+    """
+
+    ballot_election_field = "election_id"
+
+    def ballot_election_id(self, obj):
+        return attrgetter(self.ballot_election_field)(obj)
+
+    def save_model(self, request, obj, form, change):
+        if change and not form.changed_data:
+            # Every field of these models is on the ballot; nothing changed.
+            super().save_model(request, obj, form, change)
+            return
+        if change:
+            previous = type(obj).objects.filter(pk=obj.pk).first()
+            if previous is not None:
+                invalidate_ballot_structure(self.ballot_election_id(previous))
+        super().save_model(request, obj, form, change)
+        invalidate_ballot_structure(self.ballot_election_id(obj))
+
+    # Invalidate before deleting: the election itself may be what goes away.
+    def delete_model(self, request, obj):
+        invalidate_ballot_structure(self.ballot_election_id(obj))
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for election_id in {self.ballot_election_id(obj) for obj in queryset}:
+            invalidate_ballot_structure(election_id)
+        super().delete_queryset(request, queryset)
+
+
 @admin.register(Election)
-class ElectionAdmin(admin.ModelAdmin):
+class ElectionAdmin(BallotStructureAdminMixin, admin.ModelAdmin):
     list_display = ("id","name", "year", "start_time", "end_time", "is_active")
     list_filter = ("year", "is_active")
     search_fields = ("name",)
+    ballot_election_field = "pk"
 
 
 @admin.register(Student)
@@ -22,19 +63,48 @@ class StudentAdmin(admin.ModelAdmin):
             return [f.name for f in self.model._meta.fields if f.name != "is_active"]
         return super().get_readonly_fields(request, obj)
 
+    # Keep the turnout counters, search index and candidates' ballots in
+    # step with admin edits.
+    def save_model(self, request, obj, form, change):
+        previous = type(obj).objects.filter(pk=obj.pk).first() if change else None
+        super().save_model(request, obj, form, change)
+        student_changed(student_state(previous) if previous else None, student_state(obj))
+        roster_changed(obj.election_id)
+        if previous is not None and previous.election_id != obj.election_id:
+            roster_changed(previous.election_id)
+        if change:
+            invalidate_candidate_ballots([obj.pk])
+
+    def delete_model(self, request, obj):
+        before = student_state(obj)
+        invalidate_candidate_ballots([obj.pk])
+        super().delete_model(request, obj)
+        student_changed(before, None)
+        roster_changed(before[0])
+
+    def delete_queryset(self, request, queryset):
+        before = [student_state(obj) for obj in queryset]
+        invalidate_candidate_ballots([obj.pk for obj in queryset])
+        super().delete_queryset(request, queryset)
+        for state in before:
+            student_changed(state, None)
+        for election_id in {state[0] for state in before}:
+            roster_changed(election_id)
+
 
 @admin.register(Position)
-class PositionAdmin(admin.ModelAdmin):
+class PositionAdmin(BallotStructureAdminMixin, admin.ModelAdmin):
     list_display = ("name", "election", "display_order")
     list_filter = ("election",)
     ordering = ("display_order",)
 
 
 @admin.register(Candidate)
-class CandidateAdmin(admin.ModelAdmin):
+class CandidateAdmin(BallotStructureAdminMixin, admin.ModelAdmin):
     list_display = ("student", "position")
     list_filter = ("position",)
     search_fields = ("student__full_name", "student__student_id")
+    ballot_election_field = "position.election_id"
 
 
 @admin.register(User)
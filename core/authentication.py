@@ -4,7 +4,8 @@ from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from django.utils.translation import gettext as _
 from django.utils import timezone
-from .models import Student, Election
+from .ballot import get_election_window
+from .models import Student
 from .utils import verify_voter_hmac
 
 
@@ -44,12 +45,14 @@ class VoterAuthentication(BaseAuthentication):
         if not student_id or not token or not election_id:
             return None  # allow other authenticators to run or cause IsAuthenticated to fail
 
-        # Validate and get the specific election
+        # Validate the election from the per-process cache (see core.ballot)
         try:
-            election = Election.objects.get(pk=election_id, is_active=True)
-        except Election.DoesNotExist:
+            election = get_election_window(int(election_id))
+        except ValueError:
+            election = None
+        if election is None or not election.is_active:
             self.security_logger.warning(
-                f"AUTH_FAILED_ELECTION: student_id={student_id}, election_id={election_id}, ip={client_ip}"
+                "AUTH_FAILED_ELECTION: student_id=%s, election_id=%s, ip=%s", student_id, election_id, client_ip
             )
             raise AuthenticationFailed(_("Election not found or not active."))
 
@@ -57,28 +60,28 @@ class VoterAuthentication(BaseAuthentication):
         now = timezone.now()
         if now < election.start_time:
             self.security_logger.warning(
-                f"AUTH_FAILED_EARLY: student_id={student_id}, election_id={election_id}, ip={client_ip}"
+                "AUTH_FAILED_EARLY: student_id=%s, election_id=%s, ip=%s", student_id, election_id, client_ip
             )
             raise AuthenticationFailed(_("Voting has not started yet."))
         if now > election.end_time:
             self.security_logger.warning(
-                f"AUTH_FAILED_LATE: student_id={student_id}, election_id={election_id}, ip={client_ip}"
+                "AUTH_FAILED_LATE: student_id=%s, election_id=%s, ip=%s", student_id, election_id, client_ip
             )
             raise AuthenticationFailed(_("Voting has ended."))
 
         # Use composite lookup: student_id + election_id
         try:
-            student = Student.objects.get(student_id=student_id, election=election)
+            student = Student.objects.get(student_id=student_id, election_id=election.election_id)
         except Student.DoesNotExist:
             self.security_logger.warning(
-                f"AUTH_FAILED_STUDENT: student_id={student_id}, election_id={election_id}, ip={client_ip}"
+                "AUTH_FAILED_STUDENT: student_id=%s, election_id=%s, ip=%s", student_id, election_id, client_ip
             )
             raise AuthenticationFailed(_("Invalid student identifier for this election."))
 
         # Verify token using election-scoped key (student_id_electionId)
-        if not verify_voter_hmac(f"{student.student_id}_{election.id}", token):
+        if not verify_voter_hmac(f"{student.student_id}_{election.election_id}", token):
             self.security_logger.warning(
-                f"AUTH_FAILED_TOKEN: student_id={student_id}, election_id={election_id}, ip={client_ip}"
+                "AUTH_FAILED_TOKEN: student_id=%s, election_id=%s, ip=%s", student_id, election_id, client_ip
             )
             raise AuthenticationFailed(_("Invalid voter token."))
 
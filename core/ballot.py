@@ -0,0 +1,288 @@
+"""
+Per-election ballot structure used to validate votes without row locks,
+and the election window used to authenticate voters without a query.
+
+The display ballot served to the voting page is cached the same way.
+
+All three are loaded once per process and kept until they expire or are
+invalidated. Invalidation bumps a generation counter in the shared cache
+so other workers drop their copy as well. Without a shared cache (DummyCache,
+LocMemCache) other workers never see it, so copies are only kept for
+BALLOT_CACHE_UNSHARED_TTL seconds; claiming the voter re-checks the window.
+"""
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .models import Candidate, Election, Position
+from .tallies import bump_results_version
+
+_GENERATION_KEY = "ballot_structure_gen:%s"
+
+_lock = threading.Lock()
+_structures = {}  # election_id -> (BallotStructure, generation, loaded_at)
+_windows = {}  # election_id -> (ElectionWindow, generation, loaded_at)
+_ballots = {}  # election_id -> ((etag, payload), generation, loaded_at)
+
+
+@dataclass(frozen=True)
+class ElectionWindow:
+    election_id: int
+    is_active: bool
+    start_time: object
+    end_time: object
+
+
+@dataclass(frozen=True)
+class BallotStructure:
+    election_id: int
+    is_active: bool
+    start_time: object
+    end_time: object
+    positions: frozenset
+    candidates: MappingProxyType  # candidate_id -> position_id
+
+    def is_open(self, now):
+        return self.start_time <= now <= self.end_time
+
+    def candidate_in_position(self, candidate_id, position_id):
+        return self.candidates.get(candidate_id) == position_id
+
+
+def _ttl(setting):
+    ttl = getattr(settings, setting, 30)
+    if isinstance(caches["default"], (DummyCache, LocMemCache)):
+        return min(ttl, getattr(settings, "BALLOT_CACHE_UNSHARED_TTL", 2))
+    return ttl
+
+
+def _generation(election_id):
+    return cache.get(_GENERATION_KEY % election_id, 0)
+
+
+def _load(election_id):
+    election = Election.objects.filter(pk=election_id).first()
+    if election is None:
+        return None
+    positions = frozenset(
+        Position.objects.filter(election_id=election_id).values_list("id", flat=True)
+    )
+    candidates = dict(
+        Candidate.objects.filter(position__election_id=election_id).values_list("id", "position_id")
+    )
+    return BallotStructure(
+        election_id=election.id,
+        is_active=election.is_active,
+        start_time=election.start_time,
+        end_time=election.end_time,
+        positions=positions,
+        candidates=MappingProxyType(candidates),
+    )
+
+
+def get_ballot_structure(election_id):
+    """
+    Return the BallotStructure of an election, or None if it doesn't exist.
+    """
+    ttl = _ttl("BALLOT_STRUCTURE_TTL")
+    generation = _generation(election_id)
+    entry = _structures.get(election_id)
+    if entry is not None:
+        structure, cached_generation, loaded_at = entry
+        if cached_generation == generation and time.monotonic() - loaded_at < ttl:
+            return structure
+
+    structure = _load(election_id)
+    if structure is not None:
+        with _lock:
+            _structures[election_id] = (structure, generation, time.monotonic())
+    return structure
+
+
+def get_election_window(election_id):
+    """
+    Return the cached ElectionWindow of an election, or None if it doesn't
+    exist. Unknown ids are not cached.
+    """
+    ttl = _ttl("ELECTION_WINDOW_TTL")
+    generation = _generation(election_id)
+    entry = _windows.get(election_id)
+    if entry is not None:
+        window, cached_generation, loaded_at = entry
+        if cached_generation == generation and time.monotonic() - loaded_at < ttl:
+            return window
+
+    row = (
+        Election.objects.filter(pk=election_id)
+        .values_list("is_active", "start_time", "end_time")
+        .first()
+    )
+    if row is None:
+        return None
+    window = ElectionWindow(election_id, *row)
+    with _lock:
+        _windows[election_id] = (window, generation, time.monotonic())
+    return window
+
+
+def _load_ballot(election_id):
+    election = (
+        Election.objects.filter(pk=election_id)
+        .values(*_BALLOT_ELECTION_FIELDS)
+        .first()
+    )
+    if election is None:
+        return None
+    candidates = list(_ballot_candidates(election_id))
+    positions = list(_ballot_positions(election_id))
+    return _ballot_payload(election, candidates, positions)
+
+
+async def _aload_ballot(election_id):
+    election = await (
+        Election.objects.filter(pk=election_id)
+        .values(*_BALLOT_ELECTION_FIELDS)
+        .afirst()
+    )
+    if election is None:
+        return None
+    candidates = [row async for row in _ballot_candidates(election_id)]
+    positions = [row async for row in _ballot_positions(election_id)]
+    return _ballot_payload(election, candidates, positions)
+
+
+_BALLOT_ELECTION_FIELDS = ("id", "name", "year", "start_time", "end_time", "is_active")
+
+
+def _ballot_candidates(election_id):
+    return (
+        Candidate.objects.filter(position__election_id=election_id)
+        .order_by("ballot_number")
+        .values("id", "student_id", "student__full_name", "position_id", "photo_url", "ballot_number")
+    )
+
+
+def _ballot_positions(election_id):
+    return (
+        Position.objects.filter(election_id=election_id)
+        .order_by("display_order", "id")
+        .values("id", "name", "display_order")
+    )
+
+
+def _ballot_payload(election, candidates, positions):
+    election_id = election["id"]
+    candidates_by_position = {}
+    for candidate in candidates:
+        candidates_by_position.setdefault(candidate["position_id"], []).append({
+            "id": candidate["id"],
+            "student": candidate["student_id"],
+            "student_name": candidate["student__full_name"],
+            "position": candidate["position_id"],
+            "photo_url": candidate["photo_url"],
+            "ballot_number": candidate["ballot_number"],
+        })
+
+    payload = {
+        "election": election,
+        "positions": [
+            {**position, "election": election_id, "candidates": candidates_by_position.get(position["id"], [])}
+            for position in positions
+        ],
+    }
+    # The ETag is a content hash so every worker agrees on it.
+    encoded = json.dumps(payload, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    etag = '"ballot-%s-%s"' % (election_id, hashlib.sha1(encoded).hexdigest()[:16])
+    return etag, payload
+
+
+def get_ballot(election_id):
+    """
+    Return (etag, payload) of the display ballot of an election, or None if
+    it doesn't exist. Votes don't change it, so it survives voting traffic.
+    """
+    generation = _generation(election_id)
+    ballot = _cached_ballot(election_id, generation)
+    if ballot is None:
+        ballot = _load_ballot(election_id)
+        _store_ballot(election_id, ballot, generation)
+    return ballot
+
+
+async def aget_ballot(election_id):
+    """Async get_ballot(), for the ballot view under ASGI."""
+    generation = await cache.aget(_GENERATION_KEY % election_id, 0)
+    ballot = _cached_ballot(election_id, generation)
+    if ballot is None:
+        ballot = await _aload_ballot(election_id)
+        _store_ballot(election_id, ballot, generation)
+    return ballot
+
+
+def _cached_ballot(election_id, generation):
+    ttl = _ttl("BALLOT_STRUCTURE_TTL")
+    entry = _ballots.get(election_id)
+    if entry is not None:
+        ballot, cached_generation, loaded_at = entry
+        if cached_generation == generation and time.monotonic() - loaded_at < ttl:
+            return ballot
+    return None
+
+
+def _store_ballot(election_id, ballot, generation):
+    if ballot is not None:
+        with _lock:
+            _ballots[election_id] = (ballot, generation, time.monotonic())
+
+
+def invalidate_ballot_structure(election_id):
+    """
+    Drop the cached structure of an election in every worker once the
+    current transaction commits. The ballot is part of the election's
+    results, so their version is bumped as well.
+    """
+    bump_results_version(election_id)
+
+    def _invalidate():
+        with _lock:
+            _structures.pop(election_id, None)
+            _windows.pop(election_id, None)
+            _ballots.pop(election_id, None)
+        key = _GENERATION_KEY % election_id
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass  # cache backend doesn't keep values (DummyCache); the TTL still applies
+
+    transaction.on_commit(_invalidate)
+
+
+def invalidate_candidate_ballots(student_pks):
+    """
+    Invalidate the ballots listing any of these students as a candidate,
+    e.g. before their names change or they are deleted.
+    """
+    election_ids = set(
+        Candidate.objects.filter(student_id__in=student_pks).values_list("position__election_id", flat=True)
+    )
+    for election_id in election_ids:
+        invalidate_ballot_structure(election_id)
+
+
+def clear_ballot_structures():
+    """Forget every structure, window and ballot cached by this process."""
+    with _lock:
+        _structures.clear()
+        _windows.clear()
+        _ballots.clear()
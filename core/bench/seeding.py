@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from core.models import Candidate, Election, Position, Student, Vote
+from core.tallies import rebuild_tallies
+from core.turnout import reconcile_turnout
+from core.utils import generate_voter_hmac
+
+
+class SeededElection:
+    """An election created for a benchmark run, with its voters' ballots."""
+
+    def __init__(self, election, positions, candidates, voters):
+        self.election = election
+        self.positions = positions
+        self.candidates = candidates  # position_id -> [Candidate]
+        self.voters = voters
+
+    def token_for(self, student):
+        return generate_voter_hmac(f"{student.student_id}_{self.election.id}")
+
+    def ballot_for(self, index):
+        """A full ballot, spreading votes across candidates by voter index."""
+        return [
+            {
+                "election": self.election.id,
+                "position": position.id,
+                "candidate": self.candidates[position.id][index % len(self.candidates[position.id])].id,
+            }
+            for position in self.positions
+        ]
+
+    def cast_votes(self, voters=None, batch_size=5000):
+        """
+        Bulk-insert a full ballot for the first `voters` voters (default: all),
+        bypassing the vote path, then rebuild the tallies and turnout counters.
+        """
+        voted = self.voters if voters is None else self.voters[:voters]
+        for start in range(0, len(voted), batch_size):
+            chunk = voted[start:start + batch_size]
+            Vote.objects.bulk_create(
+                Vote(
+                    voter_hash=self.token_for(student),
+                    election_id=self.election.id,
+                    position_id=vote["position"],
+                    candidate_id=vote["candidate"],
+                )
+                for index, student in enumerate(chunk, start)
+                for vote in self.ballot_for(index)
+            )
+            Student.objects.filter(pk__in=[student.pk for student in chunk]).update(has_voted=True, is_active=False)
+        rebuild_tallies(self.election.id)
+        reconcile_turnout(self.election.id)
+
+    def delete(self):
+        self.election.delete()
+
+
+def seed_election(positions=5, candidates=4, voters=1000, activated=True, name="Benchmark", batch_size=5000):
+    """
+    Create an active election with `positions` x `candidates` candidates and
+    `voters` students (activated unless told otherwise).
+    """
+    now = timezone.now()
+    election = Election.objects.create(
+        name=name,
+        year=now.year,
+        start_time=now - timedelta(hours=1),
+        end_time=now + timedelta(days=1),
+        is_active=True,
+    )
+
+    created_positions = Position.objects.bulk_create(
+        [Position(name=f"Position {p + 1}", election=election, display_order=p + 1) for p in range(positions)]
+    )
+
+    candidate_students = Student.objects.bulk_create(
+        [
+            Student(
+                student_id=f"C{p:03d}{c:03d}",
+                full_name=f"Candidate {p + 1}.{c + 1}",
+                class_name="Candidates",
+                election=election,
+            )
+            for p in range(positions)
+            for c in range(candidates)
+        ]
+    )
+    created_candidates = Candidate.objects.bulk_create(
+        [
+            Candidate(student=student, position=created_positions[i // candidates], ballot_number=i % candidates + 1)
+            for i, student in enumerate(candidate_students)
+        ]
+    )
+    by_position = {}
+    for candidate in created_candidates:
+        by_position.setdefault(candidate.position_id, []).append(candidate)
+
+    voter_rows = Student.objects.bulk_create(
+        (
+            Student(
+                student_id=f"V{i:07d}",
+                full_name=f"Voter {i}",
+                class_name=f"Class {i % 20}",
+                is_active=activated,
+                election=election,
+            )
+            for i in range(voters)
+        ),
+        batch_size=batch_size,
+    )
+    return SeededElection(election, created_positions, by_position, voter_rows)
@@ -0,0 +1,103 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalServer:
+    """
+    Run the project under gunicorn (or uvicorn with `asgi=True`) on a free
+    local port, against the same database as this process. Use as a context
+    manager; `url` is the base URL.
+
+    The server runs with DEBUG on so it accepts plain HTTP and skips rate
+    limiting, which would otherwise throttle every simulated voter (they all
+    come from 127.0.0.1).
+    """
+
+    def __init__(
+        self, workers=1, threads=8, worker_class="gthread", app=None, env=None, quiet=True, asgi=False
+    ):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}/"
+        if asgi:
+            self.command = [
+                sys.executable, "-m", "uvicorn", app or "evoting.asgi:application",
+                "--host", "127.0.0.1",
+                "--port", str(self.port),
+                "--workers", str(workers),
+                "--log-level", "warning",
+                "--no-access-log",
+            ]
+        else:
+            self.command = [
+                sys.executable, "-m", "gunicorn", app or "evoting.wsgi:application",
+                "--bind", f"127.0.0.1:{self.port}",
+                "--workers", str(workers),
+                "--worker-class", worker_class,
+                "--timeout", "120",
+                "--log-level", "warning",
+            ]
+            if worker_class == "gthread":
+                self.command += ["--threads", str(threads)]
+        self.env = {**os.environ, "DEBUG": "True", "SERVER_MODE": "asgi" if asgi else "wsgi", **(env or {})}
+        self.quiet = quiet
+        self.process = None
+
+    def __enter__(self):
+        output = subprocess.DEVNULL if self.quiet else None
+        self.process = subprocess.Popen(
+            self.command, cwd=settings.BASE_DIR, env=self.env, stdout=output, stderr=output
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {self.process.returncode}")
+            try:
+                with urllib.request.urlopen(f"{self.url}api/healthz/", timeout=1):
+                    return self
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise RuntimeError("Server did not become ready within 30 seconds")
+
+    def __exit__(self, *exc):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def request_json(url, method="GET", data=None, headers=None, timeout=30):
+    """
+    Send a JSON request and return (status, parsed body). HTTP errors are
+    returned, not raised; connection errors raise OSError.
+    """
+    body = json.dumps(data).encode() if data is not None else None
+    request = urllib.request.Request(url, data=body, method=method)
+    request.add_header("Content-Type", "application/json")
+    for name, value in (headers or {}).items():
+        request.add_header(name, value)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status, raw = response.status, response.read()
+    except urllib.error.HTTPError as e:
+        status, raw = e.code, e.read()
+    try:
+        return status, json.loads(raw) if raw else None
+    except ValueError:
+        return status, {"detail": raw[:200].decode(errors="replace")}
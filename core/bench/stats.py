@@ -0,0 +1,27 @@
+import math
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, elapsed=None):
+    """
+    Summarize latencies (seconds) as milliseconds, plus throughput when the
+    wall-clock `elapsed` time is given.
+    """
+    values = sorted(latencies)
+    summary = {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+    if elapsed:
+        summary["per_second"] = round(len(values) / elapsed, 2)
+    return summary
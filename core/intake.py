@@ -0,0 +1,376 @@
+"""
+Durable ballot intake journal (settings.VOTE_INTAKE_MODE = "journal").
+
+In journal mode the voter is claimed, the validated ballot is appended to a
+per-process journal file and fsync'd once the claim has committed, and a
+receipt is returned. A background
+writer thread drains the journal into Vote rows in large batches and keeps
+a byte-offset checkpoint next to the journal.
+
+Each journal is flock'd by the process writing it. A journal nobody holds a
+lock on belongs to a dead process; it is replayed by `recover_orphaned_journals`
+(run by the writer on start and by the drain_vote_journal command) and then
+removed. Replays are idempotent: votes already present are skipped.
+
+Records are re-validated against the ballot structure when flushed. A
+ballot that can no longer be written (e.g. its candidate was deleted after
+it was journaled) is never dropped: the voter is already claimed, so the
+record goes to the dead-letter file next to the journals for an operator
+to resolve, and is counted in the metrics and reported by drain_vote_journal.
+"""
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .ballot import get_ballot_structure
+from .metrics import VOTE_JOURNAL_DEAD_LETTERS, VOTE_LOCK_WAIT, VOTE_TRANSACTION
+from .models import Vote
+from .tallies import record_votes
+from .voting import build_votes, claim_voter, release_voter
+
+try:
+    import fcntl
+except ImportError:  # Windows: journal mode is unavailable
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_JOURNAL_PATTERN = "ballots-*.jsonl"
+_DEAD_LETTER_FILE = "dead-letter.jsonl"
+
+_journal_lock = threading.Lock()
+_journal = None
+_writer = None
+
+
+def journal_dir():
+    return str(getattr(settings, "VOTE_JOURNAL_DIR", os.path.join(settings.BASE_DIR, "vote_journal")))
+
+
+class BallotJournal:
+    """Append-only, fsync'd journal of accepted ballots owned by this process."""
+
+    def __init__(self, directory):
+        if fcntl is None:
+            raise ImproperlyConfigured("The ballot journal requires a POSIX platform (fcntl).")
+        os.makedirs(directory, exist_ok=True)
+        self.pid = os.getpid()
+        self.path = os.path.join(directory, f"ballots-{self.pid}.jsonl")
+        self._fh = open(self.path, "ab")
+        fcntl.flock(self._fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._lock = threading.Lock()
+        self.appended = 0
+        self.last_append_at = None
+
+    def append(self, voter_hash, votes):
+        """Durably record a ballot and return its receipt id."""
+        receipt = uuid.uuid4().hex
+        record = {
+            "receipt": receipt,
+            "voter_hash": voter_hash,
+            "accepted_at": time.time(),
+            "votes": [[v.election_id, v.position_id, v.candidate_id] for v in votes],
+        }
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self.appended += 1
+            self.last_append_at = record["accepted_at"]
+        return receipt
+
+
+def get_journal():
+    """Return this process's journal, starting the background writer if enabled."""
+    global _journal, _writer
+    with _journal_lock:
+        directory = journal_dir()
+        if _journal is None or _journal.pid != os.getpid() or os.path.dirname(_journal.path) != directory:
+            _journal = BallotJournal(directory)
+            _writer = None
+        if _writer is None and getattr(settings, "VOTE_JOURNAL_BACKGROUND_WRITER", True):
+            _writer = JournalWriter(_journal)
+            _writer.start()
+    return _journal
+
+
+def accept_ballot(student_pk, token, votes_data):
+    """
+    Claim the voter, then journal the ballot once the claim has committed;
+    the Vote rows are written later. A claim that fails to commit leaves
+    nothing in the journal to replay, and a failed append releases the
+    claim again.
+    """
+    journal = get_journal()
+    with VOTE_TRANSACTION.time(strategy="journal"):
+        with transaction.atomic():
+            claim_voter(student_pk)
+            votes = build_votes(token, votes_data)
+        try:
+            receipt = journal.append(token, votes)
+        except Exception:
+            release_voter(student_pk)
+            raise
+    return receipt, votes
+
+
+def _offset_path(path):
+    return path + ".offset"
+
+
+def read_offset(path):
+    try:
+        with open(_offset_path(path)) as fh:
+            return int(fh.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def _write_offset(path, offset):
+    tmp = _offset_path(path) + ".tmp"
+    with open(tmp, "w") as fh:
+        fh.write(str(offset))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, _offset_path(path))
+
+
+def read_pending(path, offset, limit=None):
+    """
+    Return (records, next_offset) for the complete journal lines after
+    `offset`. A trailing partial line (torn write) is left for later.
+    """
+    records = []
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        while limit is None or len(records) < limit:
+            line = fh.readline()
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            records.append(json.loads(line))
+    return records, offset
+
+
+def _votes_for(record):
+    return [
+        Vote(
+            voter_hash=record["voter_hash"],
+            election_id=election_id,
+            position_id=position_id,
+            candidate_id=candidate_id,
+        )
+        for election_id, position_id, candidate_id in record["votes"]
+    ]
+
+
+def _insert(records):
+    """Insert the votes of `records` that aren't stored yet; returns the count."""
+    votes = [vote for record in records for vote in _votes_for(record)]
+    with transaction.atomic():
+        existing = set(
+            Vote.objects.filter(voter_hash__in={v.voter_hash for v in votes}).values_list(
+                "voter_hash", "position_id"
+            )
+        )
+        new_votes = [v for v in votes if (v.voter_hash, v.position_id) not in existing]
+        Vote.objects.bulk_create(new_votes)
+        with VOTE_LOCK_WAIT.time(step="tallies"):
+            record_votes(new_votes)
+    return len(new_votes)
+
+
+def _invalid_reason(record, structures):
+    """Why a record's ballot can't be written any more, or None."""
+    for election_id, position_id, candidate_id in record["votes"]:
+        if election_id not in structures:
+            structures[election_id] = get_ballot_structure(election_id)
+        structure = structures[election_id]
+        if structure is None:
+            return f"election {election_id} no longer exists"
+        if position_id not in structure.positions:
+            return f"position {position_id} is no longer in election {election_id}"
+        if not structure.candidate_in_position(candidate_id, position_id):
+            return f"candidate {candidate_id} is no longer in position {position_id}"
+    return None
+
+
+def dead_letter_path(directory=None):
+    return os.path.join(directory or journal_dir(), _DEAD_LETTER_FILE)
+
+
+def dead_letter(record, reason, kind):
+    """Durably set aside a record that can't be written, with the reason."""
+    path = dead_letter_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    line = (json.dumps({**record, "reason": reason, "failed_at": time.time()}, separators=(",", ":")) + "\n").encode()
+    with open(path, "ab") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        fh.write(line)
+        fh.flush()
+        os.fsync(fh.fileno())
+    VOTE_JOURNAL_DEAD_LETTERS.inc(reason=kind)
+    logger.error("Journal record %s moved to %s: %s", record.get("receipt"), path, reason)
+
+
+def read_dead_letters(directory=None):
+    """The records set aside in the dead-letter file."""
+    try:
+        with open(dead_letter_path(directory), "rb") as fh:
+            return [json.loads(line) for line in fh if line.endswith(b"\n")]
+    except FileNotFoundError:
+        return []
+
+
+def flush_records(records):
+    """
+    Write journal records to the Vote table in one batch. Records whose
+    ballot is no longer valid are dead-lettered first. If the batch fails,
+    records are retried one by one and any that still fail are dead-lettered
+    so they can't block the journal.
+    """
+    structures = {}
+    valid = []
+    for record in records:
+        reason = _invalid_reason(record, structures)
+        if reason is None:
+            valid.append(record)
+        else:
+            dead_letter(record, reason, "invalid")
+    try:
+        return _insert(valid)
+    except IntegrityError:
+        inserted = 0
+        for record in valid:
+            try:
+                inserted += _insert([record])
+            except IntegrityError as e:
+                dead_letter(record, f"{e.__class__.__name__}: {e}", "integrity")
+        return inserted
+
+
+def flush_pending(path, batch_size=None):
+    """Flush one batch of pending records from a journal; returns records read."""
+    batch_size = batch_size or getattr(settings, "VOTE_JOURNAL_BATCH_SIZE", 500)
+    offset = read_offset(path)
+    records, next_offset = read_pending(path, offset, batch_size)
+    if records:
+        flush_records(records)
+        _write_offset(path, next_offset)
+    return len(records)
+
+
+def drain_journal(path, batch_size=None):
+    """Flush every pending record of a journal; returns records flushed."""
+    total = 0
+    while True:
+        flushed = flush_pending(path, batch_size)
+        if not flushed:
+            return total
+        total += flushed
+
+
+def recover_orphaned_journals(directory=None):
+    """
+    Replay and remove journals left behind by dead processes.
+    Returns {journal path: records replayed}.
+    """
+    if fcntl is None:
+        return {}
+    recovered = {}
+    for path in sorted(glob.glob(os.path.join(directory or journal_dir(), _JOURNAL_PATTERN))):
+        if _journal is not None and path == _journal.path:
+            continue
+        try:
+            fh = open(path, "rb")
+        except FileNotFoundError:
+            continue  # recovered by another process meanwhile
+        with fh:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue  # still owned by a live process
+            if not os.path.exists(path):
+                continue
+            recovered[path] = drain_journal(path)
+            os.remove(path)
+            if os.path.exists(_offset_path(path)):
+                os.remove(_offset_path(path))
+    return recovered
+
+
+class JournalWriter(threading.Thread):
+    """Background thread draining this process's journal into the database."""
+
+    def __init__(self, journal):
+        super().__init__(name="ballot-journal-writer", daemon=True)
+        self.journal = journal
+        self.flushed = 0
+        self.last_flush_at = None
+        self.last_error = None
+
+    def run(self):
+        interval = getattr(settings, "VOTE_JOURNAL_FLUSH_INTERVAL", 1.0)
+        next_recovery = 0
+        while True:
+            close_old_connections()
+            try:
+                if time.monotonic() >= next_recovery:
+                    recover_orphaned_journals()
+                    next_recovery = time.monotonic() + 30
+                count = flush_pending(self.journal.path)
+                if count:
+                    self.flushed += count
+                    self.last_flush_at = time.time()
+                self.last_error = None
+            except Exception as e:
+                logger.exception("Ballot journal writer failed")
+                self.last_error = str(e)
+                count = 0
+            if not count:
+                time.sleep(interval)
+
+
+def journal_status():
+    """Writer lag for every journal in the journal directory."""
+    now = time.time()
+    journals = []
+    for path in sorted(glob.glob(os.path.join(journal_dir(), _JOURNAL_PATTERN))):
+        try:
+            records, _ = read_pending(path, read_offset(path))
+        except FileNotFoundError:
+            continue
+        journals.append({
+            "journal": os.path.basename(path),
+            "pending_records": len(records),
+            "oldest_pending_age_seconds": round(now - records[0]["accepted_at"], 3) if records else 0.0,
+        })
+
+    status = {
+        "mode": getattr(settings, "VOTE_INTAKE_MODE", "direct"),
+        "checked_at": timezone.now().isoformat(),
+        "pending_records": sum(j["pending_records"] for j in journals),
+        "dead_letter_records": len(read_dead_letters()),
+        "max_lag_seconds": max((j["oldest_pending_age_seconds"] for j in journals), default=0.0),
+        "journals": journals,
+    }
+    if _journal is not None and _journal.pid == os.getpid():
+        status["this_process"] = {
+            "pid": _journal.pid,
+            "appended": _journal.appended,
+            "flushed": _writer.flushed if _writer else None,
+            "writer_running": bool(_writer and _writer.is_alive()),
+            "last_error": _writer.last_error if _writer else None,
+        }
+    return status
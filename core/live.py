@@ -0,0 +1,178 @@
+"""
+Live results/turnout updates streamed as Server-Sent Events (ASGI only).
+
+One ChangeFeed per process (per event loop) watches the elections that have
+subscribers. Every settings.LIVE_UPDATES_INTERVAL seconds it reads each
+watched election's results version, ballot count and turnout counters once,
+and when something changed it publishes a compact delta to every
+subscriber. Changes made by any worker are picked up because the feed reads
+the shared tables; bursts of votes between two reads are coalesced into a
+single delta. A failed read is logged and retried at the next interval;
+subscribers of an election that was deleted get a `closed` event and their
+stream ends.
+"""
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import Election
+from .tallies import candidate_vote_counts, election_summary, results_version
+from .turnout import turnout_breakdown
+
+logger = logging.getLogger(__name__)
+
+_SUBSCRIBER_BUFFER = 16
+_CLOSED = None  # queued to end a subscriber's stream
+
+
+def election_state(election_id, previous=None):
+    """
+    Current live state of an election, or None if it no longer exists.
+    Candidate counts are only re-read when the results version moved since
+    `previous`.
+    """
+    if not Election.objects.filter(pk=election_id).exists():
+        return None
+    version, _ = results_version(election_id)
+    ballots, last_vote_at = election_summary(election_id)
+    totals, _ = turnout_breakdown(election_id)
+    if previous is not None and previous["version"] == version:
+        candidates = previous["candidates"]
+    else:
+        candidates = {str(pk): votes for pk, votes in candidate_vote_counts(election_id=election_id).items()}
+    return {
+        "version": version,
+        "ballots_cast": ballots,
+        "last_vote_at": last_vote_at.isoformat() if last_vote_at else None,
+        **totals,
+        "candidates": candidates,
+    }
+
+
+def state_delta(previous, current):
+    """The fields of `current` that differ from `previous` (candidates by id)."""
+    delta = {
+        key: value for key, value in current.items()
+        if key != "candidates" and previous.get(key) != value
+    }
+    candidates = {
+        pk: votes for pk, votes in current["candidates"].items()
+        if previous["candidates"].get(pk) != votes
+    }
+    if candidates:
+        delta["candidates"] = candidates
+    return delta
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class ChangeFeed:
+    """Polls watched elections once per interval and fans deltas out."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.subscribers = {}  # election_id -> set of asyncio.Queue
+        self.states = {}  # election_id -> last published state
+        self._task = None
+
+    async def subscribe(self, election_id):
+        """Return (queue, current state) for a new subscriber."""
+        state = self.states.get(election_id)
+        if state is None:
+            state = await sync_to_async(election_state)(election_id)
+            if state is None:
+                raise Election.DoesNotExist(election_id)
+            self.states.setdefault(election_id, state)
+        queue = asyncio.Queue(maxsize=_SUBSCRIBER_BUFFER)
+        self.subscribers.setdefault(election_id, set()).add(queue)
+        if self._task is None or self._task.done():
+            self._task = self.loop.create_task(self.run())
+        return queue, state
+
+    def unsubscribe(self, election_id, queue):
+        queues = self.subscribers.get(election_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[election_id]
+                self.states.pop(election_id, None)
+
+    def publish(self, election_id, message):
+        for queue in self.subscribers.get(election_id, ()):
+            if queue.full():
+                queue.get_nowait()  # a slow client loses its oldest delta, not the newest
+            queue.put_nowait(message)
+
+    def close(self, election_id, message):
+        """Send `message` and end the stream of every subscriber of an election."""
+        self.publish(election_id, message)
+        self.publish(election_id, _CLOSED)
+        self.subscribers.pop(election_id, None)
+        self.states.pop(election_id, None)
+
+    async def poll(self):
+        for election_id in list(self.subscribers):
+            previous = self.states.get(election_id)
+            try:
+                current = await sync_to_async(election_state)(election_id, previous)
+            except Exception:
+                logger.exception("Live updates: reading election %s failed", election_id)
+                continue
+            if election_id not in self.subscribers:
+                continue
+            if current is None:
+                self.close(election_id, format_event("closed", {"detail": "Election not found."}))
+                continue
+            self.states[election_id] = current
+            delta = state_delta(previous, current) if previous is not None else current
+            if delta:
+                self.publish(election_id, format_event("delta", delta))
+
+    async def run(self):
+        while self.subscribers:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("Live updates: poll failed")
+
+
+_feed = None
+
+
+def get_feed():
+    """The change feed of the running event loop."""
+    global _feed
+    if _feed is None or _feed.loop is not asyncio.get_running_loop():
+        _feed = ChangeFeed(getattr(settings, "LIVE_UPDATES_INTERVAL", 0.5))
+    return _feed
+
+
+async def stream(election_id):
+    """SSE stream: a snapshot event, then deltas, with keep-alive comments."""
+    feed = get_feed()
+    try:
+        queue, state = await feed.subscribe(election_id)
+    except Election.DoesNotExist:
+        yield format_event("closed", {"detail": "Election not found."})
+        return
+    keepalive = getattr(settings, "LIVE_UPDATES_KEEPALIVE", 15)
+    try:
+        yield format_event("snapshot", state)
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message is _CLOSED:
+                return
+            yield message
+    finally:
+        feed.unsubscribe(election_id, queue)
@@ -0,0 +1,278 @@
+"""
+Non-blocking log handlers.
+
+Handlers only put records on a bounded in-memory queue; one background
+writer per process formats them and writes them in batches (one write and
+one flush per destination per batch). When the queue is full, records are
+dropped and counted (evoting_log_records_dropped_total) instead of
+blocking the request thread. Handlers created with a `timeout` (the
+security audit log) first wait up to that many seconds for room. File
+handlers rotate by size and gzip the rotated files.
+
+Messages keep %-style arguments until the writer formats them, and
+JsonFormatter turns "EVENT: key=%s, other=%s" messages into fields.
+"""
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from django.conf import settings
+
+_PLACEHOLDER = re.compile(r"(?:(\w+)=)?%[sdrf]")
+_EVENT = re.compile(r"([A-Z][A-Z_]+):")
+
+
+def event_name(record):
+    """The event type of an "EVENT: ..." message, e.g. LOGIN_SUCCESS."""
+    match = _EVENT.match(str(record.msg))
+    if match is None and record.args:
+        # The event itself is an argument ("STUDENT_%s: ...").
+        match = _EVENT.match(record.getMessage())
+    return match.group(1) if match else None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, event, fields, message."""
+
+    def format(self, record):
+        message = record.getMessage()
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.process,
+            "thread": record.thread,
+        }
+        event = event_name(record)
+        if event:
+            entry["event"] = event
+        if isinstance(record.args, tuple):
+            names = [match.group(1) for match in _PLACEHOLDER.finditer(str(record.msg))]
+            for name, value in zip(names, record.args):
+                if name:
+                    entry.setdefault(name, value if isinstance(value, (int, float, bool, type(None))) else str(value))
+        entry["message"] = message
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _Writer:
+    """The process's background log writer."""
+
+    def __init__(self):
+        self.queue = None
+        self.pid = None
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def put(self, handler, record):
+        if self.pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put((handler, record), timeout=handler.timeout or None, block=bool(handler.timeout))
+        except queue.Full:
+            self.dropped += 1
+            # Imported here: core.metrics imports this module.
+            from .metrics import LOG_RECORDS_DROPPED
+
+            LOG_RECORDS_DROPPED.inc(handler=handler.name or type(handler).__name__)
+
+    def _start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.queue = queue.Queue(maxsize=getattr(settings, "LOG_QUEUE_SIZE", 10000))
+            self.pid = os.getpid()
+            threading.Thread(target=self._run, name="log-writer", daemon=True).start()
+
+    def _run(self):
+        batch_size = getattr(settings, "LOG_BATCH_SIZE", 500)
+        interval = getattr(settings, "LOG_FLUSH_INTERVAL", 0.5)
+        while True:
+            # Collect what arrives within `interval` of the first record.
+            items = [self.queue.get()]
+            deadline = time.monotonic() + interval
+            try:
+                while len(items) < batch_size and not isinstance(items[-1][1], threading.Event):
+                    items.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                pass
+            self._write(items)
+
+    def _write(self, items):
+        batches = {}
+        waiters = []
+        for handler, record in items:
+            if isinstance(record, threading.Event):
+                waiters.append(record)
+                continue
+            try:
+                batches.setdefault(handler, []).append(handler.format(record))
+            except Exception:
+                handler.handleError(record)
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            for handler, lines in batches.items():
+                lines.append(json.dumps({"level": "WARNING", "event": "LOG_RECORDS_DROPPED", "count": dropped}))
+        for handler, lines in batches.items():
+            try:
+                handler.write_lines(lines)
+            except Exception:
+                sys.stderr.write(f"log writer failed for {handler!r}\n")
+        for waiter in waiters:
+            waiter.set()
+
+    def drain(self, timeout=5):
+        """Wait until every record queued so far is written."""
+        if self.pid != os.getpid():
+            return
+        done = threading.Event()
+        try:
+            self.queue.put((None, done), timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+
+_writer = _Writer()
+atexit.register(_writer.drain)
+
+
+def flush_logs(timeout=5):
+    """Block until queued log records are written (shutdown, tests)."""
+    _writer.drain(timeout)
+
+
+class BatchingHandler(logging.Handler):
+    """
+    Base class: queue the record; `write_lines` runs on the writer thread.
+    With a `timeout` a full queue makes the logging thread wait up to that
+    many seconds for room before the record is dropped.
+    """
+
+    def __init__(self, level=logging.NOTSET, timeout=0):
+        super().__init__(level)
+        self.timeout = timeout
+
+    def emit(self, record):
+        _writer.put(self, record)
+
+    def flush(self):
+        # Called by logging.shutdown(); request code never flushes.
+        flush_logs()
+
+    def write_lines(self, lines):
+        raise NotImplementedError
+
+
+class BatchingStreamHandler(BatchingHandler):
+    def __init__(self, stream=None, level=logging.NOTSET, timeout=0):
+        super().__init__(level, timeout)
+        self.stream = stream
+
+    def write_lines(self, lines):
+        stream = self.stream or sys.stderr
+        stream.write("\n".join(lines) + "\n")
+        stream.flush()
+
+
+class BatchingFileHandler(BatchingHandler):
+    """
+    Append to `filename`. Past `max_bytes` it is renamed to `filename.1`,
+    and the previous `filename.1` is gzipped to `filename.2.gz`; up to
+    `backup_count` rotated files are kept.
+
+    Every worker process appends to the same file, so rotation never
+    truncates: one worker renames the file under an exclusive lock on
+    `filename.lock`, and the others reopen it when they notice it was
+    replaced. Lines they wrote to the old file meanwhile land in
+    `filename.1`, which is only compressed at the next rotation.
+    """
+
+    def __init__(self, filename, max_bytes=50 * 1024 * 1024, backup_count=10, level=logging.NOTSET, timeout=0):
+        super().__init__(level, timeout)
+        self.filename = os.path.abspath(filename)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.file = None
+
+    def write_lines(self, lines):
+        data = ("\n".join(lines) + "\n").encode()
+        if self.file is None or self._replaced():
+            self._open()
+        if self.max_bytes and self._size() and self._size() + len(data) > self.max_bytes:
+            self.rotate(len(data))
+        self.file.write(data)
+        self.file.flush()
+
+    def _open(self):
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.filename, "ab")
+
+    def _size(self):
+        # The file is shared, so this handle's tell() may be stale.
+        return os.fstat(self.file.fileno()).st_size
+
+    def _replaced(self):
+        try:
+            return os.stat(self.filename).st_ino != os.fstat(self.file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def rotate(self, incoming=0):
+        with self._rotation_lock():
+            # Another worker may have rotated while this one waited.
+            if not self._replaced() and self._size() + incoming > self.max_bytes:
+                self._shift()
+        self._open()
+
+    @contextmanager
+    def _rotation_lock(self):
+        if fcntl is None:  # not POSIX: rotation isn't coordinated across processes
+            yield
+            return
+        with open(f"{self.filename}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _shift(self):
+        if not self.backup_count:
+            os.remove(self.filename)
+            return
+        for index in range(self.backup_count - 1, 1, -1):
+            source = f"{self.filename}.{index}.gz"
+            if os.path.exists(source):
+                os.replace(source, f"{self.filename}.{index + 1}.gz")
+        previous = f"{self.filename}.1"
+        if os.path.exists(previous):
+            if self.backup_count > 1:
+                with open(previous, "rb") as src, gzip.open(f"{self.filename}.2.gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            os.remove(previous)
+        os.replace(self.filename, previous)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        super().close()
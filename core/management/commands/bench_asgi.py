@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.bench.seeding import seed_election
+from core.bench.server import LocalServer, request_json
+from core.bench.stats import summarize
+from core.models import User
+
+MODES = ("wsgi", "asgi")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI (gunicorn gthread) and ASGI (uvicorn) servers on the "
+        "read endpoints (elections, positions, candidates, ballot, stats) at "
+        "increasing client concurrency. Seeds a throwaway election."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            action="append",
+            dest="levels",
+            help="Concurrent clients (repeatable, default: 10, 50 and 200)",
+        )
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+        parser.add_argument("--mode", choices=MODES, action="append", dest="modes", help="Default: both")
+        parser.add_argument("--workers", type=int, default=1, help="Server worker processes")
+        parser.add_argument("--threads", type=int, default=8, help="Threads per WSGI worker")
+        parser.add_argument("--positions", type=int, default=5)
+        parser.add_argument("--candidates", type=int, default=4)
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    def handle(self, *args, **options):
+        seeded = seed_election(
+            positions=options["positions"], candidates=options["candidates"], voters=100, name="ASGI benchmark"
+        )
+        staff = User.objects.create_user(username="bench-asgi", role="staff")
+        token = str(AccessToken.for_user(staff))
+        election_id = seeded.election.id
+        position_id = seeded.positions[0].id
+        endpoints = {
+            "elections": ("api/elections/?is_active=true", None),
+            "positions": (f"api/positions/?election_id={election_id}", None),
+            "candidates": (f"api/candidates/?position_id={position_id}", None),
+            "ballot": (f"api/elections/{election_id}/ballot/", None),
+            "stats": (f"api/elections/{election_id}/stats/", {"Authorization": f"Bearer {token}"}),
+        }
+
+        results = {}
+        try:
+            for mode in options["modes"] or MODES:
+                server = LocalServer(
+                    workers=options["workers"],
+                    threads=options["threads"],
+                    asgi=mode == "asgi",
+                    quiet=options["verbosity"] < 2,
+                )
+                with server:
+                    results[mode] = {}
+                    for level in options["levels"] or [10, 50, 200]:
+                        result = self._run(server.url, endpoints, level, options["duration"])
+                        results[mode][str(level)] = result
+                        self.stdout.write(
+                            f"{mode}  {level:>4} clients  {result['per_second']:>9} req/s  "
+                            f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms  "
+                            f"errors={result['errors']}"
+                        )
+        finally:
+            staff.delete()
+            seeded.delete()
+
+        if options["output"]:
+            run_options = {k: options[k] for k in ("levels", "duration", "workers", "threads", "positions", "candidates")}
+            run_options["database"] = connection.vendor
+            with open(options["output"], "w") as fh:
+                json.dump({"options": run_options, "results": results}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _run(self, base_url, endpoints, concurrency, duration):
+        """Each client requests the endpoints in turn until `duration` is up."""
+        latencies = {name: [] for name in endpoints}
+        errors = Counter()
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def client(offset):
+            names = list(endpoints)
+            index = offset
+            while time.perf_counter() < deadline:
+                name = names[index % len(names)]
+                index += 1
+                path, headers = endpoints[name]
+                started = time.perf_counter()
+                try:
+                    status, _ = request_json(base_url + path, headers=headers)
+                except OSError:
+                    status = None
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if status == 200:
+                        latencies[name].append(elapsed)
+                    else:
+                        errors[name] += 1
+
+        started = time.perf_counter()
+        clients = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        every = [latency for values in latencies.values() for latency in values]
+        return {
+            **summarize(every, elapsed),
+            "errors": sum(errors.values()),
+            "endpoints": {
+                name: {**summarize(values, elapsed), "errors": errors[name]} for name, values in latencies.items()
+            },
+        }
@@ -0,0 +1,110 @@
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.bench.seeding import seed_election
+from core.bench.stats import summarize
+from core.models import User
+from core.snapshots import clear_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the results/stats endpoints in-process against seeded elections "
+        "of increasing size, with query counts and peak Python memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--votes",
+            type=int,
+            action="append",
+            dest="sizes",
+            help="Vote rows to seed (repeatable, default: 10000, 100000 and 1000000)",
+        )
+        parser.add_argument("--positions", type=int, default=5)
+        parser.add_argument("--candidates", type=int, default=4)
+        parser.add_argument("--repeat", type=int, default=5, help="Timed requests per endpoint")
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    def handle(self, *args, **options):
+        client = APIClient(HTTP_HOST="localhost")
+        user = User.objects.create_user(username="bench-results", role="staff")
+        client.force_authenticate(user=user)
+
+        results = {}
+        try:
+            for size in options["sizes"] or [10_000, 100_000, 1_000_000]:
+                voters = max(1, size // options["positions"])
+                self.stdout.write(f"Seeding {voters} voters x {options['positions']} positions...")
+                seeded = seed_election(
+                    positions=options["positions"],
+                    candidates=options["candidates"],
+                    voters=voters,
+                    name=f"Benchmark ({size} votes)",
+                )
+                try:
+                    seeded.cast_votes()
+                    results[str(size)] = self._run(client, seeded, options["repeat"])
+                finally:
+                    seeded.delete()
+
+                for endpoint, summary in results[str(size)].items():
+                    self.stdout.write(
+                        f"{size:>9} votes  {endpoint:<24} p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms  "
+                        f"queries={summary['queries']} peak={summary['peak_kib']}KiB"
+                    )
+        finally:
+            user.delete()
+
+        if options["output"]:
+            run_options = {k: options[k] for k in ("positions", "candidates", "repeat")}
+            run_options["database"] = connection.vendor
+            with open(options["output"], "w") as fh:
+                json.dump({"options": run_options, "results": results}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _run(self, client, seeded, repeat):
+        election_id = seeded.election.id
+        position_id = seeded.positions[0].id
+        # Snapshot-backed views are measured cold (snapshot rebuilt on every
+        # request) and warm (served from this worker's snapshot).
+        endpoints = {
+            "results": (f"/api/elections/{election_id}/results/", True),
+            "results (warm)": (f"/api/elections/{election_id}/results/", False),
+            "stats": (f"/api/elections/{election_id}/stats/", True),
+            "stats (warm)": (f"/api/elections/{election_id}/stats/", False),
+            "position_stats": (f"/api/votes/position-stats/?position_id={position_id}", False),
+            "candidates_for_position": (f"/api/candidates-for-position/?position_id={position_id}", False),
+        }
+
+        results = {}
+        for name, (url, cold) in endpoints.items():
+            client.get(url)  # warm up connections and imports
+            latencies = []
+            for _ in range(repeat):
+                if cold:
+                    clear_snapshots()
+                reset_queries()  # a full query log (DEBUG) would hide new queries
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {url} returned {response.status_code}")
+
+            # Memory is traced on one extra request so it doesn't skew the timings.
+            if cold:
+                clear_snapshots()
+            tracemalloc.start()
+            client.get(url)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[name] = {**summarize(latencies), "queries": len(captured), "peak_kib": round(peak / 1024, 1)}
+        return results
@@ -0,0 +1,98 @@
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from openpyxl import Workbook
+
+from core.roster import read_roster
+
+
+def _rows(count):
+    for i in range(count):
+        yield [f"B{i:07d}", f"Student Number {i}", f"Class {i % 40}"]
+
+
+def write_xlsx(path, count):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["student_id", "full_name", "class_name"])
+    for row in _rows(count):
+        sheet.append(row)
+    workbook.save(path)
+
+
+def write_csv(path, count):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["student_id", "full_name", "class_name"])
+        writer.writerows(_rows(count))
+
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv}
+
+
+def _parse(path):
+    with open(path, "rb") as fh:
+        return sum(1 for _ in read_roster(fh, path))
+
+
+class Command(BaseCommand):
+    help = "Benchmark roster parsing (rows/second and peak memory) for Excel and CSV files. No database writes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            action="append",
+            help="Rows per generated file (repeatable, default: 10000 and 100000)",
+        )
+        parser.add_argument("--format", action="append", dest="formats", choices=sorted(WRITERS))
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    def handle(self, *args, **options):
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            for count in options["rows"] or [10_000, 100_000]:
+                for fmt in options["formats"] or sorted(WRITERS):
+                    path = os.path.join(directory, f"roster-{count}.{fmt}")
+                    WRITERS[fmt](path, count)
+                    results.append(self._measure(path, fmt, count))
+                    os.remove(path)
+
+                    result = results[-1]
+                    self.stdout.write(
+                        f"{fmt:<5} {count:>8} rows  {result['rows_per_second']:>10} rows/s  "
+                        f"peak={result['peak_memory_kb']} KiB  file={result['file_kb']} KiB"
+                    )
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump({"results": results}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _measure(self, path, fmt, count):
+        started = time.perf_counter()
+        parsed = _parse(path)
+        elapsed = time.perf_counter() - started
+
+        # Separate pass: tracemalloc slows allocation-heavy code down.
+        tracemalloc.start()
+        try:
+            _parse(path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "format": fmt,
+            "rows": count,
+            "parsed": parsed,
+            "file_kb": round(os.path.getsize(path) / 1024, 1),
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(parsed / elapsed, 1) if elapsed else None,
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
@@ -0,0 +1,104 @@
+import json
+import queue
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from core.bench.seeding import seed_election
+from core.bench.stats import summarize
+from core.voting import COMMIT_STRATEGIES, commit_ballot
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the vote commit strategies under concurrent voters. "
+        "Seeds a throwaway election per strategy; run against PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--voters", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--positions", type=int, default=5)
+        parser.add_argument("--candidates", type=int, default=4)
+        parser.add_argument(
+            "--strategy",
+            action="append",
+            dest="strategies",
+            choices=sorted(COMMIT_STRATEGIES),
+            help="Strategy to run (repeatable, default: all)",
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            raise CommandError("SQLite serializes writers; run this benchmark against PostgreSQL.")
+
+        results = {}
+        for strategy in options["strategies"] or sorted(COMMIT_STRATEGIES):
+            seeded = seed_election(
+                positions=options["positions"],
+                candidates=options["candidates"],
+                voters=options["voters"],
+                name=f"Benchmark ({strategy})",
+            )
+            try:
+                results[strategy] = self._run(seeded, strategy, options["threads"])
+            finally:
+                seeded.delete()
+
+            summary = results[strategy]
+            self.stdout.write(
+                f"{strategy:<12} {summary['per_second']:>9} ballots/s  "
+                f"p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms  "
+                f"errors={summary['errors']}"
+            )
+
+        if options["output"]:
+            run_options = {k: options[k] for k in ("voters", "threads", "positions", "candidates")}
+            with open(options["output"], "w") as fh:
+                json.dump({"options": run_options, "results": results}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _run(self, seeded, strategy, threads):
+        work = queue.Queue()
+        for index, student in enumerate(seeded.voters):
+            work.put((index, student))
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def voter():
+            close_old_connections()
+            try:
+                while True:
+                    try:
+                        index, student = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    started = time.perf_counter()
+                    try:
+                        commit_ballot(student.pk, seeded.token_for(student), seeded.ballot_for(index), strategy)
+                    except Exception as e:
+                        with lock:
+                            errors.append(str(e))
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=voter) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        summary = summarize(latencies, elapsed)
+        summary["errors"] = len(errors)
+        summary["sample_errors"] = errors[:5]
+        return summary
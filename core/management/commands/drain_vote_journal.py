@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.intake import dead_letter_path, journal_dir, read_dead_letters, recover_orphaned_journals
+
+
+class Command(BaseCommand):
+    help = "Replay ballot journals left behind by stopped processes into the Vote table"
+
+    def handle(self, *args, **options):
+        recovered = recover_orphaned_journals()
+        for path, count in recovered.items():
+            self.stdout.write(f"{path}: {count} records replayed")
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(recovered)} journal(s) recovered from {journal_dir()}.")
+        )
+        dead_letters = read_dead_letters()
+        if dead_letters:
+            # These voters are marked as voted but their ballots aren't counted.
+            self.stderr.write(self.style.ERROR(
+                f"{len(dead_letters)} ballot(s) could not be written and are set aside in {dead_letter_path()}:"
+            ))
+            for record in dead_letters:
+                self.stderr.write(f"  receipt={record.get('receipt')} reason={record.get('reason')}")
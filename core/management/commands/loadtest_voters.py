@@ -0,0 +1,191 @@
+import json
+import queue
+import secrets
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.bench.seeding import seed_election
+from core.bench.server import LocalServer, request_json
+from core.bench.stats import summarize
+from core.models import User
+
+STEPS = ("activate", "login", "ballot", "vote")
+
+
+def is_lock_timeout(detail):
+    detail = str(detail).lower()
+    return "lock" in detail and ("timeout" in detail or "locked" in detail)
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent simulated voters end to end (activation, voter login, "
+        "ballot fetch, vote) against a local server, and report throughput and "
+        "latency per endpoint. Seeds a throwaway election."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--voters", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=32, help="Simulated voters in flight")
+        parser.add_argument("--positions", type=int, default=5)
+        parser.add_argument("--candidates", type=int, default=4)
+        parser.add_argument("--workers", type=int, default=2, help="Server worker processes")
+        parser.add_argument("--threads", type=int, default=8, help="Threads per server worker")
+        parser.add_argument("--url", help="Target an already running server instead of starting one")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded election afterwards")
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            self.stderr.write(self.style.WARNING(
+                "SQLite serializes writers; expect lock timeouts. Use PostgreSQL for real numbers."
+            ))
+
+        seeded = seed_election(
+            positions=options["positions"],
+            candidates=options["candidates"],
+            voters=options["voters"],
+            activated=False,
+            name="Load test",
+        )
+        password = secrets.token_urlsafe(16)
+        activator = User.objects.create_user(
+            username=f"loadtest-{secrets.token_hex(4)}", password=password, role="activator"
+        )
+        try:
+            if options["url"]:
+                results = self._run(options["url"], seeded, activator.username, password, options["concurrency"])
+            else:
+                server = LocalServer(
+                    workers=options["workers"], threads=options["threads"], quiet=options["verbosity"] < 2
+                )
+                with server:
+                    results = self._run(server.url, seeded, activator.username, password, options["concurrency"])
+        finally:
+            activator.delete()
+            if not options["keep"]:
+                seeded.delete()
+
+        self._report(results)
+        if options["output"]:
+            run_options = {
+                k: options[k]
+                for k in ("voters", "concurrency", "positions", "candidates", "workers", "threads", "url")
+            }
+            run_options["database"] = connection.vendor
+            with open(options["output"], "w") as fh:
+                json.dump({"options": run_options, "results": results}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _run(self, base_url, seeded, username, password, concurrency):
+        api = base_url.rstrip("/") + "/api/"
+        status, body = request_json(f"{api}auth/login/", "POST", {"username": username, "password": password})
+        if status != 200:
+            raise CommandError(f"Activator login failed ({status}): {body}")
+        staff_headers = {"Authorization": f"Bearer {body['access']}"}
+        election_id = seeded.election.id
+
+        work = queue.Queue()
+        for student in seeded.voters:
+            work.put(student.student_id)
+
+        latencies = {step: [] for step in STEPS}
+        errors = Counter()
+        lock_timeouts = Counter()
+        samples = []
+        completed = [0]
+        lock = threading.Lock()
+
+        def timed(step, url, method="GET", data=None, headers=None, expected=200):
+            started = time.perf_counter()
+            try:
+                status, body = request_json(url, method, data, headers)
+            except OSError as e:
+                status, body = None, {"detail": str(e)}
+            elapsed = time.perf_counter() - started
+            with lock:
+                if status == expected:
+                    latencies[step].append(elapsed)
+                    return body
+                errors[step] += 1
+                detail = (body or {}).get("detail", body) if isinstance(body, dict) else body
+                if is_lock_timeout(detail):
+                    lock_timeouts[step] += 1
+                if len(samples) < 10:
+                    samples.append({"step": step, "status": status, "detail": str(detail)[:200]})
+            return None
+
+        def voter():
+            while True:
+                try:
+                    student_id = work.get_nowait()
+                except queue.Empty:
+                    return
+                activated = timed(
+                    "activate", f"{api}students/activate/", "POST",
+                    {"student_id": student_id, "election_id": election_id, "is_active": True},
+                    staff_headers,
+                )
+                if activated is None:
+                    continue
+                login = timed("login", f"{api}voter/login/", "POST", {"student_id": student_id})
+                if login is None:
+                    continue
+                ballot = timed("ballot", f"{api}elections/{election_id}/ballot/")
+                if ballot is None:
+                    continue
+                index = int(student_id[1:])
+                votes = [
+                    {
+                        "election": election_id,
+                        "position": position["id"],
+                        "candidate": position["candidates"][index % len(position["candidates"])]["id"],
+                    }
+                    for position in ballot["positions"]
+                    if position["candidates"]
+                ]
+                voter_headers = {
+                    "X-Student-Id": student_id,
+                    "X-Election-Id": str(election_id),
+                    "X-Voter-Token": login["token"],
+                }
+                if timed("vote", f"{api}vote/", "POST", {"votes": votes}, voter_headers, expected=201) is not None:
+                    with lock:
+                        completed[0] += 1
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=voter) for _ in range(concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "voters_completed": completed[0],
+            "voters_per_minute": round(completed[0] / elapsed * 60, 1) if elapsed else 0.0,
+            "endpoints": {
+                step: {**summarize(latencies[step], elapsed), "errors": errors[step], "lock_timeouts": lock_timeouts[step]}
+                for step in STEPS
+            },
+            "errors": sum(errors.values()),
+            "lock_timeouts": sum(lock_timeouts.values()),
+            "sample_errors": samples,
+        }
+
+    def _report(self, results):
+        self.stdout.write(
+            f"{results['voters_completed']} voters in {results['elapsed_s']}s "
+            f"({results['voters_per_minute']} voters/min)"
+        )
+        for step, summary in results["endpoints"].items():
+            self.stdout.write(
+                f"{step:<10} {summary.get('per_second', 0):>9} req/s  "
+                f"p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms  "
+                f"errors={summary['errors']} lock_timeouts={summary['lock_timeouts']}"
+            )
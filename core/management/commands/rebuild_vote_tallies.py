@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Election
+from core.tallies import rebuild_tallies
+
+
+class Command(BaseCommand):
+    help = "Rebuild the incremental vote tallies from the raw Vote rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--election",
+            type=int,
+            action="append",
+            dest="election_ids",
+            help="Election id to rebuild (repeatable, default: all elections)",
+        )
+
+    def handle(self, *args, **options):
+        elections = Election.objects.all().order_by("id")
+        if options["election_ids"]:
+            elections = elections.filter(pk__in=options["election_ids"])
+            if not elections.exists():
+                raise CommandError("No matching elections found.")
+
+        for election in elections:
+            ballots, candidates = rebuild_tallies(election.id)
+            self.stdout.write(
+                f"Election {election.id} ({election.name}): "
+                f"{ballots} ballots, {candidates} candidate tallies"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Vote tallies rebuilt."))
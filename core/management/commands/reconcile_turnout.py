@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Election
+from core.turnout import reconcile_turnout
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-class turnout counters from the Student rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--election",
+            type=int,
+            action="append",
+            dest="election_ids",
+            help="Election id to reconcile (repeatable, default: all elections)",
+        )
+
+    def handle(self, *args, **options):
+        elections = Election.objects.all().order_by("id")
+        if options["election_ids"]:
+            elections = elections.filter(pk__in=options["election_ids"])
+            if not elections.exists():
+                raise CommandError("No matching elections found.")
+
+        for election in elections:
+            classes = reconcile_turnout(election.id)
+            self.stdout.write(f"Election {election.id} ({election.name}): {classes} class counters")
+
+        self.stdout.write(self.style.SUCCESS("Turnout counters reconciled."))
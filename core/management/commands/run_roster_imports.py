@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import RosterImportJob
+from core.roster import run_pending_import_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run pending background roster imports. Use --loop to keep polling, "
+        "e.g. as a dedicated worker process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs")
+        parser.add_argument("--interval", type=float, default=2.0)
+        parser.add_argument(
+            "--retry-running",
+            action="store_true",
+            help="Requeue jobs left running by a stopped process before starting",
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_running"]:
+            requeued = RosterImportJob.objects.filter(status=RosterImportJob.RUNNING).update(
+                status=RosterImportJob.PENDING, started_at=None
+            )
+            self.stdout.write(f"{requeued} running job(s) requeued.")
+
+        while True:
+            ran = run_pending_import_jobs()
+            if ran:
+                self.stdout.write(self.style.SUCCESS(f"{ran} roster import(s) finished."))
+            if not options["loop"]:
+                return
+            if not ran:
+                time.sleep(options["interval"])
@@ -0,0 +1,252 @@
+"""
+In-process metrics exposed in Prometheus text format at /api/metrics/.
+
+Each process keeps its own counters and histograms and writes them to
+METRICS_DIR/metrics-<pid>.json every METRICS_FLUSH_INTERVAL seconds. A
+scrape, served by whichever gunicorn worker gets it, sums the files of all
+workers, so the totals cover every worker (including ones that have since
+exited, as Prometheus expects of counters). Clear METRICS_DIR when the
+server starts.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .logging_handlers import event_name
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # label values -> value
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def describe(self):
+        return {"type": self.kind, "help": self.documentation, "labels": self.labelnames}
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.changed()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            # [count per bucket..., count above the last bucket, sum]
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            state[index] += 1
+            state[-1] += value
+        self.registry.changed()
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def describe(self):
+        return {**super().describe(), "buckets": self.buckets}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self._pid = None
+        self._dirty = threading.Event()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def changed(self):
+        self._dirty.set()
+        if self._pid != os.getpid():
+            self._start_flusher()
+
+    def _start_flusher(self):
+        with self.lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked from a process that had already recorded metrics:
+                # those belong to the parent's file.
+                for metric in self.metrics.values():
+                    metric.values.clear()
+            self._pid = os.getpid()
+        thread = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+        thread.start()
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            self._dirty.wait()
+            time.sleep(getattr(settings, "METRICS_FLUSH_INTERVAL", 5))
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: {**metric.describe(), "values": [[list(k), v] for k, v in metric.values.items()]}
+                for name, metric in self.metrics.items()
+            }
+
+    def flush(self):
+        """Write this process's metrics to its file in METRICS_DIR."""
+        self._dirty.clear()
+        directory = settings.METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp, path)
+
+    def collect(self):
+        """Sum the metrics written by every process."""
+        self.flush()
+        merged = {name: {**metric.describe(), "values": {}} for name, metric in self.metrics.items()}
+        directory = settings.METRICS_DIR
+        for file_name in sorted(os.listdir(directory)):
+            if not (file_name.startswith("metrics-") and file_name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(directory, file_name)) as fh:
+                    snapshot = json.load(fh)
+            except (OSError, ValueError):
+                continue  # a worker exited mid-write; its previous file was replaced atomically
+            for name, metric in snapshot.items():
+                if name not in merged:
+                    continue
+                values = merged[name]["values"]
+                for labels, value in metric["values"]:
+                    key = tuple(labels)
+                    if isinstance(value, list):
+                        current = values.get(key)
+                        values[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                    else:
+                        values[key] = values.get(key, 0) + value
+        return merged
+
+    def render(self):
+        """The metrics of all processes in the Prometheus text format."""
+        lines = []
+        for name, metric in self.collect().items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for key, value in sorted(metric["values"].items()):
+                labels = list(zip(metric["labels"], key))
+                if metric["type"] == "counter":
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric["buckets"] + ("+Inf",), value[:-1]):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Forget this process's metrics (tests)."""
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.values.clear()
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    "evoting_request_duration_seconds", "Request latency by view.", ["view", "method"]
+)
+REQUESTS = registry.counter(
+    "evoting_requests_total", "Requests by view and response status.", ["view", "method", "status"]
+)
+REQUEST_QUERIES = registry.histogram(
+    "evoting_request_queries", "SQL queries per request by view.", ["view"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+SECURITY_EVENTS = registry.counter(
+    "evoting_security_events_total", "Security log events (LOGIN_SUCCESS, VOTE_SUCCESS, ...).", ["event"]
+)
+VOTE_LOCK_WAIT = registry.histogram(
+    "evoting_vote_lock_wait_seconds",
+    "Time spent claiming/locking the voter row and updating tally rows while recording a ballot.",
+    ["step"],
+)
+VOTE_TRANSACTION = registry.histogram(
+    "evoting_vote_transaction_seconds", "Duration of the ballot transaction by strategy.", ["strategy"]
+)
+VOTE_JOURNAL_DEAD_LETTERS = registry.counter(
+    "evoting_vote_journal_dead_letters_total",
+    "Journaled ballots set aside in the dead-letter file because they could not be written.",
+    ["reason"],
+)
+
+LOG_RECORDS_DROPPED = registry.counter(
+    "evoting_log_records_dropped_total",
+    "Log records dropped because the log writer's queue was full.",
+    ["handler"],
+)
+
+
+class SecurityEventHandler(logging.Handler):
+    """Count security log lines by their event type (the text before ':')."""
+
+    def emit(self, record):
+        event = event_name(record)
+        if event:
+            SECURITY_EVENTS.inc(event=event)
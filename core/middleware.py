@@ -1,47 +1,227 @@
-class HealthCheckSSLRedirectMiddleware:
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import connections
+from django.http import HttpResponse
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .metrics import REQUEST_LATENCY, REQUEST_QUERIES, REQUESTS
+
+performance_logger = logging.getLogger('performance')
+
+
+class HealthCheckMiddleware:
     """
-    Middleware to exclude health check paths from SSL redirect.
-    This allows Railway health checks to work over HTTP while 
-    keeping SSL redirect enabled for all other requests.
+    Answer health probes before any other middleware runs; keep it first in
+    MIDDLEWARE.
+
+    Liveness paths (HEALTH_CHECK_PATHS) get a constant 200 without touching
+    settings, the database or the cache. Readiness paths (READINESS_PATHS)
+    check the database and cache; the result is reused for
+    HEALTH_READINESS_CACHE_SECONDS so frequent probes don't load Postgres.
     """
-    
+    sync_capable = True
+    async_capable = True
+
+    LIVE_BODY = b'{"status": "ok", "service": "evoting-api"}'
+
     def __init__(self, get_response):
         self.get_response = get_response
-        
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.live_paths = frozenset(getattr(settings, "HEALTH_CHECK_PATHS", ()))
+        self.ready_paths = frozenset(getattr(settings, "READINESS_PATHS", ()))
+        self.ready_ttl = getattr(settings, "HEALTH_READINESS_CACHE_SECONDS", 5)
+        self._ready = None  # (checked_at, status_code, body)
+        self._ready_lock = threading.Lock()
+
     def __call__(self, request):
-        # Exclude health check paths from SSL redirect
-        health_check_paths = ['/api/health/', '/health/', '/']
-        
-        if request.path in health_check_paths:
-            # Temporarily disable SSL redirect for health checks
-            request._disable_ssl_redirect = True
-            
-        response = self.get_response(request)
-        return response
+        if self.async_mode:
+            return self.__acall__(request)
+        if request.method in ("GET", "HEAD"):
+            if request.path in self.live_paths:
+                return self.live()
+            if request.path in self.ready_paths:
+                return self.ready()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.method in ("GET", "HEAD"):
+            if request.path in self.live_paths:
+                return self.live()
+            if request.path in self.ready_paths:
+                return await sync_to_async(self.ready)()
+        return await self.get_response(request)
 
+    def live(self):
+        return HttpResponse(self.LIVE_BODY, content_type="application/json")
 
-class CustomSecurityMiddleware:
+    def ready(self):
+        cached = self._ready
+        if cached is None or time.monotonic() - cached[0] >= self.ready_ttl:
+            with self._ready_lock:
+                cached = self._ready
+                if cached is None or time.monotonic() - cached[0] >= self.ready_ttl:
+                    cached = self._ready = (time.monotonic(), *self.check())
+        _, status_code, body = cached
+        return HttpResponse(body, status=status_code, content_type="application/json")
+
+    def check(self):
+        checks = {}
+        try:
+            with connections["default"].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            checks["database"] = "ok"
+        except Exception as e:
+            checks["database"] = f"error: {e.__class__.__name__}"
+        cache = caches["default"]
+        if isinstance(cache, DummyCache):
+            checks["cache"] = "disabled"
+        else:
+            try:
+                cache.set("readiness_probe", 1, 10)
+                checks["cache"] = "ok" if cache.get("readiness_probe") == 1 else "error: no round trip"
+            except Exception as e:
+                checks["cache"] = f"error: {e.__class__.__name__}"
+        ready = not any(result.startswith("error") for result in checks.values())
+        body = json.dumps({"status": "ready" if ready else "unavailable", "checks": checks}).encode()
+        return (200 if ready else 503), body
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
     """
-    Custom security middleware that respects health check exemptions
+    WhiteNoise that can also run async, so under ASGI requests stay on the
+    event loop instead of every request being handed to a thread.
     """
-    
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class QueryTimingMiddleware:
+    """
+    Record per-request query count, DB time, view time and render
+    (serialization) time. They are sent as a Server-Timing header and logged
+    as a REQUEST_TIMING line; requests over their query budget
+    (QUERY_BUDGETS by URL name, else QUERY_BUDGET) are logged at WARNING.
+    Latency and query counts also feed the metrics registry (core.metrics).
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-        
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
     def __call__(self, request):
-        from django.middleware.security import SecurityMiddleware
-        from django.conf import settings
-        
-        # Check if SSL redirect should be disabled for this request
-        if getattr(request, '_disable_ssl_redirect', False):
-            # Temporarily disable SSL redirect
-            original_ssl_redirect = getattr(settings, 'SECURE_SSL_REDIRECT', False)
-            settings.SECURE_SSL_REDIRECT = False
-            
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with self.wrap_connections(request):
             response = self.get_response(request)
-            
-            # Restore original setting
-            settings.SECURE_SSL_REDIRECT = original_ssl_redirect
-            return response
-        else:
-            return self.get_response(request)
+        return self.finish(request, response, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        # Under ASGI, sync views and the async ORM run on the request's
+        # thread-sensitive executor thread; wrap that thread's connections.
+        stack = await sync_to_async(self.wrap_connections)(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, started)
+
+    def wrap_connections(self, request):
+        """Count and time queries on this thread's connections until the returned stack closes."""
+        request._timing = timing = {"queries": 0, "db": 0.0, "view_start": None, "view_end": None, "render": 0.0}
+
+        def record(execute, sql, params, many, context):
+            query_started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                timing["queries"] += 1
+                timing["db"] += time.perf_counter() - query_started
+
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(record))
+        return stack
+
+    def finish(self, request, response, started):
+        timing = request._timing
+        total = time.perf_counter() - started
+        view = 0.0
+        if timing["view_start"] is not None:
+            view = (timing["view_end"] or time.perf_counter()) - timing["view_start"]
+
+        if getattr(settings, "SERVER_TIMING_HEADER", True):
+            response["Server-Timing"] = (
+                f'db;dur={timing["db"] * 1000:.1f};desc="{timing["queries"]} queries", '
+                f"view;dur={view * 1000:.1f}, render;dur={timing['render'] * 1000:.1f}, "
+                f"total;dur={total * 1000:.1f}"
+            )
+
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        label = view_name or "unmatched"
+        REQUEST_LATENCY.observe(total, view=label, method=request.method)
+        REQUESTS.inc(view=label, method=request.method, status=response.status_code)
+        REQUEST_QUERIES.observe(timing["queries"], view=label)
+
+        budgets = getattr(settings, "QUERY_BUDGETS", {})
+        budget = budgets.get(view_name, getattr(settings, "QUERY_BUDGET", 25))
+        over_budget = budget is not None and timing["queries"] > budget
+        performance_logger.log(
+            logging.WARNING if over_budget else logging.INFO,
+            "%s: method=%s path=%s view=%s status=%s queries=%d budget=%s "
+            "db_ms=%.1f view_ms=%.1f render_ms=%.1f total_ms=%.1f",
+            "QUERY_BUDGET_EXCEEDED" if over_budget else "REQUEST_TIMING",
+            request.method, request.path, view_name, response.status_code, timing["queries"], budget,
+            timing["db"] * 1000, view * 1000, timing["render"] * 1000, total * 1000,
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing["view_start"] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that apart.
+        timing = request._timing
+        timing["view_end"] = render_started = time.perf_counter()
+
+        def rendered(response):
+            timing["render"] = time.perf_counter() - render_started
+
+        response.add_post_render_callback(rendered)
+        return response
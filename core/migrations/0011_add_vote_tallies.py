@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def populate_tallies(apps, schema_editor):
+    Vote = apps.get_model('core', 'Vote')
+    CandidateTally = apps.get_model('core', 'CandidateTally')
+    ElectionTally = apps.get_model('core', 'ElectionTally')
+    CandidateTally.objects.bulk_create(
+        CandidateTally(votes=row.pop('total'), **row)
+        for row in Vote.objects.values('election_id', 'position_id', 'candidate_id').annotate(total=Count('id')).order_by()
+    )
+    ElectionTally.objects.bulk_create(
+        ElectionTally(**row)
+        for row in Vote.objects.values('election_id')
+        .annotate(ballots_cast=Count('voter_hash', distinct=True), last_vote_at=Max('created_at'))
+        .order_by()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_alter_candidate_photo_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.candidate')),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.election')),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.position')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('candidate', 'shard'), name='unique_candidate_tally_shard')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ElectionTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('ballots_cast', models.PositiveIntegerField(default=0)),
+                ('last_vote_at', models.DateTimeField(blank=True, null=True)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.election')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('election', 'shard'), name='unique_election_tally_shard')],
+            },
+        ),
+        migrations.RunPython(populate_tallies, migrations.RunPython.noop),
+    ]
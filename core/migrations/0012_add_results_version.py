@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_add_vote_tallies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='electiontally',
+            name='changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='electiontally',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
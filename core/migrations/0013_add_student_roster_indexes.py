@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:10
+
+from django.db import migrations, models
+
+# Prefix search (StudentViewSet `search`) compiles to LIKE 'x%' on
+# student_id and UPPER(full_name); on PostgreSQL those need pattern_ops
+# indexes to be range scans. Other backends skip them.
+PATTERN_INDEXES = [
+    (
+        "student_election_id_like_idx",
+        "core_student (election_id, student_id varchar_pattern_ops)",
+    ),
+    (
+        "student_election_name_like_idx",
+        "core_student (election_id, UPPER(full_name) text_pattern_ops)",
+    ),
+]
+
+
+def create_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, definition in PATTERN_INDEXES:
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+
+def drop_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _ in PATTERN_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_add_results_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['election', 'class_name', 'student_id'], name='student_election_class_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['election', 'full_name'], name='student_election_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['election', 'has_voted', 'student_id'], name='student_election_voted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['election', 'is_active', 'student_id'], name='student_election_active_idx'),
+        ),
+        migrations.RunPython(create_pattern_indexes, drop_pattern_indexes),
+    ]
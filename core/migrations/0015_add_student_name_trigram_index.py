@@ -0,0 +1,38 @@
+from django.db import migrations, transaction
+
+# Fuzzy/contains name search (core.search) compiles to
+# UPPER(full_name) LIKE '%x%'; a pg_trgm GIN index makes that an index scan.
+# pg_trgm may not be installable by the app's role, in which case the index
+# is skipped and the search still works without it.
+INDEX_NAME = "student_name_trgm_idx"
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except Exception:
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON core_student "
+        "USING gin (UPPER(full_name) gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_add_roster_import_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
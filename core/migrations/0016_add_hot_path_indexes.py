@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_add_student_name_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('has_voted', False), ('is_active', True)), fields=['student_id'], name='student_login_ready_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['election', 'voter_hash'], name='vote_election_voter_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['election', 'created_at'], name='vote_election_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['candidate', 'created_at'], name='vote_candidate_created_idx'),
+        ),
+    ]
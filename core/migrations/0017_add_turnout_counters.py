@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    Student = apps.get_model('core', 'Student')
+    TurnoutCounter = apps.get_model('core', 'TurnoutCounter')
+    rows = (
+        Student.objects.values('election_id', 'class_name')
+        .annotate(
+            total=Count('id'),
+            activated=Count('id', filter=Q(is_active=True)),
+            voted=Count('id', filter=Q(has_voted=True)),
+        )
+        .order_by()
+    )
+    TurnoutCounter.objects.bulk_create(TurnoutCounter(**row) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_add_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TurnoutCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('class_name', models.CharField(max_length=50)),
+                ('total', models.IntegerField(default=0)),
+                ('activated', models.IntegerField(default=0)),
+                ('voted', models.IntegerField(default=0)),
+                ('election', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.election')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('election', 'class_name'), name='unique_election_class_turnout')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
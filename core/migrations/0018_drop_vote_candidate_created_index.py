@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 05:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_add_turnout_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='vote',
+            name='vote_candidate_created_idx',
+        ),
+    ]
@@ -37,6 +37,20 @@ class Student(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['election', 'student_id'], name='unique_election_student')
         ]
+        # Roster filters/orderings (StudentViewSet); each page is an index range scan.
+        indexes = [
+            models.Index(fields=['election', 'class_name', 'student_id'], name='student_election_class_idx'),
+            models.Index(fields=['election', 'full_name'], name='student_election_name_idx'),
+            models.Index(fields=['election', 'has_voted', 'student_id'], name='student_election_voted_idx'),
+            models.Index(fields=['election', 'is_active', 'student_id'], name='student_election_active_idx'),
+            # Voter login looks students up by ID across the active elections; only
+            # activated students who haven't voted can log in.
+            models.Index(
+                fields=['student_id'],
+                condition=models.Q(is_active=True, has_voted=False),
+                name='student_login_ready_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.full_name} - {self.student_id} ({self.election.name})"
@@ -76,6 +90,114 @@ class Vote(models.Model):
 
     class Meta:
         unique_together = ('voter_hash', 'position')
+        indexes = [
+            # Distinct voters per election (tally rebuilds, turnout checks).
+            models.Index(fields=['election', 'voter_hash'], name='vote_election_voter_idx'),
+            # Latest vote per election.
+            models.Index(fields=['election', 'created_at'], name='vote_election_created_idx'),
+        ]
 
     def __str__(self):
         return f"Vote for {self.candidate}"
+
+
+class CandidateTally(models.Model):
+    """
+    Running vote count for a candidate, maintained in the same transaction
+    as the Vote rows. Each candidate has several shards so concurrent ballots
+    for the same candidate don't queue on a single row lock; readers sum them.
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE)
+    position = models.ForeignKey(Position, on_delete=models.CASCADE)
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField(default=0)
+    votes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'shard'], name='unique_candidate_tally_shard')
+        ]
+
+    def __str__(self):
+        return f"{self.candidate_id} [{self.shard}]: {self.votes}"
+
+
+class ElectionTally(models.Model):
+    """
+    Running count of ballots cast (unique voters) in an election, sharded
+    like CandidateTally. The summed `version` plus `ballots_cast` grows
+    whenever the election's results may have changed and versions the
+    results snapshots (see tallies.results_version).
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField(default=0)
+    ballots_cast = models.PositiveIntegerField(default=0)
+    last_vote_at = models.DateTimeField(null=True, blank=True)
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['election', 'shard'], name='unique_election_tally_shard')
+        ]
+
+    def __str__(self):
+        return f"{self.election_id} [{self.shard}]: {self.ballots_cast}"
+
+
+class RosterImportJob(models.Model):
+    """
+    A roster upload imported in the background (see core.roster). Counters
+    are updated after every chunk so clients can poll progress.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    )
+
+    election = models.ForeignKey(Election, on_delete=models.CASCADE)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    rows_processed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    skipped_existing = models.PositiveIntegerField(default=0)
+    skipped_duplicate = models.PositiveIntegerField(default=0)
+    skipped_invalid = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    detail = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Roster import {self.pk} ({self.status})"
+
+
+class TurnoutCounter(models.Model):
+    """
+    Running roster counts of one class in an election, kept in step with
+    Student rows by core.turnout so turnout is read without counting them.
+    Plain integers: a drifted counter is fixed by reconcile_turnout rather
+    than rejected.
+    """
+    election = models.ForeignKey(Election, on_delete=models.CASCADE)
+    class_name = models.CharField(max_length=50)
+    total = models.IntegerField(default=0)
+    activated = models.IntegerField(default=0)
+    voted = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['election', 'class_name'], name='unique_election_class_turnout')
+        ]
+
+    def __str__(self):
+        return f"{self.election_id} {self.class_name}: {self.voted}/{self.total}"
@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class StudentCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the student roster. The ordering comes from the
+    view (see StudentViewSet.get_ordering) and always ends with the primary
+    key so every page boundary is unique.
+    """
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        return view.get_ordering()
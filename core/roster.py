@@ -0,0 +1,441 @@
+"""
+Streaming student roster import.
+
+Rows are read lazily from the uploaded file (openpyxl read-only mode for
+workbooks, the csv module for CSV/TSV exports) and written in fixed-size chunks: one existence
+query and one batched insert per chunk, so memory stays bounded by the chunk
+size rather than the roster size.
+
+Sync mode (`diff_roster` / `apply_roster_diff`) makes the election's roster
+match the upload: rows are compared by hash and applied with set-based
+upserts and chunked deletes; students who voted or stand as candidates are
+never removed.
+
+Large uploads become RosterImportJobs: the file is saved to
+settings.ROSTER_IMPORT_DIR and imported by a background thread (or the
+run_roster_imports command) so the request returns immediately.
+"""
+import csv
+import hashlib
+import io
+import logging
+import os
+import queue
+import threading
+import uuid
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from .models import Candidate, RosterImportJob, Student
+from .search import roster_changed
+from .turnout import reconcile_turnout, students_added
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ("student_id", "full_name", "class_name")
+
+
+class RosterError(Exception):
+    """The upload can't be read as a roster; the message is safe to return."""
+
+
+def _cell(value):
+    # Force everything to string (handles int/float/None nicely)
+    return str(value).strip() if value is not None else ""
+
+
+def header_indices(header_row):
+    """
+    Map the required columns to their index in `header_row`. Headers are
+    matched case-insensitively; raises RosterError naming missing columns.
+    """
+    header_map = {_cell(h).lower(): idx for idx, h in enumerate(header_row or ())}
+    missing = [h for h in REQUIRED_COLUMNS if h not in header_map]
+    if missing:
+        raise RosterError(f"Missing columns: {', '.join(missing)}")
+    return tuple(header_map[h] for h in REQUIRED_COLUMNS)
+
+
+def iter_roster_rows(rows):
+    """
+    Turn raw rows (header first) into (row_number, (student_id, full_name,
+    class_name)) pairs. Row numbers are 1-based like the spreadsheet's;
+    blank rows are dropped.
+    """
+    rows = iter(rows)
+    indices = header_indices(next(rows, None))
+    width = max(indices) + 1
+    for row_number, row in enumerate(rows, start=2):
+        row = tuple(row or ())
+        if len(row) < width:
+            row += (None,) * (width - len(row))
+        values = tuple(_cell(row[idx]) for idx in indices)
+        if any(values):
+            yield row_number, values
+
+
+def read_xlsx(fileobj):
+    """Stream the roster rows of an Excel workbook's active sheet."""
+    try:
+        workbook = load_workbook(filename=fileobj, read_only=True, data_only=True)
+        sheet = workbook.active
+    except Exception:
+        raise RosterError("Could not read Excel file.")
+    return iter_roster_rows(sheet.iter_rows(values_only=True))
+
+
+DELIMITERS = {".csv": ",", ".tsv": "\t", ".tab": "\t"}
+
+
+def read_delimited(fileobj, delimiter=","):
+    """Stream the roster rows of a UTF-8 CSV/TSV file."""
+    raw = getattr(fileobj, "file", fileobj)
+    raw.seek(0)
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    try:
+        yield from iter_roster_rows(csv.reader(text, delimiter=delimiter))
+    except UnicodeDecodeError:
+        raise RosterError("Could not read file as UTF-8 text.")
+    finally:
+        text.detach()  # leave the upload open for its owner
+
+
+def read_roster(fileobj, file_name=""):
+    """
+    Stream the rows of a roster upload, picking the parser from the file
+    extension: CSV/TSV are read as delimited text, anything else as Excel.
+    """
+    delimiter = DELIMITERS.get(os.path.splitext(file_name or "")[1].lower())
+    if delimiter is None:
+        return read_xlsx(fileobj)
+    return read_delimited(fileobj, delimiter)
+
+
+class _RowErrors:
+    def add_error(self, row_number, student_id, error):
+        if len(self.errors) < getattr(settings, "ROSTER_IMPORT_MAX_ERRORS", 200):
+            self.errors.append({"row": row_number, "student_id": student_id, "error": error})
+
+
+@dataclass
+class ImportResult(_RowErrors):
+    rows_processed: int = 0
+    created: int = 0
+    skipped_existing: int = 0
+    skipped_duplicate: int = 0
+    skipped_invalid: int = 0
+    errors: list = field(default_factory=list)  # [{"row", "student_id", "error"}], capped
+    chunks: list = field(default_factory=list)
+
+    @property
+    def valid_rows(self):
+        return self.created + self.skipped_existing + self.skipped_duplicate
+
+
+def _missing_columns(values):
+    return [column for column, value in zip(REQUIRED_COLUMNS, values) if not value]
+
+
+def _import_chunk(election, chunk, result):
+    students = {}
+    invalid = duplicate = 0
+    for row_number, (student_id, full_name, class_name) in chunk:
+        missing = _missing_columns((student_id, full_name, class_name))
+        if missing:
+            invalid += 1
+            result.add_error(row_number, student_id, f"Missing {', '.join(missing)}")
+            continue
+        if student_id in students:
+            duplicate += 1
+            result.add_error(row_number, student_id, "Duplicate student_id in file")
+            continue
+        students[student_id] = Student(
+            student_id=student_id,
+            full_name=full_name,
+            class_name=class_name,
+            election=election,
+        )
+
+    with transaction.atomic():
+        existing = set(
+            Student.objects.filter(election=election, student_id__in=list(students)).values_list(
+                "student_id", flat=True
+            )
+        )
+        to_create = [s for sid, s in students.items() if sid not in existing]
+        Student.objects.bulk_create(to_create, ignore_conflicts=True)
+        students_added(election.id, to_create)
+
+    result.rows_processed += len(chunk)
+    result.created += len(to_create)
+    result.skipped_existing += len(existing)
+    result.skipped_duplicate += duplicate
+    result.skipped_invalid += invalid
+    result.chunks.append({
+        "chunk": len(result.chunks) + 1,
+        "rows": len(chunk),
+        "created": len(to_create),
+        "skipped_existing": len(existing),
+        "skipped_duplicate": duplicate,
+        "skipped_invalid": invalid,
+    })
+
+
+def import_roster(election, rows, chunk_size=None, on_chunk=None):
+    """
+    Create the students in `rows` (from iter_roster_rows) that aren't in the
+    election yet, `chunk_size` rows at a time. Each chunk is committed on its
+    own and `on_chunk(result)` is called after it. A student id repeated in a
+    later chunk counts as existing.
+    """
+    chunk_size = chunk_size or getattr(settings, "ROSTER_IMPORT_CHUNK_SIZE", 1000)
+    result = ImportResult()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return result
+        _import_chunk(election, chunk, result)
+        if on_chunk is not None:
+            on_chunk(result)
+
+
+def _row_hash(full_name, class_name):
+    return hashlib.blake2b(f"{full_name}\x1f{class_name}".encode(), digest_size=8).digest()
+
+
+@dataclass
+class RosterDiff(_RowErrors):
+    adds: dict = field(default_factory=dict)  # student_id -> (full_name, class_name)
+    updates: dict = field(default_factory=dict)  # student_id -> ((full_name, class_name), (old...))
+    removals: dict = field(default_factory=dict)  # pk -> student_id
+    protected: list = field(default_factory=list)  # student_ids kept although absent from the upload
+    unchanged: int = 0
+    skipped_duplicate: int = 0
+    skipped_invalid: int = 0
+    errors: list = field(default_factory=list)
+
+    def summary(self, sample_size=20):
+        return {
+            "adds": len(self.adds),
+            "updates": len(self.updates),
+            "removals": len(self.removals),
+            "protected": len(self.protected),
+            "unchanged": self.unchanged,
+            "skipped_duplicate": self.skipped_duplicate,
+            "skipped_invalid": self.skipped_invalid,
+            "errors": self.errors,
+            "sample": {
+                "adds": list(islice(self.adds, sample_size)),
+                "updates": [
+                    {
+                        "student_id": student_id,
+                        "full_name": [old[0], new[0]],
+                        "class_name": [old[1], new[1]],
+                    }
+                    for student_id, (new, old) in islice(self.updates.items(), sample_size)
+                ],
+                "removals": list(islice(self.removals.values(), sample_size)),
+                "protected": self.protected[:sample_size],
+            },
+        }
+
+
+def diff_roster(election, rows):
+    """
+    Compare uploaded `rows` (from iter_roster_rows) with the election's
+    students. Students absent from the upload are removed unless they have
+    voted or are candidates.
+    """
+    diff = RosterDiff()
+    uploaded = {}
+    for row_number, values in rows:
+        missing = _missing_columns(values)
+        if missing:
+            diff.skipped_invalid += 1
+            diff.add_error(row_number, values[0], f"Missing {', '.join(missing)}")
+        elif values[0] in uploaded:
+            diff.skipped_duplicate += 1
+            diff.add_error(row_number, values[0], "Duplicate student_id in file")
+        else:
+            uploaded[values[0]] = values[1:]
+
+    candidates = set(
+        Candidate.objects.filter(student__election=election).values_list("student_id", flat=True)
+    )
+    existing = Student.objects.filter(election=election).values_list(
+        "pk", "student_id", "full_name", "class_name", "has_voted"
+    )
+    for pk, student_id, full_name, class_name, has_voted in existing.iterator(chunk_size=2000):
+        new = uploaded.pop(student_id, None)
+        if new is None:
+            if has_voted or pk in candidates:
+                diff.protected.append(student_id)
+            else:
+                diff.removals[pk] = student_id
+        elif _row_hash(*new) != _row_hash(full_name, class_name):
+            diff.updates[student_id] = (new, (full_name, class_name))
+        else:
+            diff.unchanged += 1
+    diff.adds = uploaded
+    return diff
+
+
+@transaction.atomic
+def apply_roster_diff(election, diff, chunk_size=None):
+    """Apply a RosterDiff in one transaction, `chunk_size` rows per statement."""
+    chunk_size = chunk_size or getattr(settings, "ROSTER_IMPORT_CHUNK_SIZE", 1000)
+    upserts = [
+        Student(election=election, student_id=student_id, full_name=full_name, class_name=class_name)
+        for student_id, (full_name, class_name) in diff.adds.items()
+    ] + [
+        Student(election=election, student_id=student_id, full_name=full_name, class_name=class_name)
+        for student_id, ((full_name, class_name), _) in diff.updates.items()
+    ]
+    Student.objects.bulk_create(
+        upserts,
+        batch_size=chunk_size,
+        update_conflicts=True,
+        unique_fields=["election", "student_id"],
+        update_fields=["full_name", "class_name"],
+    )
+
+    removed = 0
+    pks = list(diff.removals)
+    for start in range(0, len(pks), chunk_size):
+        # Re-check at delete time: a student may have voted since the diff.
+        removed += (
+            Student.objects.filter(pk__in=pks[start:start + chunk_size], has_voted=False)
+            .exclude(candidate__isnull=False)
+            .delete()[0]
+        )
+    reconcile_turnout(election.id)
+    return removed
+
+
+def import_dir():
+    return str(getattr(settings, "ROSTER_IMPORT_DIR", os.path.join(settings.BASE_DIR, "roster_imports")))
+
+
+def create_import_job(election, upload, user=None):
+    """
+    Save `upload` and queue it for import; the job starts once the current
+    transaction commits.
+    """
+    directory = import_dir()
+    os.makedirs(directory, exist_ok=True)
+    extension = os.path.splitext(upload.name or "")[1].lower()
+    path = os.path.join(directory, f"{uuid.uuid4().hex}{extension}")
+    with open(path, "wb") as fh:
+        for data in upload.chunks():
+            fh.write(data)
+
+    job = RosterImportJob.objects.create(
+        election=election,
+        created_by=user,
+        file_name=upload.name or "",
+        file_path=path,
+    )
+    if getattr(settings, "ROSTER_IMPORT_BACKGROUND_WORKER", True):
+        transaction.on_commit(lambda: _enqueue(job.pk))
+    return job
+
+
+def _save_progress(job_id, result, **extra):
+    RosterImportJob.objects.filter(pk=job_id).update(
+        rows_processed=result.rows_processed,
+        created=result.created,
+        skipped_existing=result.skipped_existing,
+        skipped_duplicate=result.skipped_duplicate,
+        skipped_invalid=result.skipped_invalid,
+        errors=result.errors,
+        **extra,
+    )
+
+
+def run_import_job(job_id):
+    """Import a pending job; returns False if another worker claimed it."""
+    claimed = RosterImportJob.objects.filter(pk=job_id, status=RosterImportJob.PENDING).update(
+        status=RosterImportJob.RUNNING, started_at=timezone.now()
+    )
+    if not claimed:
+        return False
+
+    job = RosterImportJob.objects.select_related("election").get(pk=job_id)
+    progress = ImportResult()
+
+    def on_chunk(result):
+        nonlocal progress
+        progress = result
+        _save_progress(job_id, result)
+
+    status, detail = RosterImportJob.SUCCEEDED, "Students imported successfully."
+    try:
+        with open(job.file_path, "rb") as fh:
+            progress = import_roster(job.election, read_roster(fh, job.file_name), on_chunk=on_chunk)
+        if not progress.valid_rows:
+            status, detail = RosterImportJob.FAILED, "No valid rows found to import."
+    except RosterError as e:
+        status, detail = RosterImportJob.FAILED, str(e)
+    except Exception as e:
+        # Chunks committed before the failure are kept.
+        logger.exception("Roster import job %s failed", job_id)
+        status, detail = RosterImportJob.FAILED, f"Bulk import failed: {e}"
+    finally:
+        if progress.created:
+            roster_changed(job.election_id)
+        try:
+            os.remove(job.file_path)
+        except FileNotFoundError:
+            pass
+
+    _save_progress(job_id, progress, status=status, detail=detail, finished_at=timezone.now())
+    return True
+
+
+def run_pending_import_jobs():
+    """Run every pending job, oldest first; returns how many were run."""
+    ran = 0
+    pending = RosterImportJob.objects.filter(status=RosterImportJob.PENDING).order_by("created_at", "pk")
+    for job_id in pending.values_list("pk", flat=True):
+        ran += run_import_job(job_id)
+    return ran
+
+
+# In memory only: jobs queued or running when the process stops are finished
+# by `run_roster_imports --retry-running`, which start.sh runs on startup.
+_jobs = queue.Queue()
+_worker_lock = threading.Lock()
+_worker = None
+
+
+def _enqueue(job_id):
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = RosterImportWorker()
+            _worker.start()
+    _jobs.put(job_id)
+
+
+class RosterImportWorker(threading.Thread):
+    """Background thread running this process's queued roster imports one at a time."""
+
+    def __init__(self):
+        super().__init__(name="roster-import-worker", daemon=True)
+
+    def run(self):
+        while True:
+            job_id = _jobs.get()
+            close_old_connections()
+            try:
+                run_import_job(job_id)
+            except Exception:
+                logger.exception("Roster import worker failed on job %s", job_id)
+            finally:
+                connection.close()
@@ -0,0 +1,278 @@
+"""
+Student autocomplete for the activation desk.
+
+Matches are ranked: exact student_id, student_id prefix, name prefix, name
+word prefixes, then fuzzy trigram matches on the name. On PostgreSQL the
+lookup runs in the database on the student_id/UPPER(full_name) pattern
+indexes and, for misspellings, the pg_trgm word-similarity operator on its
+index (migration 0015). Elsewhere an in-process
+index per election is used, rebuilt when the roster changes (see
+`roster_changed`) or after STUDENT_SEARCH_INDEX_TTL seconds.
+"""
+import functools
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Upper
+
+from .models import Student
+from .tallies import bump_results_version
+
+_GENERATION_KEY = "student_search_gen:%s"
+_FIELDS = ("id", "student_id", "full_name", "class_name", "is_active", "has_voted")
+
+_lock = threading.Lock()
+_indexes = {}  # election_id -> (StudentSearchIndex, generation, loaded_at)
+
+
+def _normalize(text):
+    return " ".join(text.upper().split())
+
+
+def _trigrams(text):
+    """Word trigrams, padded like pg_trgm's."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class StudentSearchIndex:
+    """Sorted prefix lists and a trigram index over one election's roster."""
+
+    def __init__(self, rows):
+        self.pks = array("q")
+        self.names = []
+        ids, tokens, trigrams = [], [], {}
+        for position, (pk, student_id, full_name) in enumerate(rows):
+            name = _normalize(full_name)
+            self.pks.append(pk)
+            self.names.append(name)
+            ids.append((student_id.upper(), position))
+            for token in set(name.split()):
+                tokens.append((token, position))
+            for gram in _trigrams(name):
+                postings = trigrams.get(gram)
+                if postings is None:
+                    postings = trigrams[gram] = array("I")
+                postings.append(position)
+        ids.sort()
+        tokens.sort()
+        self.ids = ids
+        self.tokens = tokens
+        self.trigrams = trigrams
+
+    @staticmethod
+    def _prefixed(entries, prefix):
+        start = bisect_left(entries, (prefix,))
+        for key, position in entries[start:]:
+            if not key.startswith(prefix):
+                return
+            yield key, position
+
+    def _name_rank(self, position, words):
+        """2 if the name starts with the query, 3 if every query word prefixes a name word."""
+        name = self.names[position]
+        if name.startswith(" ".join(words)):
+            return 2
+        name_words = name.split()
+        if all(any(w.startswith(word) for w in name_words) for word in words):
+            return 3
+        return None
+
+    def search(self, query, limit):
+        """Return the pks of the best `limit` matches, best first."""
+        return self.ranked(query, limit)[:limit]
+
+    def ranked(self, query, limit):
+        """Return the pks of every match found while looking for `limit`, best first."""
+        query = _normalize(query)
+        words = query.split()
+        ranked = {}
+
+        def add(position, rank):
+            if position not in ranked or rank < ranked[position]:
+                ranked[position] = rank
+
+        for key, position in self._prefixed(self.ids, query):
+            add(position, 0 if key == query else 1)
+            if len(ranked) >= limit * 4:
+                break
+
+        # Scan the word with the fewest prefix matches, check the others per name.
+        scans = [list(islice(self._prefixed(self.tokens, word), limit * 50 + 1)) for word in words]
+        for _, position in min(scans, key=len, default=()):
+            rank = self._name_rank(position, words)
+            if rank is not None:
+                add(position, rank)
+
+        if len(ranked) < limit and len(query) >= 3:
+            grams = _trigrams(query)
+            postings = sorted(
+                (self.trigrams[g] for g in grams if g in self.trigrams), key=len
+            )
+            # A name must share at least half of the query's trigrams; it then
+            # appears in at least one of the rarest lists, so only those are
+            # scanned, up to a bounded number of candidates.
+            needed = max(1, (len(grams) + 1) // 2)
+            candidates = set()
+            for posting in postings[:max(0, len(postings) - needed + 1)]:
+                candidates.update(islice(posting, limit * 50 - len(candidates)))
+                if len(candidates) >= limit * 50:
+                    break
+            for position in candidates:
+                shared = len(grams & _trigrams(self.names[position]))
+                if shared >= needed:
+                    add(position, 4 + len(grams) - shared)
+
+        best = sorted(ranked.items(), key=lambda item: (item[1], item[0]))
+        return [self.pks[position] for position, _ in best]
+
+
+def _generation(election_id):
+    return cache.get(_GENERATION_KEY % election_id, 0)
+
+
+def get_search_index(election_id):
+    ttl = getattr(settings, "STUDENT_SEARCH_INDEX_TTL", 300)
+    generation = _generation(election_id)
+    entry = _indexes.get(election_id)
+    if entry is not None:
+        index, cached_generation, loaded_at = entry
+        if cached_generation == generation and time.monotonic() - loaded_at < ttl:
+            return index
+
+    rows = (
+        Student.objects.filter(election_id=election_id)
+        .order_by("pk")
+        .values_list("pk", "student_id", "full_name")
+        .iterator(chunk_size=5000)
+    )
+    index = StudentSearchIndex(rows)
+    with _lock:
+        _indexes[election_id] = (index, generation, time.monotonic())
+    return index
+
+
+def _use_database():
+    backend = getattr(settings, "STUDENT_SEARCH_BACKEND", "auto")
+    if backend == "auto":
+        return connection.vendor == "postgresql"
+    return backend == "database"
+
+
+@functools.cache
+def _has_trigram():
+    """Whether pg_trgm is installed (migration 0015 skips it if it can't be)."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def _search_database(election_id, query, limit, eligible=False):
+    query = " ".join(query.split())
+    upper = query.upper()
+    id_prefix = Q(student_id__startswith=query) | Q(student_id__startswith=upper)
+    # Every query word prefixes a word of the name.
+    word_prefixes = Q(*(Q(name__startswith=word) | Q(name__contains=f" {word}") for word in upper.split()))
+    students = Student.objects.filter(election_id=election_id, **_eligibility(eligible)).annotate(name=Upper("full_name"))
+    matches = id_prefix | word_prefixes
+    order = ["rank"]
+    fuzzy = len(query) >= 3 and _has_trigram()
+    if fuzzy:
+        # Misspelled names: UPPER(full_name) %> query, served by the trigram index.
+        matches |= Q(TrigramWordSimilar(F("name"), upper))
+        students = students.annotate(similarity=TrigramWordSimilarity(upper, "name"))
+        order.append("-similarity")
+    students = (
+        students.filter(matches)
+        .annotate(
+            rank=Case(
+                When(student_id__in={query, upper}, then=Value(0)),
+                When(id_prefix, then=Value(1)),
+                When(name__startswith=upper, then=Value(2)),
+                When(word_prefixes, then=Value(3)),
+                default=Value(4),
+                output_field=IntegerField(),
+            )
+        )
+        .order_by(*order, "full_name", "pk")
+        .values(*_FIELDS)[:limit]
+    )
+    if not fuzzy:
+        return list(students)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Like the in-process index: share at least half of the query's trigrams.
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                [str(getattr(settings, "STUDENT_SEARCH_TRIGRAM_THRESHOLD", 0.5))],
+            )
+        return list(students)
+
+
+def _eligibility(eligible):
+    # Students the activation desk can still activate.
+    return {"is_active": False, "has_voted": False} if eligible else {}
+
+
+def search_students(election_id, query, limit=10, eligible=False):
+    """
+    Return the top `limit` students of an election matching `query`; only
+    not yet activated, not yet voted ones if `eligible`. An empty query
+    matches nothing, or every eligible student by ID.
+    """
+    query = query.strip()
+    if not query:
+        if not eligible:
+            return []
+        return list(
+            Student.objects.filter(election_id=election_id, **_eligibility(True))
+            .order_by("student_id")
+            .values(*_FIELDS)[:limit]
+        )
+    if _use_database():
+        return _search_database(election_id, query, limit, eligible)
+
+    # Activation state isn't indexed: filter the matches found, then cut.
+    pks = get_search_index(election_id).ranked(query, limit)
+    rows = {
+        row["id"]: row for row in Student.objects.filter(pk__in=pks, **_eligibility(eligible)).values(*_FIELDS)
+    }
+    return [rows[pk] for pk in pks if pk in rows][:limit]
+
+
+def roster_changed(election_id):
+    """
+    Record a change to an election's roster: bump its results version and
+    drop its search index in every worker once the transaction commits.
+    """
+    bump_results_version(election_id)
+
+    def _invalidate():
+        with _lock:
+            _indexes.pop(election_id, None)
+        key = _GENERATION_KEY % election_id
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass  # cache backend doesn't keep values (DummyCache); the TTL still applies
+
+    transaction.on_commit(_invalidate)
+
+
+def clear_search_indexes():
+    """Forget every search index built by this process."""
+    with _lock:
+        _indexes.clear()
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Election, Position, Candidate, Vote, Student, User
+from .models import Election, Position, Candidate, Vote, Student, User, RosterImportJob
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -52,6 +52,34 @@ class StudentSerializer(serializers.ModelSerializer):
 class BulkStudentUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
     election_id = serializers.IntegerField()
+    background = serializers.BooleanField(required=False, default=False)
+    mode = serializers.ChoiceField(choices=["insert", "sync"], required=False, default="insert")
+    preview = serializers.BooleanField(required=False, default=False)
+
+
+class BulkActivationSerializer(serializers.Serializer):
+    election_id = serializers.IntegerField()
+    class_name = serializers.CharField(required=False)
+    student_ids = serializers.ListField(
+        child=serializers.CharField(), required=False, allow_empty=False, max_length=1000
+    )
+    is_active = serializers.BooleanField(required=False, default=True)
+
+    def validate(self, data):
+        if ("class_name" in data) == ("student_ids" in data):
+            raise serializers.ValidationError("Provide either class_name or student_ids.")
+        return data
+
+
+class RosterImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RosterImportJob
+        fields = [
+            "id", "election", "file_name", "status", "rows_processed", "created",
+            "skipped_existing", "skipped_duplicate", "skipped_invalid", "errors",
+            "detail", "created_at", "started_at", "finished_at",
+        ]
+        read_only_fields = fields
 
 
 class ElectionSerializer(serializers.ModelSerializer):
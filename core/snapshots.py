@@ -0,0 +1,100 @@
+"""
+Versioned snapshots of election results and stats.
+
+Each snapshot is keyed by the election's results version (see
+tallies.results_version), so it is computed once per version per worker.
+Responses carry an ETag/Last-Modified derived from that version and
+unchanged polls are answered with 304 Not Modified.
+"""
+import threading
+
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .tallies import aresults_version, results_version
+
+_lock = threading.Lock()
+_snapshots = {}  # (kind, election_id) -> (version, payload)
+
+
+def get_snapshot(kind, election_id, version, build):
+    """Return the payload for `version`, building it with `build()` if needed."""
+    key = (kind, election_id)
+    entry = _snapshots.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    payload = build()
+    _store(key, version, payload)
+    return payload
+
+
+async def aget_snapshot(kind, election_id, version, build):
+    """Async get_snapshot(); `build` is a coroutine function returning None if there is nothing to serve."""
+    key = (kind, election_id)
+    entry = _snapshots.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    payload = await build()
+    if payload is not None:
+        _store(key, version, payload)
+    return payload
+
+
+def _store(key, version, payload):
+    with _lock:
+        current = _snapshots.get(key)
+        if current is None or current[0] <= version:
+            _snapshots[key] = (version, payload)
+
+
+def _validators(request, kind, election_id, version, changed_at):
+    """Return (headers, 304 response or None) for a snapshot at `version`."""
+    etag = quote_etag(f"{kind}-{election_id}-{version}")
+    last_modified = int(changed_at.timestamp()) if changed_at else None
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+    return headers, not_modified
+
+
+def snapshot_response(request, kind, election_id, build):
+    """
+    Serve the `kind` snapshot of an election, or 304 if the client already
+    has the current version. `build` may raise DRF exceptions (e.g. NotFound).
+    """
+    version, changed_at = results_version(election_id)
+    headers, not_modified = _validators(request, kind, election_id, version, changed_at)
+    if not_modified is not None:
+        return not_modified
+    return Response(get_snapshot(kind, election_id, version, build), headers=headers)
+
+
+async def asnapshot_response(request, kind, election_id, build):
+    """
+    Async snapshot_response() for plain async views. `build` is a coroutine
+    function; when it returns None the response is 404.
+    """
+    version, changed_at = await aresults_version(election_id)
+    headers, not_modified = _validators(request, kind, election_id, version, changed_at)
+    if not_modified is not None:
+        return not_modified
+    payload = await aget_snapshot(kind, election_id, version, build)
+    if payload is None:
+        return JsonResponse({"detail": "Election not found."}, status=404)
+    return JsonResponse(payload, headers=headers)
+
+
+def clear_snapshots():
+    """Forget every snapshot cached by this process."""
+    with _lock:
+        _snapshots.clear()
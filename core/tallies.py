@@ -0,0 +1,214 @@
+"""
+Incrementally maintained vote tallies.
+
+Vote rows remain the source of truth; CandidateTally and ElectionTally are
+updated in the same transaction that inserts them so results can be read
+from O(positions + candidates) rows instead of counting the Vote table.
+A ballot adds to them with one upsert statement per table.
+
+The results version is the sum of the ElectionTally `version` and
+`ballots_cast` columns: votes move it by adding ballots, so the vote path
+never bumps `version`; other changes (ballot or roster edits) do.
+"""
+import zlib
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
+
+from .models import CandidateTally, ElectionTally, Vote
+
+
+def _shard_for(voter_hash: str) -> int:
+    shards = max(1, getattr(settings, "VOTE_TALLY_SHARDS", 1))
+    return zlib.crc32(voter_hash.encode()) % shards
+
+
+def _increment(model, lookup, defaults, amounts, extra=None):
+    """
+    Add `amounts` ({field: amount}) to the row matching `lookup`, creating it
+    on first use. `extra` holds plain field values to set alongside.
+    """
+    extra = extra or {}
+    updates = {field: F(field) + amount for field, amount in amounts.items()}
+    updates.update(extra)
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults, **amounts, **extra)
+    except IntegrityError:
+        # Another transaction created the row first.
+        model.objects.filter(**lookup).update(**updates)
+
+
+def _upsert(model, unique_fields, rows, add, replace=()):
+    """
+    Insert `rows` ({field: value}) into `model` in one statement; on a
+    conflict with an existing row over `unique_fields`, add the `add` fields
+    to it and overwrite the `replace` fields.
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    fields = [model._meta.get_field(name) for name in rows[0]]
+    columns = {field.name: qn(field.column) for field in fields}
+    updates = [f"{columns[name]} = {table}.{columns[name]} + EXCLUDED.{columns[name]}" for name in add]
+    updates += [f"{columns[name]} = EXCLUDED.{columns[name]}" for name in replace]
+    row_placeholder = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns.values())}) "
+        f"VALUES {', '.join([row_placeholder] * len(rows))} "
+        f"ON CONFLICT ({', '.join(qn(model._meta.get_field(name).column) for name in unique_fields)}) "
+        f"DO UPDATE SET {', '.join(updates)}"
+    )
+    params = [field.get_db_prep_save(row[field.name], connection) for row in rows for field in fields]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def record_votes(votes):
+    """
+    Add freshly inserted `votes` to the tallies.
+
+    Must be called inside the transaction that inserted them. Every Vote of a
+    ballot must be passed in the same call, since each distinct
+    (election, voter_hash) pair counts as one ballot cast.
+    """
+    if not votes:
+        return
+
+    now = timezone.now()
+    per_candidate = Counter(
+        (v.candidate_id, _shard_for(v.voter_hash), v.election_id, v.position_id)
+        for v in votes
+    )
+    per_election = Counter(
+        (election_id, _shard_for(voter_hash))
+        for election_id, voter_hash in {(v.election_id, v.voter_hash) for v in votes}
+    )
+
+    # Always touch rows in the same order so concurrent ballots can't deadlock.
+    candidate_rows = [
+        {"candidate": candidate_id, "shard": shard, "election": election_id, "position": position_id, "votes": amount}
+        for (candidate_id, shard, election_id, position_id), amount in sorted(per_candidate.items())
+    ]
+    election_rows = [
+        {"election": election_id, "shard": shard, "ballots_cast": amount, "last_vote_at": now, "version": 0}
+        for (election_id, shard), amount in sorted(per_election.items())
+    ]
+    if connection.vendor in ("postgresql", "sqlite"):
+        _upsert(CandidateTally, ["candidate", "shard"], candidate_rows, add=["votes"])
+        _upsert(ElectionTally, ["election", "shard"], election_rows, add=["ballots_cast"], replace=["last_vote_at"])
+        return
+
+    # No INSERT ... ON CONFLICT: one update (or create) per row.
+    for row in candidate_rows:
+        _increment(
+            CandidateTally,
+            {"candidate_id": row["candidate"], "shard": row["shard"]},
+            {"election_id": row["election"], "position_id": row["position"]},
+            {"votes": row["votes"]},
+        )
+    for row in election_rows:
+        _increment(
+            ElectionTally,
+            {"election_id": row["election"], "shard": row["shard"]},
+            {},
+            {"ballots_cast": row["ballots_cast"]},
+            extra={"last_vote_at": now},
+        )
+
+
+def bump_results_version(election_id):
+    """
+    Mark an election's results as changed without a vote, e.g. after a
+    roster or ballot edit, so snapshots of them are rebuilt.
+    """
+    _increment(
+        ElectionTally,
+        {"election_id": election_id, "shard": 0},
+        {},
+        {"version": 1},
+        extra={"changed_at": timezone.now()},
+    )
+
+
+def results_version(election_id):
+    """Return (version, changed_at) of an election's results."""
+    return _version(ElectionTally.objects.filter(election_id=election_id).aggregate(**_VERSION_AGGREGATES))
+
+
+async def aresults_version(election_id):
+    """Async results_version()."""
+    return _version(await ElectionTally.objects.filter(election_id=election_id).aaggregate(**_VERSION_AGGREGATES))
+
+
+_VERSION_AGGREGATES = {
+    "version": Sum("version"),
+    "ballots": Sum("ballots_cast"),
+    "changed_at": Max("changed_at"),
+    "last_vote_at": Max("last_vote_at"),
+}
+
+
+def _version(summary):
+    version = (summary["version"] or 0) + (summary["ballots"] or 0)
+    changed_at = max((t for t in (summary["changed_at"], summary["last_vote_at"]) if t), default=None)
+    return version, changed_at
+
+
+def candidate_vote_counts(**filters):
+    """Return {candidate_id: votes} for the tallies matching `filters`."""
+    rows = (
+        CandidateTally.objects.filter(**filters)
+        .values("candidate_id")
+        .annotate(total=Sum("votes"))
+    )
+    return {row["candidate_id"]: row["total"] for row in rows}
+
+
+def election_summary(election_id):
+    """Return (ballots_cast, last_vote_at) for an election."""
+    summary = ElectionTally.objects.filter(election_id=election_id).aggregate(
+        ballots=Sum("ballots_cast"), last_vote_at=Max("last_vote_at")
+    )
+    return summary["ballots"] or 0, summary["last_vote_at"]
+
+
+@transaction.atomic
+def rebuild_tallies(election_id):
+    """
+    Recompute the tallies of one election from its Vote rows, keeping the
+    results version monotonic. Returns (ballots_cast, candidate_rows).
+    """
+    version, _ = results_version(election_id)
+    CandidateTally.objects.filter(election_id=election_id).delete()
+    ElectionTally.objects.filter(election_id=election_id).delete()
+
+    votes = Vote.objects.filter(election_id=election_id)
+    tallies = [
+        CandidateTally(
+            election_id=election_id,
+            position_id=row["position_id"],
+            candidate_id=row["candidate_id"],
+            votes=row["total"],
+        )
+        for row in votes.values("position_id", "candidate_id").annotate(total=Count("id"))
+    ]
+    CandidateTally.objects.bulk_create(tallies)
+
+    summary = votes.aggregate(
+        ballots=Count("voter_hash", distinct=True), last_vote_at=Max("created_at")
+    )
+    ballots = summary["ballots"] or 0
+    ElectionTally.objects.create(
+        election_id=election_id,
+        ballots_cast=ballots,
+        last_vote_at=summary["last_vote_at"],
+        # Ballots count towards the version; keep the total above the old one.
+        version=max(0, version + 1 - ballots),
+        changed_at=timezone.now(),
+    )
+    return ballots, len(tallies)
@@ -1,18 +1,58 @@
 from datetime import timedelta
 
+from django.conf import settings
+from django.contrib import admin
+from django.core.management import call_command
 from django.utils import timezone
 from django.urls import reverse
-from django.test import TestCase
+from django.utils.module_loading import import_string
+from django.db import DatabaseError, OperationalError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
 from rest_framework.test import APIClient
 
-from .models import Election, Position, Candidate, Student, Vote, User
+from .bench.seeding import seed_election
+from .ballot import clear_ballot_structures, get_ballot_structure, get_election_window, invalidate_ballot_structure
+from .intake import drain_journal, get_journal, journal_status, read_dead_letters
+from .live import get_feed
+from .logging_handlers import BatchingFileHandler, JsonFormatter, _Writer, flush_logs
+from .metrics import LOG_RECORDS_DROPPED, registry as metrics_registry
+from .search import clear_search_indexes
+from .snapshots import clear_snapshots
+from .tallies import results_version
+from .turnout import adjust_turnout, reconcile_turnout
+from .models import Election, Position, Candidate, Student, Vote, User, CandidateTally, RosterImportJob, TurnoutCounter
 from .utils import make_voter_hmac
 from openpyxl import Workbook
-from io import BytesIO
+from io import BytesIO, StringIO
+import contextlib
+import gzip
+import json
+import logging
+import os
+import queue
+import tempfile
+from unittest import mock, skipUnless
 
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+# Worker metrics files (core.metrics) go to a scratch directory, not the
+# checkout. Left enabled after the run: the flusher thread may write late.
+_metrics_dir = tempfile.TemporaryDirectory()
+
+
+def setUpModule():
+    override_settings(METRICS_DIR=_metrics_dir.name).enable()
+
+
+class VotingTestCase(TestCase):
+    """An open election with two positions, a candidate for each and an activated voter."""
 
-class MultiVoteViewTests(TestCase):
     def setUp(self):
+        clear_ballot_structures()
+        clear_snapshots()
         self.client = APIClient()
 
         now = timezone.now()
@@ -44,12 +84,26 @@ class MultiVoteViewTests(TestCase):
             student=self.student_b, position=self.position2
         )
 
-        token = make_voter_hmac(self.student.student_id)
+        token = make_voter_hmac(f"{self.student.student_id}_{self.election.id}")
         self.headers = {
             "HTTP_X_STUDENT_ID": self.student.student_id,
+            "HTTP_X_ELECTION_ID": str(self.election.id),
             "HTTP_X_VOTER_TOKEN": token,
         }
 
+    def _vote_payload(self):
+        return {
+            "votes": [
+                {
+                    "election": self.election.id,
+                    "position": self.position1.id,
+                    "candidate": self.candidate1.id,
+                },
+            ]
+        }
+
+
+class MultiVoteViewTests(VotingTestCase):
     def test_happy_path_creates_votes_and_locks_student(self):
         payload = {
             "votes": [
@@ -72,6 +126,239 @@ class MultiVoteViewTests(TestCase):
         self.assertFalse(self.student.is_active)
         self.assertEqual(Vote.objects.filter(voter_hash=self.headers["HTTP_X_VOTER_TOKEN"]).count(), 2)
 
+    def test_second_ballot_is_rejected(self):
+        resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+        self.assertEqual(resp.status_code, 201, resp.content)
+        resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+        self.assertEqual(resp.status_code, 403, resp.content)
+        self.assertEqual(Vote.objects.count(), 1)
+
+    @override_settings(VOTE_COMMIT_STRATEGY="locking")
+    def test_locking_strategy_records_ballot(self):
+        resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+        self.assertEqual(resp.status_code, 201, resp.content)
+        self.student.refresh_from_db()
+        self.assertTrue(self.student.has_voted)
+        self.assertEqual(CandidateTally.objects.get(candidate=self.candidate1).votes, 1)
+
+    def test_journal_intake_defers_votes_to_writer(self):
+        with tempfile.TemporaryDirectory() as journal_dir, override_settings(
+            VOTE_INTAKE_MODE="journal",
+            VOTE_JOURNAL_DIR=journal_dir,
+            VOTE_JOURNAL_BACKGROUND_WRITER=False,
+        ):
+            resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+            self.assertEqual(resp.status_code, 201, resp.content)
+            self.assertIn("receipt", resp.data)
+            self.assertEqual(Vote.objects.count(), 0)
+            self.student.refresh_from_db()
+            self.assertTrue(self.student.has_voted)
+
+            path = get_journal().path
+            self.assertEqual(drain_journal(path), 1)
+            self.assertEqual(Vote.objects.count(), 1)
+            self.assertEqual(CandidateTally.objects.get(candidate=self.candidate1).votes, 1)
+
+            # Replaying from scratch (lost checkpoint) must not double count
+            os.remove(path + ".offset")
+            self.assertEqual(drain_journal(path), 1)
+            self.assertEqual(Vote.objects.count(), 1)
+            self.assertEqual(CandidateTally.objects.get(candidate=self.candidate1).votes, 1)
+
+    def test_journal_is_not_written_when_the_claim_fails_to_commit(self):
+        real_atomic = transaction.atomic
+
+        @contextlib.contextmanager
+        def failing_commit(*args, **kwargs):
+            with real_atomic(*args, **kwargs):
+                yield
+                raise OperationalError("could not serialize access")
+
+        with tempfile.TemporaryDirectory() as journal_dir, override_settings(
+            VOTE_INTAKE_MODE="journal",
+            VOTE_JOURNAL_DIR=journal_dir,
+            VOTE_JOURNAL_BACKGROUND_WRITER=False,
+        ):
+            with mock.patch("core.intake.transaction.atomic", failing_commit):
+                resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+            self.assertNotEqual(resp.status_code, 201, resp.content)
+            self.student.refresh_from_db()
+            self.assertFalse(self.student.has_voted)
+            self.assertEqual(drain_journal(get_journal().path), 0)
+            self.assertEqual(Vote.objects.count(), 0)
+
+    def test_failed_journal_append_releases_the_voter(self):
+        reconcile_turnout(self.election.id)
+        counter = TurnoutCounter.objects.get(election=self.election, class_name=self.student.class_name)
+        before = (counter.activated, counter.voted)
+        with tempfile.TemporaryDirectory() as journal_dir, override_settings(
+            VOTE_INTAKE_MODE="journal",
+            VOTE_JOURNAL_DIR=journal_dir,
+            VOTE_JOURNAL_BACKGROUND_WRITER=False,
+        ):
+            with mock.patch.object(type(get_journal()), "append", side_effect=OSError("disk full")):
+                resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+            self.assertNotEqual(resp.status_code, 201, resp.content)
+            self.student.refresh_from_db()
+            self.assertFalse(self.student.has_voted)
+            self.assertTrue(self.student.is_active)
+            counter.refresh_from_db()
+            self.assertEqual((counter.activated, counter.voted), before)
+
+            resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+            self.assertEqual(resp.status_code, 201, resp.content)
+
+    def test_journaled_ballot_that_became_invalid_is_dead_lettered(self):
+        with tempfile.TemporaryDirectory() as journal_dir, override_settings(
+            VOTE_INTAKE_MODE="journal",
+            VOTE_JOURNAL_DIR=journal_dir,
+            VOTE_JOURNAL_BACKGROUND_WRITER=False,
+        ):
+            resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+            self.assertEqual(resp.status_code, 201, resp.content)
+            candidate_id = self.candidate1.pk
+            with self.captureOnCommitCallbacks(execute=True):
+                self.candidate1.delete()
+                invalidate_ballot_structure(self.election.id)
+
+            self.assertEqual(drain_journal(get_journal().path), 1)
+            self.assertEqual(Vote.objects.count(), 0)
+            dead_letters = read_dead_letters()
+            self.assertEqual(dead_letters[0]["receipt"], resp.data["receipt"])
+            self.assertIn(f"candidate {candidate_id} ", dead_letters[0]["reason"])
+            self.assertEqual(journal_status()["dead_letter_records"], 1)
+
+            out, err = StringIO(), StringIO()
+            call_command("drain_vote_journal", stdout=out, stderr=err)
+            self.assertIn("1 ballot(s) could not be written", err.getvalue())
+
+    def test_stopping_election_invalidates_cached_ballot_structure(self):
+        get_ballot_structure(self.election.id)  # warm the per-process cache
+
+        staff = User.objects.create_user(username="staff", password="pass", role="staff")
+        self.client.force_authenticate(user=staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.patch(
+                "/api/elections/manage/",
+                {"election_id": self.election.id, "is_active": False},
+                format="json",
+            )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertFalse(get_ballot_structure(self.election.id).is_active)
+
+    def test_voter_auth_uses_cached_election_window(self):
+        get_election_window(self.election.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(get_election_window(self.election.id).is_active)
+
+        staff = User.objects.create_user(username="staff", password="pass", role="staff")
+        self.client.force_authenticate(user=staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                "/api/elections/manage/",
+                {"election_id": self.election.id, "is_active": False},
+                format="json",
+            )
+        self.client.force_authenticate(user=None)
+
+        resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+        self.assertEqual(resp.status_code, 403, resp.content)
+        self.assertEqual(str(resp.data["detail"]), "Election not found or not active.")
+
+    def test_vote_is_rejected_when_another_worker_stopped_the_election(self):
+        get_election_window(self.election.id)
+        get_ballot_structure(self.election.id)
+        # Stopped elsewhere: this worker's copies never hear about it.
+        Election.objects.filter(pk=self.election.id).update(is_active=False)
+
+        resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+        self.assertEqual(resp.status_code, 403, resp.content)
+        self.student.refresh_from_db()
+        self.assertFalse(self.student.has_voted)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_admin_save_without_changes_keeps_the_cached_ballot(self):
+        election_admin = admin.site._registry[Election]
+        request = mock.Mock(user=User.objects.create_superuser(username="root", password="pass"))
+        version = results_version(self.election.id)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            election_admin.save_model(request, self.election, mock.Mock(changed_data=[]), True)
+        self.assertEqual(results_version(self.election.id)[0], version)
+
+        self.election.name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            election_admin.save_model(request, self.election, mock.Mock(changed_data=["name"]), True)
+        self.assertGreater(results_version(self.election.id)[0], version)
+
+    def test_ballot_admins_resolve_the_election_they_invalidate(self):
+        for obj in (self.election, self.position1, self.candidate1):
+            self.assertEqual(admin.site._registry[type(obj)].ballot_election_id(obj), self.election.id)
+
+    def test_new_candidate_is_accepted_after_invalidation(self):
+        get_ballot_structure(self.election.id)
+        student_c = Student.objects.create(
+            student_id="S003", full_name="Cara", class_name="A1", election=self.election
+        )
+        staff = User.objects.create_user(username="staff", password="pass", role="staff")
+        self.client.force_authenticate(user=staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(
+                "/api/candidates/create/",
+                {"student": student_c.id, "position": self.position1.id, "ballot_number": 2},
+                format="json",
+            )
+        self.assertEqual(resp.status_code, 201, resp.content)
+        self.assertTrue(
+            get_ballot_structure(self.election.id).candidate_in_position(resp.data["id"], self.position1.id)
+        )
+
+    def test_vote_updates_tallies_read_by_results(self):
+        resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+        self.assertEqual(resp.status_code, 201, resp.content)
+
+        staff = User.objects.create_user(username="staff", password="pass", role="staff")
+        self.client.force_authenticate(user=staff)
+        resp = self.client.get(f"/api/elections/{self.election.id}/results/")
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(resp.data["unique_voters_who_cast_at_least_one_vote"], 1)
+        president = next(p for p in resp.data["positions"] if p["position_id"] == self.position1.id)
+        self.assertEqual(president["candidates"][0]["vote_count"], 1)
+        vp = next(p for p in resp.data["positions"] if p["position_id"] == self.position2.id)
+        self.assertEqual(vp["skipped_votes"], 1)
+
+    def test_results_are_revalidated_with_etag(self):
+        staff = User.objects.create_user(username="staff", password="pass", role="staff")
+        results_url = f"/api/elections/{self.election.id}/results/"
+
+        self.client.force_authenticate(user=staff)
+        first = self.client.get(results_url)
+        self.assertEqual(first.status_code, 200, first.content)
+        unchanged = self.client.get(results_url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(unchanged.status_code, 304)
+
+        self.client.force_authenticate(user=None)
+        resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+        self.assertEqual(resp.status_code, 201, resp.content)
+
+        self.client.force_authenticate(user=staff)
+        changed = self.client.get(results_url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+        self.assertEqual(changed.data["students_who_voted"], 1)
+        self.assertEqual(changed.data["total_students"], Student.objects.filter(election=self.election).count())
+
+    def test_rebuild_vote_tallies_matches_votes(self):
+        resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+        self.assertEqual(resp.status_code, 201, resp.content)
+        CandidateTally.objects.all().update(votes=42)
+
+        call_command("rebuild_vote_tallies", election_ids=[self.election.id], stdout=StringIO())
+
+        self.assertEqual(
+            CandidateTally.objects.get(candidate=self.candidate1).votes,
+            Vote.objects.filter(candidate=self.candidate1).count(),
+        )
+
     def test_rejects_candidate_not_in_position(self):
         payload = {
             "votes": [
@@ -101,6 +388,222 @@ class MultiVoteViewTests(TestCase):
         self.assertEqual(resp.status_code, 403, resp.content)
 
 
+class TurnoutCounterTests(VotingTestCase):
+    def test_turnout_counters_follow_votes_and_activation(self):
+        staff = User.objects.create_user(username="staff", password="pass", role="superuser")
+        turnout_url = f"/api/elections/{self.election.id}/turnout/"
+
+        resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+        self.assertEqual(resp.status_code, 201, resp.content)
+        self.client.force_authenticate(user=staff)
+        resp = self.client.post(
+            "/api/students/activate/",
+            {"student_id": "S002", "election_id": self.election.id, "is_active": False},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+        turnout = self.client.get(turnout_url)
+        self.assertEqual(turnout.status_code, 200, turnout.content)
+        self.assertEqual(
+            turnout.data["by_class"],
+            [{"class_name": "A1", "total": 2, "activated": 0, "voted": 1, "turnout_percentage": 50.0}],
+        )
+
+        TurnoutCounter.objects.filter(election=self.election).update(voted=7)
+        call_command("reconcile_turnout", election_ids=[self.election.id], stdout=StringIO())
+        self.assertEqual(self.client.get(turnout_url).data["by_class"], turnout.data["by_class"])
+
+
+    def test_deactivating_a_student_who_just_voted_leaves_counters_alone(self):
+        stale = Student.objects.get(pk=self.student.pk)  # read by the desk before the vote lands
+        resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+        self.assertEqual(resp.status_code, 201, resp.content)
+
+        self.client.force_authenticate(user=User.objects.create_user(username="staff", password="pass", role="superuser"))
+        with mock.patch.object(Student.objects, "get", return_value=stale):
+            resp = self.client.post(
+                "/api/students/activate/",
+                {"student_id": "S001", "election_id": self.election.id, "is_active": False},
+                format="json",
+            )
+        self.assertEqual(resp.status_code, 403, resp.content)
+        self.assertEqual(
+            TurnoutCounter.objects.values_list("activated", "voted").get(election=self.election), (1, 1)
+        )
+
+
+class VoteTallyMigrationTests(TransactionTestCase):
+    """The tallies migration counts the votes cast before it."""
+
+    before = [("core", "0010_alter_candidate_photo_url")]
+    after = [("core", "0011_add_vote_tallies")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_existing_votes_are_tallied(self):
+        apps = self.migrate(self.before)
+        Election = apps.get_model("core", "Election")
+        Position = apps.get_model("core", "Position")
+        Student = apps.get_model("core", "Student")
+        Candidate = apps.get_model("core", "Candidate")
+        Vote = apps.get_model("core", "Vote")
+        now = timezone.now()
+        election = Election.objects.create(name="Old", year=2024, start_time=now, end_time=now, is_active=False)
+        positions = [Position.objects.create(name=f"P{i}", election=election, display_order=i) for i in range(2)]
+        candidates = [
+            Candidate.objects.create(
+                student=Student.objects.create(student_id=f"C{i}", full_name=f"C{i}", class_name="A1", election=election),
+                position=position,
+            )
+            for i, position in enumerate(positions)
+        ]
+        for voter in ("v1", "v2", "v3"):
+            for candidate in candidates[: 1 if voter == "v3" else 2]:
+                Vote.objects.create(election=election, position=candidate.position, candidate=candidate, voter_hash=voter)
+
+        apps = self.migrate(self.after)
+        CandidateTally = apps.get_model("core", "CandidateTally")
+        ElectionTally = apps.get_model("core", "ElectionTally")
+        self.assertEqual(
+            dict(CandidateTally.objects.values_list("candidate_id", "votes")),
+            {candidates[0].pk: 3, candidates[1].pk: 2},
+        )
+        self.assertEqual(ElectionTally.objects.get(election_id=election.pk).ballots_cast, 3)
+
+
+class QueryTimingTests(VotingTestCase):
+    def test_requests_report_query_timing_and_budget(self):
+        self.client.force_authenticate(user=User.objects.create_user(username="staff", password="pass", role="staff"))
+        results_url = f"/api/elections/{self.election.id}/results/"
+        with self.assertLogs("performance", level="INFO") as logs:
+            resp = self.client.get(results_url)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertRegex(resp["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", view;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertIn("REQUEST_TIMING: method=GET", logs.output[0])
+        self.assertIn("view=election-results", logs.output[0])
+
+        with override_settings(QUERY_BUDGETS={"election-results": 0}), self.assertLogs("performance", level="WARNING") as logs:
+            self.client.get(results_url)
+        self.assertIn("QUERY_BUDGET_EXCEEDED", logs.output[0])
+
+    def test_vote_stays_within_its_measured_query_budget(self):
+        # Cold path: the class turnout counter and tally shards don't exist yet.
+        resp = self.client.post("/api/vote/", {"votes": [
+            {"election": self.election.id, "position": self.position1.id, "candidate": self.candidate1.id},
+            {"election": self.election.id, "position": self.position2.id, "candidate": self.candidate2.id},
+        ]}, format="json", **self.headers)
+        self.assertEqual(resp.status_code, 201, resp.content)
+        self.assertIn(f'desc="{settings.QUERY_BUDGETS["multi-vote"]} queries"', resp["Server-Timing"])
+
+
+class MetricsTests(VotingTestCase):
+    def test_metrics_are_summed_across_workers(self):
+        metrics_dir = tempfile.mkdtemp()
+        metrics_registry.clear()
+        with override_settings(METRICS_DIR=metrics_dir):
+            resp = self.client.post("/api/vote/", self._vote_payload(), format="json", **self.headers)
+            self.assertEqual(resp.status_code, 201, resp.content)
+            with open(os.path.join(metrics_dir, "metrics-0.json"), "w") as fh:
+                json.dump({
+                    "evoting_security_events_total": {"values": [[["VOTE_SUCCESS"], 2]]},
+                    "evoting_vote_transaction_seconds": {"values": [[["conditional"], [1] + [0] * 11 + [0.001]]]},
+                }, fh)
+
+            self.assertEqual(self.client.get("/api/metrics/").status_code, 403)  # no token, DEBUG off
+            with override_settings(METRICS_TOKEN="secret"):
+                resp = self.client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(resp.status_code, 200)
+        text = resp.content.decode()
+        self.assertIn('evoting_security_events_total{event="VOTE_SUCCESS"} 3', text)
+        self.assertIn('evoting_vote_transaction_seconds_count{strategy="conditional"} 2', text)
+        self.assertIn('evoting_vote_lock_wait_seconds_count{step="voter"} 1', text)
+        self.assertIn('evoting_request_duration_seconds_count{view="multi-vote",method="POST"} 1', text)
+
+        with override_settings(METRICS_TOKEN="secret"):
+            self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get("/api/metrics/").status_code, 200)
+
+
+class AsyncReadViewTests(VotingTestCase):
+    def test_middleware_runs_under_asgi_and_positions_accept_posts(self):
+        for path in settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(path), "async_capable", False), path)
+
+        staff = User.objects.create_user(username="staff", password="pass", role="staff")
+        self.client.force_authenticate(user=staff)
+        resp = self.client.post(
+            "/api/positions/", {"name": "Treasurer", "election": self.election.id, "display_order": 3}, format="json"
+        )
+        self.assertEqual(resp.status_code, 201, resp.content)
+
+    async def test_public_reads_and_stats_are_async_views(self):
+        client = AsyncClient()
+        resp = await client.get("/api/elections/", {"is_active": "true"})
+        self.assertEqual([e["id"] for e in resp.json()], [self.election.id])
+        self.assertEqual((await client.get(f"/api/elections/{self.election.id + 1}/")).status_code, 404)
+        resp = await client.get("/api/positions/", {"election_id": self.election.id})
+        self.assertEqual(sorted(p["name"] for p in resp.json()), ["President", "VP"])
+        resp = await client.get("/api/candidates/", {"position_id": self.position1.id})
+        self.assertEqual([c["student_name"] for c in resp.json()], ["Alice"])
+
+        resp = await client.get(f"/api/elections/{self.election.id}/ballot/")
+        self.assertEqual(len(resp.json()["positions"]), 2)
+        self.assertIn('desc="3 queries"', resp["Server-Timing"])  # counted on the async path too
+
+        stats_url = f"/api/elections/{self.election.id}/stats/"
+        self.assertEqual((await client.get(stats_url)).status_code, 401)
+        staff = await sync_to_async(User.objects.create_user)(username="staff", role="staff")
+        await sync_to_async(reconcile_turnout)(self.election.id)
+        resp = await client.get(stats_url, headers={"Authorization": f"Bearer {AccessToken.for_user(staff)}"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.json()["election_id"], resp.json()["total_voters"]), (self.election.id, 2))
+
+
+class BallotEndpointTests(VotingTestCase):
+    def test_ballot_bundle_is_constant_queries_and_revalidated(self):
+        ballot_url = f"/api/elections/{self.election.id}/ballot/"
+        with self.assertNumQueries(3):
+            first = self.client.get(ballot_url)
+        self.assertEqual(first.status_code, 200, first.content)
+        self.assertEqual(
+            [(p["id"], [c["id"] for c in p["candidates"]]) for p in first.json()["positions"]],
+            [(self.position1.id, [self.candidate1.id]), (self.position2.id, [self.candidate2.id])],
+        )
+        self.assertEqual(first.json()["positions"][0]["candidates"][0]["student_name"], "Alice")
+
+        with self.assertNumQueries(0):
+            unchanged = self.client.get(ballot_url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(unchanged.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Position.objects.filter(pk=self.position1.pk).update(name="Head Prefect")
+            invalidate_ballot_structure(self.election.id)
+        changed = self.client.get(ballot_url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["positions"][0]["name"], "Head Prefect")
+
+    def test_renaming_a_candidate_student_refreshes_the_ballot(self):
+        ballot_url = f"/api/elections/{self.election.id}/ballot/"
+        first = self.client.get(ballot_url)
+        staff = User.objects.create_user(username="staff", password="pass", role="staff")
+        self.client.force_authenticate(user=staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.patch(f"/api/students/{self.student.pk}/", {"full_name": "Alicia"}, format="json")
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+        changed = self.client.get(ballot_url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["positions"][0]["candidates"][0]["student_name"], "Alicia")
+
+
 class BulkStudentUploadTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -163,3 +666,479 @@ class BulkStudentUploadTests(TestCase):
         )
         self.assertEqual(resp.status_code, 201, resp.content)
         self.assertEqual(Student.objects.filter(election=self.election).count(), 2)  # one pre-existing + one new
+
+
+    @override_settings(ROSTER_IMPORT_CHUNK_SIZE=2)
+    def test_bulk_upload_reports_chunks(self):
+        Student.objects.create(student_id="S102", full_name="Existing", class_name="A1", election=self.election)
+        buf = self._make_workbook(
+            [
+                ["S100", "Alice One", "A1"],
+                ["S100", "Alice Again", "A1"],
+                ["S101", "Bob Two", "A1"],
+                ["S102", "Existing", "A1"],
+                ["S103", None, "A1"],
+            ]
+        )
+        resp = self.client.post(
+            "/api/students/bulk-upload/",
+            {"file": buf, "election_id": self.election.id},
+            format="multipart",
+        )
+        self.assertEqual(resp.status_code, 201, resp.content)
+        self.assertEqual(
+            (resp.data["created"], resp.data["skipped_existing"], resp.data["skipped_duplicate"], resp.data["skipped_invalid"]),
+            (2, 1, 1, 1),
+        )
+        self.assertEqual([c["rows"] for c in resp.data["chunks"]], [2, 2, 1])
+        self.assertEqual(Student.objects.filter(election=self.election).count(), 3)
+
+    @override_settings(ROSTER_IMPORT_BACKGROUND_WORKER=False, ROSTER_IMPORT_CHUNK_SIZE=2)
+    def test_background_import_job_reports_progress_and_row_errors(self):
+        buf = self._make_workbook(
+            [
+                ["S100", "Alice One", "A1"],
+                ["S101", None, "A1"],
+                ["S102", "Carl Three", "B2"],
+            ]
+        )
+        with tempfile.TemporaryDirectory() as directory, override_settings(ROSTER_IMPORT_DIR=directory):
+            resp = self.client.post(
+                "/api/students/bulk-upload/",
+                {"file": buf, "election_id": self.election.id, "background": "true"},
+                format="multipart",
+            )
+            self.assertEqual(resp.status_code, 202, resp.content)
+            self.assertEqual(Student.objects.filter(election=self.election).count(), 0)
+
+            call_command("run_roster_imports", stdout=StringIO())
+            self.assertEqual(os.listdir(directory), [])
+
+        job = self.client.get(resp.data["status_url"])
+        self.assertEqual(job.status_code, 200, job.content)
+        self.assertEqual(job.data["status"], "succeeded")
+        self.assertEqual((job.data["rows_processed"], job.data["created"], job.data["skipped_invalid"]), (3, 2, 1))
+        self.assertEqual(job.data["errors"], [{"row": 3, "student_id": "S101", "error": "Missing full_name"}])
+        self.assertEqual(Student.objects.filter(election=self.election).count(), 2)
+
+    @override_settings(ROSTER_IMPORT_BACKGROUND_WORKER=False)
+    def test_import_job_interrupted_by_a_restart_is_finished_on_startup(self):
+        buf = self._make_workbook([["S100", "Alice One", "A1"]])
+        with tempfile.TemporaryDirectory() as directory, override_settings(ROSTER_IMPORT_DIR=directory):
+            resp = self.client.post(
+                "/api/students/bulk-upload/",
+                {"file": buf, "election_id": self.election.id, "background": "true"},
+                format="multipart",
+            )
+            self.assertEqual(resp.status_code, 202, resp.content)
+            # The worker that claimed it went away mid-import.
+            RosterImportJob.objects.filter(pk=resp.data["job_id"]).update(status=RosterImportJob.RUNNING)
+
+            call_command("run_roster_imports", retry_running=True, stdout=StringIO())  # as start.sh does
+
+        self.assertEqual(RosterImportJob.objects.get(pk=resp.data["job_id"]).status, RosterImportJob.SUCCEEDED)
+        self.assertEqual(Student.objects.filter(election=self.election).count(), 1)
+
+    def test_bulk_upload_accepts_csv_and_tsv(self):
+        for name, body in [
+            ("roster.csv", "\ufeffStudent_ID,Full_Name,Class_Name\nS100,Alice One,A1\nS101,,A1\n"),
+            ("roster.tsv", "class_name\tstudent_id\tfull_name\nB2\tS102\tBob Two\n"),
+        ]:
+            upload = BytesIO(body.encode())
+            upload.name = name
+            resp = self.client.post(
+                "/api/students/bulk-upload/",
+                {"file": upload, "election_id": self.election.id},
+                format="multipart",
+            )
+            self.assertEqual(resp.status_code, 201, resp.content)
+        self.assertEqual(
+            list(Student.objects.filter(election=self.election).order_by("student_id").values_list("student_id", "class_name")),
+            [("S100", "A1"), ("S102", "B2")],
+        )
+
+    @override_settings(ROSTER_IMPORT_CHUNK_SIZE=100)
+    def test_bulk_upload_failing_midway_keeps_and_reports_committed_chunks(self):
+        # Undecodable bytes well past the text reader's first buffer.
+        rows = "".join(f"S{i:04d},Student Number {i},A1\n" for i in range(1000))
+        upload = BytesIO(f"student_id,full_name,class_name\n{rows}".encode() + b"S9999,\xff\xfe,A1\n")
+        upload.name = "roster.csv"
+        with mock.patch("core.views.roster_changed") as changed:
+            resp = self.client.post(
+                "/api/students/bulk-upload/",
+                {"file": upload, "election_id": self.election.id},
+                format="multipart",
+            )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["detail"], "Could not read file as UTF-8 text.")
+        committed = Student.objects.filter(election=self.election).count()
+        self.assertGreater(committed, 0)
+        self.assertEqual(resp.data["created"], committed)
+        changed.assert_called_once_with(self.election.id)
+
+    def test_bulk_upload_csv_missing_column(self):
+        upload = BytesIO(b"student_id,full_name\nS100,Alice\n")
+        upload.name = "roster.csv"
+        resp = self.client.post(
+            "/api/students/bulk-upload/",
+            {"file": upload, "election_id": self.election.id},
+            format="multipart",
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["detail"], "Missing columns: class_name")
+
+    def test_sync_mode_previews_then_applies_roster_changes(self):
+        def student(student_id, full_name, **kwargs):
+            return Student.objects.create(
+                student_id=student_id, full_name=full_name, class_name="A1", election=self.election, **kwargs
+            )
+
+        student("S100", "Alice Onee")
+        student("S101", "Bob Two")
+        student("S102", "Gone Student")
+        student("S103", "Voted Student", has_voted=True)
+        position = Position.objects.create(name="President", election=self.election, display_order=1)
+        Candidate.objects.create(student=student("S104", "Candidate"), position=position)
+
+        def upload(preview):
+            csv_file = BytesIO(b"student_id,full_name,class_name\nS100,Alice One,A1\nS101,Bob Two,A1\nS105,New Student,B2\n")
+            csv_file.name = "roster.csv"
+            return self.client.post(
+                "/api/students/bulk-upload/",
+                {"file": csv_file, "election_id": self.election.id, "mode": "sync", "preview": preview},
+                format="multipart",
+            )
+
+        preview = upload("true")
+        self.assertEqual(preview.status_code, 200, preview.content)
+        self.assertEqual(
+            {k: preview.data[k] for k in ("adds", "updates", "removals", "protected", "unchanged")},
+            {"adds": 1, "updates": 1, "removals": 1, "protected": 2, "unchanged": 1},
+        )
+        self.assertEqual(Student.objects.filter(election=self.election).count(), 5)
+
+        applied = upload("false")
+        self.assertEqual(applied.status_code, 200, applied.content)
+        self.assertEqual(
+            dict(Student.objects.filter(election=self.election).values_list("student_id", "full_name")),
+            {"S100": "Alice One", "S101": "Bob Two", "S103": "Voted Student", "S104": "Candidate", "S105": "New Student"},
+        )
+
+
+class RosterTestCase(TestCase):
+    """An election roster of four students in two classes, one of whom has voted, and a staff client."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="staff", password="pass", role="staff")
+        )
+        now = timezone.now()
+        self.election = Election.objects.create(
+            name="Roster", year=2025, start_time=now, end_time=now + timedelta(hours=1)
+        )
+        for i, (name, class_name) in enumerate(
+            [("Ama Owusu", "A1"), ("Kofi Mensah", "A1"), ("Esi Boateng", "B2"), ("Kwame Asare", "B2")]
+        ):
+            Student.objects.create(
+                student_id=f"S{i:03d}",
+                full_name=name,
+                class_name=class_name,
+                has_voted=i == 0,
+                election=self.election,
+            )
+        # Fixture rows bypass the API; count them like the migration does.
+        reconcile_turnout(self.election.id)
+
+
+class StudentRosterApiTests(RosterTestCase):
+    def test_keyset_pages_cover_the_roster(self):
+        url = f"/api/students/?election_id={self.election.id}&page_size=3"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200, first.content)
+        self.assertEqual([s["student_id"] for s in first.data["results"]], ["S000", "S001", "S002"])
+
+        second = self.client.get(first.data["next"])
+        self.assertEqual([s["student_id"] for s in second.data["results"]], ["S003"])
+        self.assertIsNone(second.data["next"])
+
+    def test_filters_search_and_ordering(self):
+        base = f"/api/students/?election_id={self.election.id}"
+
+        resp = self.client.get(f"{base}&class_name=B2&ordering=-full_name")
+        self.assertEqual([s["full_name"] for s in resp.data], ["Kwame Asare", "Esi Boateng"])
+
+        resp = self.client.get(f"{base}&has_voted=false&class_name=A1")
+        self.assertEqual([s["student_id"] for s in resp.data], ["S001"])
+
+        resp = self.client.get(f"{base}&search=kof")
+        self.assertEqual([s["student_id"] for s in resp.data], ["S001"])
+
+        resp = self.client.get(f"{base}&ordering=election")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_dashboard_summarizes_roster_by_class(self):
+        clear_snapshots()
+        Student.objects.filter(student_id="S002").update(is_active=True)
+        reconcile_turnout(self.election.id)
+        resp = self.client.get(f"/api/elections/{self.election.id}/dashboard/")
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(resp.data["total_students"], 4)
+        self.assertEqual(resp.data["active_students"], 1)
+        self.assertEqual(resp.data["voted_students"], 1)
+        self.assertEqual(
+            [(c["class_name"], c["total"], c["voted"]) for c in resp.data["by_class"]],
+            [("A1", 2, 1), ("B2", 2, 0)],
+        )
+
+        # Unchanged: served from the snapshot after reading the version.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(f"/api/elections/{self.election.id}/dashboard/").status_code, 200)
+
+        activator = User.objects.create_user(username="activator", password="pass", role="activator")
+        self.client.force_authenticate(user=activator)
+        resp = self.client.post(
+            "/api/students/activate/bulk/", {"election_id": self.election.id, "class_name": "B2"}, format="json"
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.client.force_authenticate(user=User.objects.get(username="staff"))
+        resp = self.client.get(f"/api/elections/{self.election.id}/dashboard/")
+        self.assertEqual(resp.data["active_students"], 2)
+
+    def test_bulk_activation_by_class_and_ids(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="activator", password="pass", role="activator")
+        )
+        url = "/api/students/activate/bulk/"
+        resp = self.client.post(url, {"election_id": self.election.id, "class_name": "A1"}, format="json")
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(resp.data["changed"], 1)
+        self.assertEqual(resp.data["outcomes"], {"S000": "already_voted", "S001": "activated"})
+
+        resp = self.client.post(
+            url, {"election_id": self.election.id, "student_ids": ["S001", "S002", "S999"]}, format="json"
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(
+            resp.data["outcomes"], {"S001": "already_active", "S002": "activated", "S999": "not_found"}
+        )
+        self.assertEqual(
+            list(Student.objects.filter(is_active=True).order_by("student_id").values_list("student_id", flat=True)),
+            ["S001", "S002"],
+        )
+
+    @override_settings(STUDENT_SEARCH_BACKEND="index")
+    def test_student_search_ranks_id_prefix_name_words_and_typos(self):
+        self.assertSearchRanksIdPrefixNameWordsAndTypos()
+
+    @skipUnless(connection.vendor == "postgresql", "pg_trgm search runs on PostgreSQL")
+    @override_settings(STUDENT_SEARCH_BACKEND="database")
+    def test_database_search_ranks_id_prefix_name_words_and_typos(self):
+        self.assertSearchRanksIdPrefixNameWordsAndTypos()
+
+    def assertSearchRanksIdPrefixNameWordsAndTypos(self):
+        clear_search_indexes()
+        url = f"/api/elections/{self.election.id}/students/search/"
+        ids = lambda resp: [s["student_id"] for s in resp.data["results"]]
+
+        self.assertEqual(ids(self.client.get(url, {"q": "s00"}))[:2], ["S000", "S001"])
+        self.assertEqual(ids(self.client.get(url, {"q": "kw as"})), ["S003"])
+        self.assertEqual(ids(self.client.get(url, {"q": "Mensha"})), ["S001"])
+        first = self.client.get(url, {"q": "S000"}).data["results"][0]
+        self.assertEqual((first["is_active"], first["has_voted"]), (False, True))
+
+        # Only students who can still be activated, filtered before the limit.
+        self.assertEqual(ids(self.client.get(url, {"q": "s00", "limit": 1, "eligible": "true"})), ["S001"])
+        self.assertEqual(ids(self.client.get(url, {"q": "", "eligible": "true"})), ["S001", "S002", "S003"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/students/",
+                {"student_id": "S100", "full_name": "Yaw Kwarteng", "class_name": "C3", "election_id": self.election.id},
+                format="json",
+            )
+        self.assertEqual(ids(self.client.get(url, {"q": "kwa"})), ["S003", "S100"])
+
+
+class LiveUpdatesTests(RosterTestCase):
+    def test_live_updates_need_asgi(self):
+        resp = self.client.get(f"/api/elections/{self.election.id}/live/")
+        self.assertEqual(resp.status_code, 503)
+
+    @override_settings(LIVE_UPDATES_INTERVAL=60)
+    async def test_live_updates_stream_snapshot_then_deltas(self):
+        staff = await User.objects.aget(username="staff")
+        url = f"/api/elections/{self.election.id}/live/"
+        self.assertEqual((await AsyncClient().get(url)).status_code, 401)
+
+        resp = await AsyncClient().get(url, headers={"Authorization": f"Bearer {AccessToken.for_user(staff)}"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        events = aiter(resp.streaming_content)
+        event, data = (await anext(events)).decode().split("\n")[:2]
+        self.assertEqual(event, "event: snapshot")
+        snapshot = json.loads(data.removeprefix("data: "))
+        self.assertEqual((snapshot["total"], snapshot["activated"], snapshot["voted"]), (4, 0, 1))
+
+        def activate():
+            Student.objects.filter(student_id="S001").update(is_active=True)
+            adjust_turnout(self.election.id, "A1", activated=1)
+
+        await sync_to_async(activate)()
+        await get_feed().poll()
+        event, data = (await anext(events)).decode().split("\n")[:2]
+        self.assertEqual(event, "event: delta")
+        self.assertEqual(json.loads(data.removeprefix("data: ")), {"activated": 1})
+
+        # A failed read is logged and the feed keeps polling.
+        with mock.patch("core.live.election_state", side_effect=DatabaseError("connection lost")), \
+                self.assertLogs("core.live", level="ERROR"):
+            await get_feed().poll()
+
+        # Subscribers of a deleted election get `closed` and their stream ends.
+        await sync_to_async(Election.objects.filter(pk=self.election.id).delete)()
+        await get_feed().poll()
+        self.assertTrue((await anext(events)).decode().startswith("event: closed"))
+        with self.assertRaises(StopAsyncIteration):
+            await anext(events)
+
+
+class HotQueryPlanTests(TestCase):
+    """
+    EXPLAIN the hot-path queries on a seeded election and fail if any of
+    them falls back to a full scan of its table.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Many finished elections, as in a long-lived deployment, so the
+        # current one is a small part of every table and, with fresh
+        # statistics, an index is the cheapest way to reach its rows.
+        for year in range(9):
+            cls.cast_votes(seed_election(positions=3, candidates=4, voters=1000, name=f"Past election {year}"), 1000)
+        Election.objects.update(is_active=False)
+        cls.seeded = seed_election(positions=3, candidates=4, voters=1000)
+        cls.cast_votes(cls.seeded, 500)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    @staticmethod
+    def cast_votes(seeded, voters):
+        votes = [
+            Vote(election=seeded.election, position_id=vote["position"], candidate_id=vote["candidate"], voter_hash=seeded.token_for(student))
+            for index, student in enumerate(seeded.voters[:voters])
+            for vote in seeded.ballot_for(index)
+        ]
+        Vote.objects.bulk_create(votes, batch_size=2000)
+        Student.objects.filter(pk__in=[s.pk for s in seeded.voters[:voters]]).update(has_voted=True, is_active=False)
+
+    def assertUsesIndex(self, queryset, table):
+        plan = queryset.explain()
+        if connection.vendor == "postgresql":
+            self.assertNotIn(f"Seq Scan on {table}", plan, plan)
+        else:
+            self.assertRegex(plan, rf"SEARCH (TABLE )?{table}\b", plan)
+            self.assertNotRegex(plan, rf"SCAN (TABLE )?{table}\b", plan)
+
+    def test_hot_queries_use_indexes(self):
+        election = self.seeded.election
+        candidate = self.seeded.candidates[self.seeded.positions[0].id][0]
+        active_elections = Election.objects.filter(
+            is_active=True, start_time__lte=timezone.now(), end_time__gte=timezone.now()
+        )
+        hot_queries = {
+            "distinct voters per election": (
+                Vote.objects.filter(election=election).values("voter_hash").distinct(), "core_vote"
+            ),
+            "latest vote per election": (
+                Vote.objects.filter(election=election).order_by("-created_at")[:1], "core_vote"
+            ),
+            "votes per candidate": (Vote.objects.filter(candidate=candidate), "core_vote"),
+            "voted students per election": (
+                Student.objects.filter(election=election, has_voted=True), "core_student"
+            ),
+            "voter login": (
+                Student.objects.filter(
+                    student_id="V0000800", election__in=active_elections, is_active=True, has_voted=False
+                ),
+                "core_student",
+            ),
+        }
+        for name, (queryset, table) in hot_queries.items():
+            with self.subTest(name):
+                self.assertUsesIndex(queryset, table)
+
+
+
+class HealthCheckTests(TestCase):
+    def test_liveness_skips_the_stack_and_readiness_is_cached(self):
+        for path in ("/", "/health/", "/api/health/", "/api/healthz/"):
+            with self.assertNumQueries(0):
+                resp = self.client.get(path)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.json()["status"], "ok")
+            self.assertNotIn("Server-Timing", resp)  # answered before QueryTimingMiddleware
+
+        with self.assertNumQueries(1):
+            resp = self.client.get("/api/readyz/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {"status": "ready", "checks": {"database": "ok", "cache": "disabled"}})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/readyz/").status_code, 200)
+
+class SecurityLogHandlerTests(TestCase):
+    def test_full_queue_drops_and_counts_after_the_handler_timeout(self):
+        writer = _Writer()
+        writer.pid = os.getpid()
+        writer.queue = queue.Queue(maxsize=1)
+        handler = BatchingFileHandler(os.path.join(tempfile.mkdtemp(), "security.log"), timeout=0.01)
+        handler.name = "security_file"
+        before = LOG_RECORDS_DROPPED.values.get(("security_file",), 0)
+        record = logging.makeLogRecord({"msg": "LOGIN_SUCCESS: student_id=S001"})
+        writer.put(handler, record)
+        writer.put(handler, record)  # waits out the timeout, then drops
+        self.assertEqual(writer.dropped, 1)
+        self.assertEqual(LOG_RECORDS_DROPPED.values[("security_file",)], before + 1)
+
+    def test_records_are_written_as_json_and_rotated_files_gzipped(self):
+        path = os.path.join(tempfile.mkdtemp(), "security.log")
+        handler = BatchingFileHandler(path, max_bytes=600, backup_count=10)
+        handler.setFormatter(JsonFormatter())
+        # A second worker's handler on the same file.
+        other = BatchingFileHandler(path, max_bytes=600, backup_count=10)
+        logger = logging.getLogger("core.tests.security")
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        try:
+            logger.warning("STUDENT_%s: student_id=%s, election_id=%s, ip=%s", "ACTIVATED", "S001", 4, "10.0.0.1")
+            flush_logs()
+            with open(path) as fh:
+                entry = json.loads(fh.readline())
+            self.assertEqual(entry["event"], "STUDENT_ACTIVATED")
+            self.assertEqual((entry["student_id"], entry["election_id"], entry["ip"]), ("S001", 4, "10.0.0.1"))
+            self.assertEqual(entry["message"], "STUDENT_ACTIVATED: student_id=S001, election_id=4, ip=10.0.0.1")
+
+            other.write_lines(["other-worker-1"])
+            for i in range(10):
+                logger.info("LOGIN_SUCCESS: student_id=%s", f"S{i:03d}")
+                flush_logs()
+            # The other worker follows the rotation instead of truncating or re-rotating.
+            other.write_lines(["other-worker-2"])
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+            other.close()
+
+        with open(path) as fh:
+            self.assertEqual(fh.read().splitlines()[-1], "other-worker-2")
+        with open(f"{path}.1") as fh:
+            self.assertTrue(all(json.loads(line)["logger"] == "core.tests.security" for line in fh))
+        rotated = ""
+        for index in range(2, 11):
+            if os.path.exists(f"{path}.{index}.gz"):
+                with gzip.open(f"{path}.{index}.gz", "rt") as fh:
+                    rotated += fh.read()
+        self.assertIn("STUDENT_ACTIVATED", rotated)
+        self.assertIn("other-worker-1", rotated)  # not lost to a truncation
+
@@ -0,0 +1,150 @@
+"""
+Per-election, per-class turnout counters (total, activated, voted).
+
+Every code path that creates, deletes or changes the activation/vote state
+of students adjusts the TurnoutCounter of the student's class in the same
+transaction, *after* writing the Student rows. A counter that doesn't exist
+yet is seeded from the Student rows themselves (which then already include
+the change), so counters are correct from the first write on.
+`reconcile_turnout` recomputes them from scratch.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Subquery
+
+from .models import Student, TurnoutCounter
+
+FIELDS = ("total", "activated", "voted")
+
+
+def _counts(election_id, class_name=None):
+    students = Student.objects.filter(election_id=election_id)
+    if class_name is not None:
+        students = students.filter(class_name=class_name)
+    return (
+        students.values("class_name")
+        .annotate(
+            total=Count("id"),
+            activated=Count("id", filter=Q(is_active=True)),
+            voted=Count("id", filter=Q(has_voted=True)),
+        )
+        .order_by("class_name")
+    )
+
+
+def _updates(amounts):
+    return {field: F(field) + amount for field, amount in amounts.items()}
+
+
+def _seed(election_id, class_name, amounts):
+    row = next(iter(_counts(election_id, class_name)), None)
+    counts = {field: row[field] if row else 0 for field in FIELDS}
+    try:
+        with transaction.atomic():
+            TurnoutCounter.objects.create(election_id=election_id, class_name=class_name, **counts)
+    except IntegrityError:
+        # Seeded concurrently from rows that don't include this transaction's change.
+        TurnoutCounter.objects.filter(election_id=election_id, class_name=class_name).update(
+            **_updates(amounts)
+        )
+
+
+def adjust_turnout(election_id, class_name, total=0, activated=0, voted=0):
+    """Add the given amounts to a class's counter, seeding it if needed."""
+    amounts = {field: amount for field, amount in zip(FIELDS, (total, activated, voted)) if amount}
+    if not amounts:
+        return
+    updated = TurnoutCounter.objects.filter(election_id=election_id, class_name=class_name).update(
+        **_updates(amounts)
+    )
+    if not updated:
+        _seed(election_id, class_name, amounts)
+
+
+def student_state(student):
+    """Snapshot of the fields a counter depends on; pass to `student_changed`."""
+    return (student.election_id, student.class_name, student.is_active, student.has_voted)
+
+
+def student_changed(before, after):
+    """
+    Account for one student going from state `before` to `after` (either may
+    be None for a created/deleted student).
+    """
+    deltas = Counter()
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None:
+            continue
+        election_id, class_name, is_active, has_voted = state
+        key = (election_id, class_name)
+        deltas[key + ("total",)] += sign
+        deltas[key + ("activated",)] += sign * bool(is_active)
+        deltas[key + ("voted",)] += sign * bool(has_voted)
+
+    for election_id, class_name in sorted({key[:2] for key in deltas}):
+        adjust_turnout(
+            election_id,
+            class_name,
+            **{field: deltas[(election_id, class_name, field)] for field in FIELDS},
+        )
+
+
+def students_added(election_id, students):
+    """Account for newly created (not activated, not voted) students."""
+    for class_name, count in sorted(Counter(s.class_name for s in students).items()):
+        adjust_turnout(election_id, class_name, total=count)
+
+
+def voter_claimed(student_pk):
+    """
+    Account for a student going from activated to voted. Resolves the class
+    inside the UPDATE so the vote path needs no extra round trip.
+    """
+    student = Student.objects.filter(pk=student_pk)
+    updated = TurnoutCounter.objects.filter(
+        election_id=Subquery(student.values("election_id")[:1]),
+        class_name=Subquery(student.values("class_name")[:1]),
+    ).update(**_updates({"activated": -1, "voted": 1}))
+    if not updated:
+        election_id, class_name = student.values_list("election_id", "class_name").get()
+        _seed(election_id, class_name, {"activated": -1, "voted": 1})
+
+
+@transaction.atomic
+def reconcile_turnout(election_id):
+    """Recompute an election's counters from its Student rows; returns the class count."""
+    TurnoutCounter.objects.filter(election_id=election_id).delete()
+    counters = TurnoutCounter.objects.bulk_create(
+        TurnoutCounter(election_id=election_id, **row) for row in _counts(election_id)
+    )
+    return len(counters)
+
+
+def turnout_breakdown(election_id):
+    """Return (totals, by_class) for an election, read from its counters."""
+    return _breakdown(list(_counter_rows(election_id)))
+
+
+async def aturnout_breakdown(election_id):
+    """Async turnout_breakdown()."""
+    return _breakdown([row async for row in _counter_rows(election_id)])
+
+
+def _counter_rows(election_id):
+    return (
+        TurnoutCounter.objects.filter(election_id=election_id)
+        .exclude(total=0)
+        .order_by("class_name")
+        .values("class_name", *FIELDS)
+    )
+
+
+def _breakdown(by_class):
+    for row in by_class:
+        row["turnout_percentage"] = round(row["voted"] / row["total"] * 100, 2) if row["total"] else 0.0
+    totals = {field: sum(row[field] for row in by_class) for field in FIELDS}
+    totals["turnout_percentage"] = (
+        round(totals["voted"] / totals["total"] * 100, 2) if totals["total"] else 0.0
+    )
+    return totals, by_class
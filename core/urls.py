@@ -2,13 +2,19 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    ElectionViewSet,
+    ElectionListView,
     StudentViewSet,
     PositionViewSet,
-    CandidateViewSet,
+    PositionListView,
+    CandidateListView,
+    ElectionBallotView,
     MultiVoteView,
+    VoteIntakeStatusView,
     StudentActivationView,
+    StudentBulkActivationView,
+    StudentSearchView,
     BulkStudentUploadView,
+    RosterImportJobView,
     MeView,
     PositionCreateView,
     ElectionCreateView,
@@ -16,6 +22,10 @@ from .views import (
     ElectionManageView,
     StudentVoterLoginView,
     ElectionStatsView,
+    ElectionDashboardView,
+    ElectionTurnoutView,
+    ElectionLiveUpdatesView,
+    MetricsView,
     PositionStatsView,
     ElectionResultsView,
     CandidatesForPositionView,
@@ -24,10 +34,8 @@ from .views import (
 )
 
 router = DefaultRouter()
-router.register(r"elections", ElectionViewSet, basename="election")
 router.register(r"students", StudentViewSet, basename="student")
 router.register(r"positions", PositionViewSet, basename="position")
-router.register(r"candidates", CandidateViewSet, basename="candidate")
 router.register(r"users", UserViewSet, basename="user")
 
 
@@ -45,21 +53,26 @@ def healthz(request):
 urlpatterns = [
     path("health/", healthcheck),
     path("healthz/", healthz),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     # Voter authentication
     path("voter/login/", StudentVoterLoginView.as_view(), name="voter-login"),
 
 
     # Voting endpoint
     path("vote/", MultiVoteView.as_view(), name="multi-vote"),
+    path("votes/intake/status/", VoteIntakeStatusView.as_view(), name="vote-intake-status"),
 
     # Student activation (for activators/staff)
     path("students/activate/", StudentActivationView.as_view(), name="student-activate"),
+    path("students/activate/bulk/", StudentBulkActivationView.as_view(), name="student-bulk-activate"),
+    path("elections/<int:election_id>/students/search/", StudentSearchView.as_view(), name="student-search"),
 
     # Auth / user info
     path("auth/me/", MeView.as_view(), name="me"),
 
     # Bulk operations
     path("students/bulk-upload/", BulkStudentUploadView.as_view(), name="student-bulk-upload"),
+    path("students/import-jobs/<int:pk>/", RosterImportJobView.as_view(), name="roster-import-job"),
 
     # Create endpoints
     path("positions/create/", PositionCreateView.as_view(), name="position-create"),
@@ -68,11 +81,17 @@ urlpatterns = [
     path("candidates/<int:pk>/", CandidateCreateView.as_view()),  # PUT, DELETE
     path("elections/create/", ElectionCreateView.as_view(), name="election-create"),
 
+    # Ballot for the voting page
+    path("elections/<int:election_id>/ballot/", ElectionBallotView.as_view(), name="election-ballot"),
+
     # Election management
     path("elections/manage/", ElectionManageView.as_view(), name="election-manage"),
 
     # Stats & results endpoints
     path("elections/<int:election_id>/stats/", ElectionStatsView.as_view(), name="election-stats"),
+    path("elections/<int:election_id>/dashboard/", ElectionDashboardView.as_view(), name="election-dashboard"),
+    path("elections/<int:election_id>/turnout/", ElectionTurnoutView.as_view(), name="election-turnout"),
+    path("elections/<int:election_id>/live/", ElectionLiveUpdatesView.as_view(), name="election-live"),
     path("votes/position-stats/", PositionStatsView.as_view(), name="position-stats"),
     path("elections/<int:election_id>/results/", ElectionResultsView.as_view(), name="election-results"),
     path('candidates-for-position/', CandidatesForPositionView.as_view(), name='candidates-for-position'),
@@ -80,6 +99,12 @@ urlpatterns = [
     # Image upload
     path("upload/image/", ImageUploadView.as_view(), name="image-upload"),
 
-    # Public read-only viewsets (must come last)
+    # Public reads (async views)
+    path("elections/", ElectionListView.as_view(), name="election-list"),
+    path("elections/<int:pk>/", ElectionListView.as_view(), name="election-detail"),
+    path("positions/", PositionListView.as_view(), name="position-list"),
+    path("candidates/", CandidateListView.as_view(), name="candidate-list"),
+
+    # Remaining viewsets (must come last)
     path("", include(router.urls)),
 ]
@@ -1,33 +1,58 @@
-from io import BytesIO
+from collections import Counter
+import ipaddress
 import logging
 import sys
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import Q
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
 from django.utils import timezone
-from openpyxl import load_workbook
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework import viewsets, status
-from rest_framework.exceptions import ParseError
+from rest_framework.exceptions import NotFound, ParseError
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import AllowAny
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from .authentication import VoterAuthentication
-from .models import Election, Position, Candidate, Vote, Student
+from .ballot import aget_ballot, invalidate_ballot_structure, invalidate_candidate_ballots
+from .intake import accept_ballot, journal_status
+from .live import stream as live_stream
+from .metrics import registry as metrics_registry
+from .models import Election, Position, Candidate, RosterImportJob, Student
+from .pagination import StudentCursorPagination
 from .permissions import IsStaffOrSuperUser, IsActivatorOrSuperUser, IsStaffOrSuperUserOrReadOnlyActivator, IsSuperUser
+from .roster import ImportResult, RosterError, apply_roster_diff, create_import_job, diff_roster, import_roster, read_roster
+from .search import roster_changed, search_students
 from .serializers import (
     StudentSerializer,
     BulkStudentUploadSerializer,
+    BulkActivationSerializer,
     ElectionSerializer,
     PositionSerializer,
     CandidateSerializer,
     MultiVoteSerializer,
+    RosterImportJobSerializer,
     UserSerializer,
 )
+from .snapshots import asnapshot_response, snapshot_response
+from .tallies import bump_results_version, candidate_vote_counts, election_summary
+from .turnout import adjust_turnout, aturnout_breakdown, student_changed, student_state, turnout_breakdown
 from .utils import generate_voter_hmac
+from .voting import VoteRejected, commit_ballot
 
 User = get_user_model()
 
@@ -44,21 +69,52 @@ class UserViewSet(viewsets.ModelViewSet):
         return User.objects.all().order_by('-date_joined')
 
 
-class ElectionViewSet(viewsets.ReadOnlyModelViewSet):
+async def _authenticate(request, permission):
     """
-    Public read-only access to elections.
+    JWT-authenticate a plain async view's request and check the user's role
+    against a HasRole permission. Returns the 401/403 response, or None.
+    """
+    authentication = JWTAuthentication()
+    try:
+        authenticated = await sync_to_async(authentication.authenticate)(request)
+    except AuthenticationFailed as e:
+        detail = e.detail if isinstance(e.detail, dict) else {"detail": str(e.detail)}
+    else:
+        detail = None if authenticated else {"detail": "Authentication credentials were not provided."}
+    if detail is not None:
+        response = JsonResponse(detail, status=status.HTTP_401_UNAUTHORIZED)
+        response["WWW-Authenticate"] = authentication.authenticate_header(request)
+        return response
+    if getattr(authenticated[0], "role", None) not in permission.allowed_roles:
+        return JsonResponse(
+            {"detail": "You do not have permission to perform this action."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    request.user = authenticated[0]
+    return None
+
+
+class ElectionListView(View):
+    """
+    Public read-only access to elections: the list (optionally filtered by
+    `?is_active=`) and one election by id.
     Voters need to see active elections without JWT auth.
     """
-    queryset = Election.objects.all()
-    serializer_class = ElectionSerializer
-    permission_classes = [AllowAny]
 
-    def get_queryset(self):
-        # Optional: allow filtering by is_active
-        is_active = self.request.query_params.get('is_active')
+    async def get(self, request, pk=None):
+        if pk is not None:
+            election = await Election.objects.filter(pk=pk).afirst()
+            if election is None:
+                return JsonResponse(
+                    {"detail": "No Election matches the given query."}, status=status.HTTP_404_NOT_FOUND
+                )
+            return JsonResponse(ElectionSerializer(election).data)
+
+        elections = Election.objects.all()
+        is_active = request.GET.get("is_active")
         if is_active is not None:
-            return Election.objects.filter(is_active=is_active.lower() == 'true')
-        return Election.objects.all()
+            elections = elections.filter(is_active=is_active.lower() == "true")
+        return JsonResponse(ElectionSerializer([e async for e in elections], many=True).data, safe=False)
 
 
 class StudentViewSet(viewsets.ModelViewSet):
@@ -66,16 +122,57 @@ class StudentViewSet(viewsets.ModelViewSet):
     Staff or superuser can manage students (CRUD).
     Activator is intentionally excluded from create/update/delete and instead
     uses StudentActivationView to only toggle activation.
+
+    Listing accepts `election_id`, `class_name`, `has_voted`, `is_active`,
+    `search` (student_id or full_name prefix) and `ordering` (student_id,
+    full_name or class_name, optionally prefixed with "-"). Passing `cursor`
+    or `page_size` switches to keyset pagination; without them the full
+    list is returned as before.
     """
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     permission_classes = [IsStaffOrSuperUserOrReadOnlyActivator]
+    pagination_class = StudentCursorPagination
+
+    ordering_fields = ("student_id", "full_name", "class_name")
+    default_ordering = "student_id"
 
     def get_queryset(self):
-        election_id = self.request.query_params.get("election_id")
+        params = self.request.query_params
+        queryset = Student.objects.all()
+
+        election_id = params.get("election_id")
         if election_id:
-            return Student.objects.filter(election_id=election_id)
-        return Student.objects.all()
+            queryset = queryset.filter(election_id=election_id)
+
+        class_name = params.get("class_name")
+        if class_name:
+            queryset = queryset.filter(class_name=class_name)
+
+        for flag in ("has_voted", "is_active"):
+            value = params.get(flag)
+            if value is not None:
+                queryset = queryset.filter(**{flag: value.lower() in ("true", "1")})
+
+        search = params.get("search", "").strip()
+        if search:
+            queryset = queryset.filter(
+                Q(student_id__startswith=search) | Q(full_name__istartswith=search)
+            )
+
+        return queryset.order_by(*self.get_ordering())
+
+    def get_ordering(self):
+        ordering = self.request.query_params.get("ordering", self.default_ordering)
+        if ordering.lstrip("-") not in self.ordering_fields:
+            raise ParseError(f"ordering must be one of: {', '.join(self.ordering_fields)}.")
+        return (ordering, "-id" if ordering.startswith("-") else "id")
+
+    def paginate_queryset(self, queryset):
+        params = self.request.query_params
+        if "cursor" not in params and "page_size" not in params:
+            return None
+        return super().paginate_queryset(queryset)
 
     def perform_create(self, serializer):
         """Ensure election is set when creating a student."""
@@ -88,7 +185,17 @@ class StudentViewSet(viewsets.ModelViewSet):
         except Election.DoesNotExist:
             raise ParseError("Invalid election_id provided.")
         
-        serializer.save(election=election)
+        student = serializer.save(election=election)
+        student_changed(None, student_state(student))
+        roster_changed(election.id)
+
+    def perform_update(self, serializer):
+        before = student_state(serializer.instance)
+        student = serializer.save()
+        student_changed(before, student_state(student))
+        roster_changed(student.election_id)
+        # Candidate names are part of the ballot payload.
+        invalidate_candidate_ballots([student.pk])
 
     def destroy(self, request, *args, **kwargs):
         student = self.get_object()
@@ -99,11 +206,23 @@ class StudentViewSet(viewsets.ModelViewSet):
             )
         return super().destroy(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        election_id = instance.election_id
+        before = student_state(instance)
+        invalidate_candidate_ballots([instance.pk])  # deleting cascades to their candidacy
+        instance.delete()
+        student_changed(before, None)
+        roster_changed(election_id)
+
 
 class BulkStudentUploadView(APIView):
     """
-    Allow staff/superuser to upload an Excel file to create students in bulk.
+    Allow staff/superuser to upload an Excel or CSV/TSV file to create students in bulk.
     Expected columns (case-insensitive): student_id, full_name, class_name.
+    Rows are streamed and imported in chunks (see core.roster). Uploads over
+    settings.ROSTER_IMPORT_BACKGROUND_THRESHOLD bytes, or sent with
+    `background=true`, are imported by a background job instead (202).
+    With `mode=sync` the roster is replaced instead of appended to.
     """
 
     permission_classes = [IsStaffOrSuperUser]
@@ -129,92 +248,108 @@ class BulkStudentUploadView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            wb = load_workbook(filename=BytesIO(upload.read()), read_only=True)
-            ws = wb.active
-        except Exception:
-            return Response(
-                {"detail": "Could not read Excel file."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        if serializer.validated_data["mode"] == "sync":
+            return self.sync(election, upload, serializer.validated_data["preview"])
 
-        # Map headers to indices
-        header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), [])
-        header_map = {str(h or "").strip().lower(): idx for idx, h in enumerate(header_row)}
-        required = ["student_id", "full_name", "class_name"]
-        missing = [h for h in required if h not in header_map]
-        if missing:
+        threshold = getattr(settings, "ROSTER_IMPORT_BACKGROUND_THRESHOLD", 512 * 1024)
+        if serializer.validated_data["background"] or upload.size > threshold:
+            job = create_import_job(election, upload, request.user)
             return Response(
-                {"detail": f"Missing columns: {', '.join(missing)}"},
-                status=status.HTTP_400_BAD_REQUEST,
+                {
+                    "detail": "Import queued.",
+                    "job_id": job.pk,
+                    "status_url": f"/api/students/import-jobs/{job.pk}/",
+                    "election": election.name,
+                },
+                status=status.HTTP_202_ACCEPTED,
             )
 
-        rows_to_create = []
-        file_ids = set()
-
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            # Force everything to string right away (handles int/float/None nicely)
-            get_str = lambda idx: str(row[idx]).strip() if row[idx] is not None else ""
+        progress = ImportResult()
 
-            student_id = get_str(header_map["student_id"])
-            full_name = get_str(header_map["full_name"])
-            class_name = get_str(header_map["class_name"])
+        def on_chunk(result):
+            nonlocal progress
+            progress = result
 
-            if not student_id or not full_name or not class_name:
-                continue  # skip incomplete rows
-
-            if student_id in file_ids:
-                continue  # skip duplicates in the same file
-            file_ids.add(student_id)
-
-            rows_to_create.append(
-                Student(
-                    student_id=student_id,
-                    full_name=full_name,
-                    class_name=class_name,
-                    election=election,
-                )
+        try:
+            result = import_roster(election, read_roster(upload, upload.name), on_chunk=on_chunk)
+        except Exception as e:
+            # Chunks committed before the failure (a bad row or an undecodable
+            # line deep in the file) are kept.
+            if progress.created:
+                roster_changed(election.id)
+            detail = str(e) if isinstance(e, RosterError) else f"Bulk import failed: {str(e)}"
+            return Response(
+                {"detail": detail, "created": progress.created, "rows_processed": progress.rows_processed},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if not rows_to_create:
+        if result.created:
+            roster_changed(election.id)
+        elif not result.valid_rows:
             return Response(
                 {"detail": "No valid rows found to import."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-
-        existing_ids = set(
-            Student.objects.filter(
-                student_id__in=[s.student_id for s in rows_to_create],
-                election_id=election_id  # Only check within this election
-            )
-            .values_list("student_id", flat=True)
-        )
-
-        rows_to_create = [s for s in rows_to_create if s.student_id not in existing_ids]
-
-        if not rows_to_create:
+        else:
             return Response(
                 {"detail": "All provided students already exist."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        return Response(
+            {
+                "detail": "Students imported successfully.",
+                "created": result.created,
+                "skipped_existing": result.skipped_existing,
+                "skipped_duplicate": result.skipped_duplicate,
+                "skipped_invalid": result.skipped_invalid,
+                "errors": result.errors,
+                "chunks": result.chunks,
+                "election": election.name,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+    def sync(self, election, upload, preview):
+        """
+        Make the election's roster match the upload (see core.roster). With
+        `preview=true` only the adds/updates/removals are reported.
+        """
         try:
-            Student.objects.bulk_create(rows_to_create, ignore_conflicts=True)
-            return Response(
-                {
-                    "detail": "Students imported successfully.",
-                    "created": len(rows_to_create),
-                    "skipped_existing": len(existing_ids),
-                    "election": election.name,
-                },
-                status=status.HTTP_201_CREATED,
-            )
-        except Exception as e:
+            diff = diff_roster(election, read_roster(upload, upload.name))
+        except RosterError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not (diff.adds or diff.updates or diff.unchanged):
             return Response(
-                {"detail": f"Bulk import failed: {str(e)}"},
+                {"detail": "No valid rows found to import."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        summary = diff.summary()
+        if preview:
+            return Response({"detail": "Sync preview.", "preview": True, **summary, "election": election.name})
+
+        removed = apply_roster_diff(election, diff)
+        if diff.updates:
+            # Candidate names on the ballot may have changed.
+            invalidate_ballot_structure(election.id)
+        if diff.adds or diff.updates or removed:
+            roster_changed(election.id)
+        return Response(
+            {"detail": "Roster synced.", "preview": False, **summary, "removals": removed, "election": election.name}
+        )
+
+
+class RosterImportJobView(APIView):
+    """Progress and row-level errors of a background roster import."""
+    permission_classes = [IsStaffOrSuperUser]
+
+    def get(self, request, pk):
+        job = get_object_or_404(RosterImportJob, pk=pk)
+        return Response(RosterImportJobSerializer(job).data)
+
 
 class PositionViewSet(viewsets.ModelViewSet):
     """
@@ -234,6 +369,40 @@ class PositionViewSet(viewsets.ModelViewSet):
             return Position.objects.filter(election_id=election_id)
         return Position.objects.all()
 
+    def perform_create(self, serializer):
+        position = serializer.save()
+        invalidate_ballot_structure(position.election_id)
+
+    def perform_update(self, serializer):
+        previous_election_id = serializer.instance.election_id
+        position = serializer.save()
+        invalidate_ballot_structure(previous_election_id)
+        invalidate_ballot_structure(position.election_id)
+
+    def perform_destroy(self, instance):
+        election_id = instance.election_id
+        instance.delete()
+        invalidate_ballot_structure(election_id)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class PositionListView(View):
+    """
+    Public list of positions (`?election_id=` to filter). POST creates a
+    position through PositionViewSet (staff/superuser only).
+    """
+    create = staticmethod(PositionViewSet.as_view({"post": "create"}))
+
+    async def get(self, request):
+        positions = Position.objects.all()
+        election_id = request.GET.get("election_id")
+        if election_id:
+            positions = positions.filter(election_id=election_id)
+        return JsonResponse(PositionSerializer([p async for p in positions], many=True).data, safe=False)
+
+    async def post(self, request):
+        return await sync_to_async(self.create)(request)
+
 
 class PositionCreateView(APIView):
     """
@@ -245,10 +414,12 @@ class PositionCreateView(APIView):
         serializer = PositionSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         position = serializer.save()
+        invalidate_ballot_structure(position.election_id)
         return Response(PositionSerializer(position).data, status=status.HTTP_201_CREATED)
 
     def put(self, request, pk):
         position = get_object_or_404(Position, pk=pk)
+        previous_election_id = position.election_id
         serializer = PositionSerializer(
             position,
             data=request.data,
@@ -256,6 +427,8 @@ class PositionCreateView(APIView):
         )
         serializer.is_valid(raise_exception=True)
         position = serializer.save()
+        invalidate_ballot_structure(previous_election_id)
+        invalidate_ballot_structure(position.election_id)
         return Response(
             PositionSerializer(position).data,
             status=status.HTTP_200_OK
@@ -267,25 +440,52 @@ class PositionCreateView(APIView):
     def delete(self, request, pk):
         position = get_object_or_404(Position, pk=pk)
         position.delete()
+        invalidate_ballot_structure(position.election_id)
         return Response(
             {"detail": "Position deleted successfully"},
             status=status.HTTP_204_NO_CONTENT
         )
 
 
-class CandidateViewSet(viewsets.ReadOnlyModelViewSet):
+class CandidateListView(View):
     """
     Public, read-only list of candidates for a given position.
     Expects `?position_id=` as a query parameter.
     """
-    serializer_class = CandidateSerializer
-    permission_classes = [AllowAny]
 
-    def get_queryset(self):
-        position_id = self.request.query_params.get("position_id")
+    async def get(self, request):
+        position_id = request.GET.get("position_id")
+        candidates = []
         if position_id:
-            return Candidate.objects.filter(position_id=position_id).order_by('ballot_number')
-        return Candidate.objects.none()
+            candidates = [
+                candidate
+                async for candidate in Candidate.objects.filter(position_id=position_id)
+                .select_related('student')
+                .order_by('ballot_number')
+            ]
+        return JsonResponse(CandidateSerializer(candidates, many=True).data, safe=False)
+
+
+class ElectionBallotView(View):
+    """
+    Public ballot of an election: every position in display order with its
+    candidates. Served from the per-process ballot cache (see core.ballot)
+    with an ETag, so unchanged ballots are answered with 304.
+    """
+
+    async def get(self, request, election_id):
+        ballot = await aget_ballot(election_id)
+        if ballot is None:
+            return JsonResponse({"detail": "Election not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        etag, payload = ballot
+        headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            for header, value in headers.items():
+                not_modified[header] = value
+            return not_modified
+        return JsonResponse(payload, headers=headers)
 
 
 class CandidateCreateView(APIView):
@@ -299,11 +499,13 @@ class CandidateCreateView(APIView):
         serializer = CandidateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         candidate = serializer.save()
+        invalidate_ballot_structure(candidate.position.election_id)
         return Response(CandidateSerializer(candidate).data, status=status.HTTP_201_CREATED)
 
     # EDIT
     def put(self, request, pk):
         candidate = get_object_or_404(Candidate, pk=pk)
+        previous_election_id = candidate.position.election_id
         serializer = CandidateSerializer(
             candidate,
             data=request.data,
@@ -311,6 +513,8 @@ class CandidateCreateView(APIView):
         )
         serializer.is_valid(raise_exception=True)
         candidate = serializer.save()
+        invalidate_ballot_structure(previous_election_id)
+        invalidate_ballot_structure(candidate.position.election_id)
         return Response(
             CandidateSerializer(candidate).data,
             status=status.HTTP_200_OK
@@ -322,7 +526,9 @@ class CandidateCreateView(APIView):
     # DELETE
     def delete(self, request, pk):
         candidate = get_object_or_404(Candidate, pk=pk)
+        election_id = candidate.position.election_id
         candidate.delete()
+        invalidate_ballot_structure(election_id)
         return Response(
             {"detail": "Candidate deleted successfully"},
             status=status.HTTP_204_NO_CONTENT
@@ -349,7 +555,6 @@ class ElectionManageView(APIView):
         Accepts JSON: { "election_id": 1, "is_active": true }
         Multiple elections can be active simultaneously.
         """
-        print("Inside post")
         election_id = request.data.get("election_id")
         is_active = request.data.get("is_active")
         
@@ -381,12 +586,13 @@ class ElectionManageView(APIView):
             # Students are scoped by election_id, so no vote mixing occurs
             election.is_active = bool(is_active)
             election.save(update_fields=["is_active"])
+            invalidate_ballot_structure(election.pk)
             
             # Log election status change
             action = "STARTED" if bool(is_active) else "STOPPED"
             self.security_logger.info(
-                f"ELECTION_{action}: election_id={election_id}, election_name={election.name}, "
-                f"user={user.username if user else 'unknown'}, ip={client_ip}"
+                "ELECTION_%s: election_id=%s, election_name=%s, user=%s, ip=%s",
+                action, election_id, election.name, user.username if user else 'unknown', client_ip,
             )
 
         return Response(
@@ -398,7 +604,8 @@ class ElectionManageView(APIView):
 class MultiVoteView(APIView):
     """
     Students authenticate via headers using `VoterAuthentication`.
-    View enforces activation, single-vote, and transactional locking.
+    View enforces activation and single-vote; the commit itself is done by
+    the strategy selected with settings.VOTE_COMMIT_STRATEGY (see core.voting).
     """
     authentication_classes = [VoterAuthentication]
     permission_classes = [IsAuthenticated]
@@ -435,131 +642,22 @@ class MultiVoteView(APIView):
         
         # Log vote attempt
         self.security_logger.info(
-            f"VOTE_ATTEMPT: student_id={student_user.student_id if student_user else 'unknown'}, "
-            f"ip={client_ip}, election_ids={[v['election'] for v in data['votes']]}"
+            "VOTE_ATTEMPT: student_id=%s, ip=%s, election_ids=%s",
+            student_user.student_id if student_user else 'unknown', client_ip,
+            [v['election'] for v in data['votes']],
         )
 
         try:
-            with transaction.atomic():
-                # Lock fresh student row to avoid races
-                student = Student.objects.select_for_update().get(
-                    pk=student_user.pk
+            if getattr(settings, "VOTE_INTAKE_MODE", "direct") == "journal":
+                receipt, votes = accept_ballot(student_user.pk, token, data["votes"])
+            else:
+                receipt, votes = None, commit_ballot(student_user.pk, token, data["votes"])
+        except VoteRejected as e:
+            if e.log_event:
+                self.security_logger.warning(
+                    "%s: student_id=%s, ip=%s", e.log_event, student_user.student_id, client_ip
                 )
-
-                now = timezone.now()
-
-                if not getattr(student, "is_active", False):
-                    self.security_logger.warning(
-                        f"VOTE_DENIED_INACTIVE: student_id={student.student_id}, ip={client_ip}"
-                    )
-                    return Response(
-                        {"detail": "Student is not activated to vote."},
-                        status=status.HTTP_403_FORBIDDEN,
-                    )
-
-                if getattr(student, "has_voted", False):
-                    self.security_logger.warning(
-                        f"VOTE_DENIED_ALREADY_VOTED: student_id={student.student_id}, ip={client_ip}"
-                    )
-                    return Response(
-                        {"detail": "Student has already voted."},
-                        status=status.HTTP_403_FORBIDDEN,
-                    )
-
-                votes_to_create = []
-                election_cache = {}
-                position_cache = {}
-                candidate_cache = {}
-                for vote_data in data["votes"]:
-                    election_id = vote_data["election"]
-                    position_id = vote_data["position"]
-                    candidate_id = vote_data["candidate"]
-
-                    # Load and validate election (must be active and within window)
-                    election = election_cache.get(election_id)
-                    if election is None:
-                        election = (
-                            Election.objects.filter(pk=election_id, is_active=True)
-                            .select_for_update()
-                            .first()
-                        )
-                        election_cache[election_id] = election
-                    if election is None:
-                        return Response(
-                            {"detail": "Election is not active or does not exist."},
-                            status=status.HTTP_403_FORBIDDEN,
-                        )
-                    if election.start_time > now or election.end_time < now:
-                        return Response(
-                            {"detail": "Election is not within the voting window."},
-                            status=status.HTTP_403_FORBIDDEN,
-                        )
-
-                    # Validate position belongs to election
-                    position = position_cache.get(position_id)
-                    if position is None:
-                        position = (
-                            Position.objects.filter(
-                                pk=position_id, election_id=election.pk
-                            )
-                            .select_for_update()
-                            .first()
-                        )
-                        position_cache[position_id] = position
-                    if position is None:
-                        return Response(
-                            {"detail": "Position does not belong to election."},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    # Validate candidate belongs to position
-                    candidate = candidate_cache.get(candidate_id)
-                    if candidate is None:
-                        candidate = (
-                            Candidate.objects.filter(
-                                pk=candidate_id, position_id=position.pk
-                            )
-                            .select_for_update()
-                            .first()
-                        )
-                        candidate_cache[candidate_id] = candidate
-                    if candidate is None:
-                        return Response(
-                            {"detail": "Candidate does not belong to position."},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    # Ensure no existing vote for that position by this voter token
-                    if Vote.objects.filter(
-                            voter_hash=token, position_id=position_id
-                    ).exists():
-                        return Response(
-                            {"detail": "Duplicate vote detected for a position."},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    votes_to_create.append(
-                        Vote(
-                            voter_hash=token,
-                            election_id=election_id,
-                            position_id=position_id,
-                            candidate_id=candidate_id,
-                        )
-                    )
-
-                Vote.objects.bulk_create(votes_to_create)
-
-                # Mark student as voted and deactivate
-                student.has_voted = True
-                student.is_active = False
-                student.save(update_fields=["has_voted", "is_active"])
-                
-                # Log successful vote
-                self.security_logger.info(
-                    f"VOTE_SUCCESS: student_id={student.student_id}, ip={client_ip}, "
-                    f"votes_count={len(votes_to_create)}, election_ids={[v.election_id for v in votes_to_create]}"
-                )
-
+            return Response({"detail": e.detail}, status=e.status_code)
         except Student.DoesNotExist:
             return Response(
                 {"detail": "Student not found."},
@@ -571,11 +669,25 @@ class MultiVoteView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        return Response(
-            {"detail": "All votes submitted successfully."},
-            status=status.HTTP_201_CREATED,
+        # Log successful vote
+        self.security_logger.info(
+            "VOTE_SUCCESS: student_id=%s, ip=%s, votes_count=%s, election_ids=%s",
+            student_user.student_id, client_ip, len(votes), [v.election_id for v in votes],
         )
 
+        response_data = {"detail": "All votes submitted successfully."}
+        if receipt:
+            response_data["receipt"] = receipt
+        return Response(response_data, status=status.HTTP_201_CREATED)
+
+
+class VoteIntakeStatusView(APIView):
+    """Report the ballot journal writer's lag (see core.intake)."""
+    permission_classes = [IsStaffOrSuperUser]
+
+    def get(self, request):
+        return Response(journal_status())
+
 
 class MeView(APIView):
     permission_classes = [IsAuthenticated]
@@ -612,9 +724,6 @@ class StudentActivationView(APIView):
             return self._actual_post(request)
     
     def _actual_post(self, request):
-        print("INSIDE ACTIVATION VIEW - POST CALLED")  # ← add this
-        print(request.path, request.method)
-        
         # Get client IP and user for logging
         client_ip = request.META.get('REMOTE_ADDR')
         user = request.user
@@ -624,8 +733,8 @@ class StudentActivationView(APIView):
         
         # Log activation attempt
         self.security_logger.info(
-            f"ACTIVATION_ATTEMPT: student_id={student_id}, election_id={election_id}, "
-            f"user={user.username if user else 'unknown'}, ip={client_ip}"
+            "ACTIVATION_ATTEMPT: student_id=%s, election_id=%s, user=%s, ip=%s",
+            student_id, election_id, user.username if user else 'unknown', client_ip,
         )
         
         if not student_id:
@@ -667,42 +776,163 @@ class StudentActivationView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        # Check if student has already voted (cannot be activated if voted)
+        new_status = bool(is_active)
+        unchanged = self._unchanged_response(student, new_status, user, client_ip)
+        if unchanged is not None:
+            return unchanged
+
+        # Only toggle the is_active flag, and only if the row still is as read:
+        # a concurrent toggle or vote must not be counted twice.
+        with transaction.atomic():
+            changed = Student.objects.filter(
+                pk=student.pk, is_active=student.is_active, has_voted=False
+            ).update(is_active=new_status)
+            if changed:
+                adjust_turnout(election.id, student.class_name, activated=1 if new_status else -1)
+                bump_results_version(election.id)  # the dashboard shows activations
+        if not changed:
+            student.refresh_from_db(fields=["is_active", "has_voted"])
+            return self._unchanged_response(student, new_status, user, client_ip)
+
+        # Log successful activation/deactivation
+        action = "ACTIVATED" if new_status else "DEACTIVATED"
+        self.security_logger.info(
+            "STUDENT_%s: student_id=%s, election_id=%s, user=%s, ip=%s",
+            action, student_id, election_id, user.username if user else 'unknown', client_ip,
+        )
+
+        status_text = "activated" if new_status else "deactivated"
+        return Response(
+            {"detail": f"Student {status_text} successfully."},
+            status=status.HTTP_200_OK,
+        )
+
+    def _unchanged_response(self, student, new_status, user, client_ip):
+        """The response for a student who has voted or already has `new_status`, else None."""
         if student.has_voted:
+            # Cannot be activated if voted
             self.security_logger.warning(
-                f"ACTIVATION_DENIED_VOTED: student_id={student_id}, election_id={election_id}, "
-                f"user={user.username if user else 'unknown'}, ip={client_ip}"
+                "ACTIVATION_DENIED_VOTED: student_id=%s, election_id=%s, user=%s, ip=%s",
+                student.student_id, student.election_id, user.username if user else 'unknown', client_ip,
             )
             return Response(
                 {"detail": "Student has already voted and cannot be re-activated."},
                 status=status.HTTP_403_FORBIDDEN,
             )
-
-        # Check current status for better message
-        current_status = student.is_active
-        new_status = bool(is_active)
-
-        if current_status == new_status:
-            status_text = "active" if current_status else "inactive"
+        if student.is_active == new_status:
+            status_text = "active" if new_status else "inactive"
             return Response(
                 {"detail": f"Student is already {status_text}."},
                 status=status.HTTP_200_OK,
             )
+        return None
 
-        # Only toggle the is_active flag
-        student.is_active = new_status
-        student.save(update_fields=["is_active"])
-        
-        # Log successful activation/deactivation
-        action = "ACTIVATED" if new_status else "DEACTIVATED"
+
+class StudentSearchView(APIView):
+    """
+    Autocomplete for the activation desk: top matches of `?q=` by student ID
+    prefix or name within an election (see core.search). `?limit=` caps the
+    results (default 10, max 50); `?eligible=true` keeps only students who
+    can still be activated (not active, not voted), before the cap.
+    """
+    permission_classes = [IsStaffOrSuperUserOrReadOnlyActivator]
+
+    def get(self, request, election_id):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except ValueError:
+            raise ParseError("limit must be an integer.")
+        query = request.query_params.get("q", "")
+        eligible = request.query_params.get("eligible", "").lower() in ("true", "1")
+        return Response({"query": query, "results": search_students(election_id, query, limit, eligible)})
+
+
+class StudentBulkActivationView(APIView):
+    """
+    Activate (or deactivate) a whole class or a list of students at once.
+    Accepts JSON: { "election_id": 1, "class_name": "A1" } or
+    { "election_id": 1, "student_ids": ["S1", "S2"], "is_active": true }.
+    Students who already voted are never changed. Returns per-ID outcomes.
+    """
+    permission_classes = [IsActivatorOrSuperUser]
+
+    security_logger = logging.getLogger('security')
+
+    def post(self, request):
+        if getattr(settings, 'RATE_LIMITING_ENABLED', False):
+            from django_ratelimit.decorators import ratelimit
+            from django.utils.decorators import method_decorator
+
+            @method_decorator(ratelimit(key='ip', rate='11/m', method='POST'))
+            def rate_limited_post(self, request):
+                return self._actual_post(request)
+            return rate_limited_post(self, request)
+        return self._actual_post(request)
+
+    def _actual_post(self, request):
+        serializer = BulkActivationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        election_id = data["election_id"]
+        new_status = data["is_active"]
+
+        if not Election.objects.filter(pk=election_id).exists():
+            return Response({"detail": "Election not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        students = Student.objects.filter(election_id=election_id)
+        if "class_name" in data:
+            students = students.filter(class_name=data["class_name"])
+        else:
+            students = students.filter(student_id__in=set(data["student_ids"]))
+
+        with transaction.atomic():
+            # Lock the targets so the reported outcomes match what was changed.
+            current = {
+                student_id: (is_active, has_voted, class_name)
+                for student_id, is_active, has_voted, class_name in students.select_for_update().values_list(
+                    "student_id", "is_active", "has_voted", "class_name"
+                )
+            }
+            changed = students.filter(has_voted=False).exclude(is_active=new_status).update(
+                is_active=new_status
+            )
+            per_class = Counter(
+                class_name for is_active, has_voted, class_name in current.values()
+                if not has_voted and is_active != new_status
+            )
+            for class_name, count in sorted(per_class.items()):
+                adjust_turnout(election_id, class_name, activated=count if new_status else -count)
+            if per_class:
+                bump_results_version(election_id)  # the dashboard shows activations
+
+        done = "activated" if new_status else "deactivated"
+        already = "already_active" if new_status else "already_inactive"
+        outcomes = {}
+        for student_id, (is_active, has_voted, _) in current.items():
+            if has_voted:
+                outcomes[student_id] = "already_voted"
+            else:
+                outcomes[student_id] = already if is_active == new_status else done
+        for student_id in data.get("student_ids", ()):
+            outcomes.setdefault(student_id, "not_found")
+
+        counts = dict(Counter(outcomes.values()))
+
+        user = request.user
+        target = f"class_name={data['class_name']}" if "class_name" in data else f"student_ids={len(data['student_ids'])}"
         self.security_logger.info(
-            f"STUDENT_{action}: student_id={student_id}, election_id={election_id}, "
-            f"user={user.username if user else 'unknown'}, ip={client_ip}"
+            "BULK_%s: election_id=%s, target=%s, changed=%s, outcomes=%s, user=%s, ip=%s",
+            done.upper(), election_id, target, changed, counts,
+            user.username if user else 'unknown', request.META.get('REMOTE_ADDR'),
         )
 
-        status_text = "activated" if new_status else "deactivated"
         return Response(
-            {"detail": f"Student {status_text} successfully."},
+            {
+                "detail": f"{changed} student(s) {done}.",
+                "changed": changed,
+                "counts": counts,
+                "outcomes": outcomes,
+            },
             status=status.HTTP_200_OK,
         )
 
@@ -750,9 +980,7 @@ class StudentVoterLoginView(APIView):
         client_ip = request.META.get('REMOTE_ADDR')
         
         # Log login attempt
-        self.security_logger.info(
-            f"LOGIN_ATTEMPT: student_id={student_id}, ip={client_ip}"
-        )
+        self.security_logger.info("LOGIN_ATTEMPT: student_id=%s, ip=%s", student_id, client_ip)
 
         if not student_id:
             return Response(
@@ -796,7 +1024,7 @@ class StudentVoterLoginView(APIView):
             if existing_student:
                 if existing_student.has_voted:
                     self.security_logger.warning(
-                        f"LOGIN_DENIED_VOTED: student_id={student_id}, ip={client_ip}"
+                        "LOGIN_DENIED_VOTED: student_id=%s, ip=%s", student_id, client_ip
                     )
                     return Response(
                         {"detail": "Student has already voted."},
@@ -804,15 +1032,13 @@ class StudentVoterLoginView(APIView):
                     )
                 else:
                     self.security_logger.warning(
-                        f"LOGIN_DENIED_INACTIVE: student_id={student_id}, ip={client_ip}"
+                        "LOGIN_DENIED_INACTIVE: student_id=%s, ip=%s", student_id, client_ip
                     )
                     return Response(
                         {"detail": "Student is not activated to vote."},
                         status=status.HTTP_403_FORBIDDEN,
                     )
-            self.security_logger.warning(
-                f"LOGIN_NOT_FOUND: student_id={student_id}, ip={client_ip}"
-            )
+            self.security_logger.warning("LOGIN_NOT_FOUND: student_id=%s, ip=%s", student_id, client_ip)
             return Response(
                 {"detail": "Student not found in any active election."},
                 status=status.HTTP_404_NOT_FOUND,
@@ -829,7 +1055,8 @@ class StudentVoterLoginView(APIView):
         
         # Log successful login
         self.security_logger.info(
-            f"LOGIN_SUCCESS: student_id={student.student_id}, election_id={active_election.id}, ip={client_ip}"
+            "LOGIN_SUCCESS: student_id=%s, election_id=%s, ip=%s",
+            student.student_id, active_election.id, client_ip,
         )
 
         return Response({
@@ -848,31 +1075,142 @@ class StudentVoterLoginView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class ElectionStatsView(APIView):
-    """Get basic election statistics"""
+class ElectionStatsView(View):
+    """Get basic election statistics (served from a versioned snapshot)"""
+
+    async def get(self, request, election_id):
+        denied = await _authenticate(request, IsStaffOrSuperUser)
+        if denied is not None:
+            return denied
+        return await asnapshot_response(request, "stats", election_id, lambda: self.build(election_id))
+
+    async def build(self, election_id):
+        election = await Election.objects.filter(pk=election_id).values("id", "name").afirst()
+        if election is None:
+            return None
+
+        totals, _ = await aturnout_breakdown(election_id)
+
+        return {
+            "election_id": election["id"],
+            "election_name": election["name"],
+            "total_voters": totals["total"],
+            "voters_voted": totals["voted"],
+            "turnout_percentage": totals["turnout_percentage"],
+        }
+
+
+class ElectionDashboardView(APIView):
+    """
+    Aggregates shown on the admin dashboard, read from the turnout counters
+    (served from a versioned snapshot).
+    """
     permission_classes = [IsStaffOrSuperUser]
 
     def get(self, request, election_id):
-        try:
-            election = Election.objects.get(pk=election_id)
-        except Election.DoesNotExist:
-            return Response(
-                {"detail": "Election not found."},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+        return snapshot_response(request, "dashboard", election_id, lambda: self.build(election_id))
+
+    def build(self, election_id):
+        election = Election.objects.filter(pk=election_id).values("id", "name").first()
+        if election is None:
+            raise NotFound("Election not found.")
+
+        totals, by_class = turnout_breakdown(election_id)
+        total_students = totals["total"]
+        active_students = totals["activated"]
+        voted_students = totals["voted"]
+        _, last_vote_at = election_summary(election_id)
+
+        return {
+            "election_id": election["id"],
+            "election_name": election["name"],
+            "total_students": total_students,
+            "active_students": active_students,
+            "voted_students": voted_students,
+            "pending_activations": total_students - active_students,
+            "turnout_percentage": totals["turnout_percentage"],
+            "total_positions": Position.objects.filter(election_id=election_id).count(),
+            "total_candidates": Candidate.objects.filter(position__election_id=election_id).count(),
+            "last_vote_at": last_vote_at,
+            "by_class": by_class,
+        }
+
+
+class ElectionTurnoutView(APIView):
+    """
+    Turnout of an election (total, activated, voted) with a per-class
+    breakdown, read from the turnout counters (see core.turnout).
+    """
+    permission_classes = [IsStaffOrSuperUserOrReadOnlyActivator]
 
-        total_voters = Student.objects.filter(election=election).count()
-        voters_voted = Student.objects.filter(election=election, has_voted=True).count()
+    def get(self, request, election_id):
+        election = Election.objects.filter(pk=election_id).values("id", "name").first()
+        if election is None:
+            raise NotFound("Election not found.")
 
+        totals, by_class = turnout_breakdown(election_id)
         return Response({
-            "election_id": election.id,
-            "election_name": election.name,
-            "total_voters": total_voters,
-            "voters_voted": voters_voted,
-            "turnout_percentage": round((voters_voted / total_voters * 100), 2) if total_voters > 0 else 0.0
+            "election_id": election["id"],
+            "election_name": election["name"],
+            **totals,
+            "by_class": by_class,
         })
 
 
+class ElectionLiveUpdatesView(View):
+    """
+    Server-Sent Events stream of an election's results and turnout: a
+    `snapshot` event, then a `delta` event with the changed fields whenever
+    a vote is committed or a student is activated (see core.live).
+
+    Only served under ASGI; a sync worker would be held for the whole
+    connection, so WSGI requests get 503 and clients keep polling.
+    """
+
+    async def get(self, request, election_id):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {"detail": "Live updates require the ASGI server."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        denied = await _authenticate(request, IsStaffOrSuperUser)
+        if denied is not None:
+            return denied
+        if not await Election.objects.filter(pk=election_id).aexists():
+            return JsonResponse({"detail": "Election not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        response = StreamingHttpResponse(live_stream(election_id), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint, summed across every worker (see core.metrics).
+    Needs `Authorization: Bearer <METRICS_TOKEN>`. Without a token it is
+    closed, except under DEBUG for loopback and private addresses: behind
+    a platform proxy every peer address is private.
+    """
+
+    def get(self, request):
+        token = getattr(settings, "METRICS_TOKEN", "")
+        if token:
+            allowed = constant_time_compare(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}")
+        elif settings.DEBUG:
+            try:
+                address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+                allowed = address.is_private or address.is_loopback
+            except ValueError:
+                allowed = False
+        else:
+            allowed = False
+        if not allowed:
+            return JsonResponse({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
+        return HttpResponse(metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 class PositionStatsView(APIView):
     """Get statistics for a specific position including skipped votes"""
     permission_classes = [IsStaffOrSuperUser]
@@ -896,10 +1234,10 @@ class PositionStatsView(APIView):
         election = position.election
 
         # Unique voters who cast any vote in this election
-        unique_voters = Vote.objects.filter(election=election).values('voter_hash').distinct().count()
+        unique_voters, _ = election_summary(election.id)
 
         # Votes actually cast for this position
-        position_votes = Vote.objects.filter(position=position).count()
+        position_votes = sum(candidate_vote_counts(position=position).values())
 
         skipped = max(0, unique_voters - position_votes)
 
@@ -915,37 +1253,42 @@ class PositionStatsView(APIView):
 
 
 class ElectionResultsView(APIView):
-    """Get comprehensive results for an entire election"""
+    """Get comprehensive results for an entire election (served from a versioned snapshot)"""
     permission_classes = [IsStaffOrSuperUser]
 
     def get(self, request, election_id):
+        return snapshot_response(request, "results", election_id, lambda: self.build(election_id))
+
+    def build(self, election_id):
         try:
             election = Election.objects.get(pk=election_id)
         except Election.DoesNotExist:
-            return Response(
-                {"detail": "Election not found."},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+            raise NotFound("Election not found.")
 
         # All positions in display order
         positions = Position.objects.filter(election=election).order_by('display_order')
 
         # Total unique voters in this election (across all positions)
-        unique_voters = Vote.objects.filter(election=election).values('voter_hash').distinct().count()
+        unique_voters, _ = election_summary(election.id)
+        vote_counts = candidate_vote_counts(election=election)
+
+        candidates_by_position = {}
+        candidates = (
+            Candidate.objects.filter(position__election=election)
+            .select_related('student')
+            .order_by('ballot_number')
+        )
+        for candidate in candidates:
+            candidates_by_position.setdefault(candidate.position_id, []).append(candidate)
 
         results = []
 
         for position in positions:
-            candidates = Candidate.objects.filter(position=position).order_by('ballot_number')
-
             candidate_results = []
             total_valid_votes_this_position = 0
 
-            for candidate in candidates:
-                vote_count = Vote.objects.filter(
-                    candidate=candidate,
-                    position=position
-                ).count()
+            for candidate in candidates_by_position.get(position.id, []):
+                vote_count = vote_counts.get(candidate.id, 0)
 
                 candidate_results.append({
                     "id": candidate.id,
@@ -979,21 +1322,19 @@ class ElectionResultsView(APIView):
                 "candidates": candidate_results,
             })
 
-        # Overall election stats
-        total_students = Student.objects.filter(election=election).count()
-        students_who_voted = Student.objects.filter(election=election, has_voted=True).count()
+        # Overall election stats, from the turnout counters
+        turnout, _ = turnout_breakdown(election.id)
 
-        return Response({
+        return {
             "election_id": election.id,
             "election_name": election.name,
             "year": election.year,
-            "total_students": total_students,
-            "students_who_voted": students_who_voted,
-            "voter_turnout_percentage": round((students_who_voted / total_students * 100),
-                                              2) if total_students > 0 else 0.0,
+            "total_students": turnout["total"],
+            "students_who_voted": turnout["voted"],
+            "voter_turnout_percentage": turnout["turnout_percentage"],
             "unique_voters_who_cast_at_least_one_vote": unique_voters,
             "positions": results,
-        })
+        }
 
 
 class CandidatesForPositionView(APIView):
@@ -1001,7 +1342,6 @@ class CandidatesForPositionView(APIView):
 
     def get(self, request):
         position_id = request.query_params.get("position_id")
-        print(position_id)
 
         if not position_id:
             return Response(
@@ -1018,12 +1358,10 @@ class CandidatesForPositionView(APIView):
             )
 
         result = []
+        vote_counts = candidate_vote_counts(position_id=position_id)
 
         for candidate in candidates:
-            vote_count = Vote.objects.filter(
-                candidate_id=candidate.id,
-                position_id=position_id
-            ).count()
+            vote_count = vote_counts.get(candidate.id, 0)
 
             candidate_data = {
                 "candidate_id": candidate.id,
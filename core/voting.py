@@ -0,0 +1,178 @@
+"""
+Ballot commit strategies used by MultiVoteView.
+
+- "locking": SELECT ... FOR UPDATE on the student, one exists() check per
+  position, bulk insert, then save the student (3 + N round trips under lock).
+- "conditional": claim the voter with a single conditional UPDATE and let the
+  unique (voter_hash, position) constraint reject duplicates.
+
+The strategy is chosen with settings.VOTE_COMMIT_STRATEGY.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+
+from .ballot import get_ballot_structure
+from .metrics import VOTE_LOCK_WAIT, VOTE_TRANSACTION
+from .models import Student, Vote
+from .tallies import record_votes
+from .turnout import adjust_turnout, voter_claimed
+
+
+class VoteRejected(Exception):
+    """A ballot that must not be recorded; carries the API response to send."""
+
+    def __init__(self, detail, status_code=status.HTTP_400_BAD_REQUEST, log_event=None):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.log_event = log_event
+
+
+def build_votes(token, votes_data, now=None):
+    """
+    Validate a ballot against the cached ballot structures and return the
+    unsaved Vote instances.
+    """
+    now = now or timezone.now()
+    votes = []
+    structures = {}
+    for vote_data in votes_data:
+        election_id = vote_data["election"]
+        position_id = vote_data["position"]
+        candidate_id = vote_data["candidate"]
+
+        structure = structures.get(election_id)
+        if structure is None:
+            structure = get_ballot_structure(election_id)
+            structures[election_id] = structure
+        if structure is None or not structure.is_active:
+            raise VoteRejected("Election is not active or does not exist.", status.HTTP_403_FORBIDDEN)
+        if not structure.is_open(now):
+            raise VoteRejected("Election is not within the voting window.", status.HTTP_403_FORBIDDEN)
+        if position_id not in structure.positions:
+            raise VoteRejected("Position does not belong to election.")
+        if not structure.candidate_in_position(candidate_id, position_id):
+            raise VoteRejected("Candidate does not belong to position.")
+
+        votes.append(
+            Vote(
+                voter_hash=token,
+                election_id=election_id,
+                position_id=position_id,
+                candidate_id=candidate_id,
+            )
+        )
+    return votes
+
+
+def _check_student(student):
+    if not student.is_active:
+        raise VoteRejected(
+            "Student is not activated to vote.", status.HTTP_403_FORBIDDEN, "VOTE_DENIED_INACTIVE"
+        )
+    if student.has_voted:
+        raise VoteRejected(
+            "Student has already voted.", status.HTTP_403_FORBIDDEN, "VOTE_DENIED_ALREADY_VOTED"
+        )
+
+
+def _check_election(election):
+    if not election.is_active:
+        raise VoteRejected("Election is not active or does not exist.", status.HTTP_403_FORBIDDEN)
+    if not election.start_time <= timezone.now() <= election.end_time:
+        raise VoteRejected("Election is not within the voting window.", status.HTTP_403_FORBIDDEN)
+
+
+def commit_locking(student_pk, token, votes_data):
+    """Original strategy: lock the student row and pre-check every position."""
+    with transaction.atomic():
+        with VOTE_LOCK_WAIT.time(step="voter"):
+            student = Student.objects.select_for_update(of=("self",)).select_related("election").get(pk=student_pk)
+        _check_student(student)
+        _check_election(student.election)
+
+        votes = build_votes(token, votes_data)
+        for vote in votes:
+            if Vote.objects.filter(voter_hash=token, position_id=vote.position_id).exists():
+                raise VoteRejected("Duplicate vote detected for a position.")
+
+        Vote.objects.bulk_create(votes)
+        with VOTE_LOCK_WAIT.time(step="tallies"):
+            record_votes(votes)
+
+        student.has_voted = True
+        student.is_active = False
+        student.save(update_fields=["has_voted", "is_active"])
+        adjust_turnout(student.election_id, student.class_name, activated=-1, voted=1)
+    return votes
+
+
+def claim_voter(student_pk):
+    """
+    Mark an activated student as voted with one conditional UPDATE.
+    Raises VoteRejected (or Student.DoesNotExist) when the claim fails.
+
+    The election must still be active and open: this worker's cached window
+    may predate a stop made in another one.
+    """
+    now = timezone.now()
+    with VOTE_LOCK_WAIT.time(step="voter"):
+        claimed = Student.objects.filter(
+            pk=student_pk,
+            is_active=True,
+            has_voted=False,
+            election__is_active=True,
+            election__start_time__lte=now,
+            election__end_time__gte=now,
+        ).update(has_voted=True, is_active=False)
+    if not claimed:
+        # Only read the row to explain why the claim failed.
+        student = Student.objects.select_related("election").get(pk=student_pk)
+        _check_student(student)
+        _check_election(student.election)
+        raise VoteRejected("Student could not be claimed for voting.", status.HTTP_409_CONFLICT)
+    voter_claimed(student_pk)
+
+
+def release_voter(student_pk):
+    """Undo a committed claim_voter() whose ballot could not be recorded."""
+    with transaction.atomic():
+        student = Student.objects.filter(pk=student_pk, has_voted=True)
+        row = student.values_list("election_id", "class_name").first()
+        if row is not None and student.update(has_voted=False, is_active=True):
+            adjust_turnout(*row, activated=1, voted=-1)
+
+
+def commit_conditional(student_pk, token, votes_data):
+    """Claim the voter with a conditional UPDATE, then insert the votes."""
+    with transaction.atomic():
+        claim_voter(student_pk)
+        votes = build_votes(token, votes_data)
+        try:
+            Vote.objects.bulk_create(votes)
+        except IntegrityError:
+            raise VoteRejected("Duplicate vote detected for a position.")
+        with VOTE_LOCK_WAIT.time(step="tallies"):
+            record_votes(votes)
+    return votes
+
+
+COMMIT_STRATEGIES = {
+    "locking": commit_locking,
+    "conditional": commit_conditional,
+}
+
+
+def commit_ballot(student_pk, token, votes_data, strategy=None):
+    """
+    Record a ballot with the configured strategy and return the created votes.
+    """
+    strategy = strategy or getattr(settings, "VOTE_COMMIT_STRATEGY", "conditional")
+    try:
+        commit = COMMIT_STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown vote commit strategy: {strategy!r}")
+    with VOTE_TRANSACTION.time(strategy=strategy):
+        return commit(student_pk, token, votes_data)
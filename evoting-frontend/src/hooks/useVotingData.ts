@@ -26,6 +26,10 @@ interface Candidate {
     ballot_number: number;
 }
 
+interface BallotPosition extends Position {
+    candidates: Candidate[];
+}
+
 interface VotingData {
     election: Election;
     positions: Position[];
@@ -52,46 +56,18 @@ const fetchVotingData = async (): Promise<VotingData> => {
         is_active: true
     };
 
-    // 2. Get positions for this election
-    const positionsRes = await api.get('/api/positions/', {
-        params: {election_id: activeElection.id}
-    });
-
-    let positions = positionsRes.data;
-    if (positions.results) {
-        positions = positions.results;
-    }
-
-    if (!Array.isArray(positions)) {
-        positions = [];
-    }
+    // 2. Get the whole ballot (positions in display order with their candidates) in one request
+    const ballotRes = await api.get(`/api/elections/${activeElection.id}/ballot/`);
+    const ballotPositions: BallotPosition[] = Array.isArray(ballotRes.data.positions)
+        ? ballotRes.data.positions
+        : [];
 
-    // Sort by display_order
-    positions.sort((a: Position, b: Position) => a.display_order - b.display_order);
-
-    // 3. Get candidates for each position
+    const positions: Position[] = [];
     const candidatesMap: Record<number, Candidate[]> = {};
-    const candidatePromises = positions.map(async (position: Position) => {
-        try {
-            const candidatesRes = await api.get('/api/candidates/', {
-                params: {position_id: position.id}
-            });
-
-            let candidates = candidatesRes.data;
-            if (candidates.results) {
-                candidates = candidates.results;
-            }
-
-            if (Array.isArray(candidates)) {
-                candidatesMap[position.id] = candidates;
-            }
-        } catch (err) {
-            console.error(`Failed to fetch candidates for position ${position.id}:`, err);
-            candidatesMap[position.id] = [];
-        }
-    });
-
-    await Promise.all(candidatePromises);
+    for (const {candidates, ...position} of ballotPositions) {
+        positions.push(position);
+        candidatesMap[position.id] = candidates;
+    }
 
     return {
         election: activeElection,
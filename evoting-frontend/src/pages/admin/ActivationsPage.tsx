@@ -1,6 +1,6 @@
 import {type FormEvent, type MouseEvent, useEffect, useState} from 'react';
 import {useElections} from '../../queries/useElections';
-import {useStudents} from '../../queries/useStudents';
+import {type StudentMatch, useStudentSearch} from '../../queries/useStudents';
 import {useDashboardStats} from '../../queries/useDashboard';
 import {useActivateStudent} from '../../queries/useActivations';
 import {showError} from '../../utils/toast';
@@ -13,22 +13,20 @@ export default function ActivationsPage() {
 
     // Queries
     const {data: elections = [], isLoading: electionsLoading} = useElections();
-    const {data: students = [], isLoading: studentsLoading} = useStudents(selectedElectionId);
     const {data: stats, isLoading: statsLoading} = useDashboardStats(selectedElectionId);
     const [isActivating, setIsActivating] = useState(false)
 
-    // Unified filtering - only show inactive students for activation
-    const inactiveStudents = students.filter(student => !student.is_active && student.has_voted === false)
-
-    // Total inactive (not voted and voted) students
-    const totalInactiveStudents = inactiveStudents.length
+    // Students not yet activated and not yet voted (voters are deactivated when they vote)
+    const totalInactiveStudents = stats
+        ? Math.max(0, stats.total_students - stats.active_students - stats.voted_students)
+        : 0
 
 
     // Mutations
     const activateStudentMutation = useActivateStudent();
 
     // Loading state
-    const loading = electionsLoading || studentsLoading || statsLoading || activateStudentMutation.isPending;
+    const loading = electionsLoading || statsLoading || activateStudentMutation.isPending;
 
     // Auto-select first election when data loads - prioritize active election
     useEffect(() => {
@@ -42,7 +40,8 @@ export default function ActivationsPage() {
 
     const [studentQuery, setStudentQuery] = useState('');
     const [studentDropdownOpen, setStudentDropdownOpen] = useState(false);
-    const [studentId, setStudentId] = useState('');
+    const [selectedStudent, setSelectedStudent] = useState<StudentMatch | null>(null);
+    const studentId = selectedStudent?.student_id ?? '';
 
     const queryClient = useQueryClient();
     const activeElection = elections.find(e => e.is_active);
@@ -53,15 +52,6 @@ export default function ActivationsPage() {
         const id = studentId.trim();
         if (!id) return;
 
-        const activeStud = students.find(
-            (student) => student.student_id === id
-        );
-
-        if (activeStud?.is_active) {
-            showError('Student is already active');
-            return;
-        }
-
         setIsActivating(true);
 
         activateStudentMutation.mutate({
@@ -69,9 +59,11 @@ export default function ActivationsPage() {
             election_id: selectedElectionId!
         }, {
             onSuccess: () => {
-                setStudentId('');
+                setSelectedStudent(null);
                 setStudentQuery('');
 
+                queryClient.invalidateQueries({queryKey: ['studentSearch', selectedElectionId]});
+
                 queryClient.invalidateQueries({
                     queryKey: queryKeys.dashboard(activeElection?.id ?? null),
                 });
@@ -87,14 +79,10 @@ export default function ActivationsPage() {
         });
     };
 
-    const selectedStudent = students.find(s => s.student_id.toLowerCase() === studentId.toLowerCase()) ?? null;
-
-    // Unified filtering - search within inactive students only
-    const filteredStudentOptions = inactiveStudents.filter((s) => {
-        const q = studentQuery.toLowerCase().trim();
-        if (!q) return true;
-        return s.full_name.toLowerCase().includes(q) || s.student_id.toLowerCase().includes(q);
-    });
+    // Matched and filtered server-side: only inactive, not-yet-voted students are offered
+    const {data: filteredStudentOptions = []} = useStudentSearch(
+        selectedElectionId, selectedStudent ? '' : studentQuery, 25, true
+    );
 
     return (
         <div className="space-y-0">
@@ -198,18 +186,18 @@ export default function ActivationsPage() {
                                         onChange={(e) => {
                                             setStudentQuery(e.target.value);
                                             setStudentDropdownOpen(true);
-                                            setStudentId('');
+                                            setSelectedStudent(null);
                                         }}
                                         onFocus={() => setStudentDropdownOpen(true)}
                                         onBlur={() => {
                                             window.setTimeout(() => setStudentDropdownOpen(false), 150);
                                         }}
                                         placeholder="Type student name or ID..."
-                                        disabled={inactiveStudents.length === 0}
+                                        disabled={!!stats && totalInactiveStudents === 0}
                                         className="w-full border border-blue-200 rounded-lg px-3 py-2 text-sm focus:outline-none focus:ring-2 focus:ring-blue-500 disabled:bg-gray-50 disabled:text-gray-500"
                                     />
 
-                                    {studentDropdownOpen && students.length > 0 && (
+                                    {studentDropdownOpen && (
                                         <div
                                             className="absolute z-10 mt-2 w-full rounded-lg border border-gray-200 bg-white shadow-lg max-h-64 overflow-auto">
                                             {filteredStudentOptions.length === 0 ? (
@@ -221,7 +209,7 @@ export default function ActivationsPage() {
                                                         type="button"
                                                         onMouseDown={(e) => {
                                                             e.preventDefault();
-                                                            setStudentId(student.student_id);
+                                                            setSelectedStudent(student);
                                                             setStudentQuery(`${student.full_name} (${student.student_id})`);
                                                             setStudentDropdownOpen(false);
                                                         }}
@@ -241,7 +229,7 @@ export default function ActivationsPage() {
                             <div className="w-full lg:w-auto">
                                 <button
                                     type="submit"
-                                    disabled={loading || !studentId.trim() || students.find(s => s.student_id === studentId)?.is_active || isActivating}
+                                    disabled={loading || !studentId.trim() || isActivating}
                                     className="w-full px-4 py-2 rounded-lg text-sm font-medium bg-cyan-600 hover:bg-cyan-700 text-white disabled:opacity-60 disabled:cursor-not-allowed transition"
 
                                 >
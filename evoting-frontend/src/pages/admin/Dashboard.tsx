@@ -2,6 +2,7 @@
 import {useAuth} from '../../hooks/useAuth';
 import {useElections} from '../../queries/useElections';
 import {useDashboardStats} from "../../queries/useDashboard.ts";
+import {useLiveUpdates} from "../../queries/useLiveUpdates.ts";
 
 const FolderIcon = () => (
     <svg className="w-8 h-8" fill="none" stroke="currentColor" viewBox="0 0 24 24">
@@ -36,7 +37,8 @@ export default function Dashboard() {
     // Queries
     const {data: elections = [], isLoading: electionsLoading} = useElections();
     const activeElection = elections.find(e => e.is_active) || null;
-    const {data: stats, isLoading: statsLoading} = useDashboardStats(activeElection?.id || null);
+    const live = useLiveUpdates(activeElection?.id || null);
+    const {data: stats, isLoading: statsLoading} = useDashboardStats(activeElection?.id || null, live);
 
     // Loading state
     const loading = electionsLoading || statsLoading;
@@ -1,6 +1,7 @@
 import {useEffect, useState} from 'react';
 import {useElections} from '../../queries/useElections';
 import {useResults} from '../../queries/useResults';
+import {useLiveUpdates} from '../../queries/useLiveUpdates';
 import {showError} from '../../utils/toast';
 
 export default function ResultsPage() {
@@ -9,7 +10,8 @@ export default function ResultsPage() {
 
     // Queries
     const {data: elections = [], isLoading: electionsLoading} = useElections();
-    const {data: results, isLoading: resultsLoading, error: resultsError} = useResults(selectedElectionId);
+    const live = useLiveUpdates(selectedElectionId);
+    const {data: results, isLoading: resultsLoading, error: resultsError} = useResults(selectedElectionId, live);
 
     // Combined loading state
     const loading = electionsLoading || resultsLoading;
@@ -363,7 +363,7 @@ export default function StudentsPage() {
                         <UploadIcon/>
                     </div>
                     <div>
-                        <h2 className="text-base font-medium text-gray-900">Bulk Upload from Excel</h2>
+                        <h2 className="text-base font-medium text-gray-900">Bulk Upload from Excel or CSV</h2>
                         <p className="text-xs text-gray-500">
                             Required columns: <code className="bg-gray-100 px-1 rounded">student_id</code>, <code
                             className="bg-gray-100 px-1 rounded">full_name</code>, <code
@@ -374,7 +374,7 @@ export default function StudentsPage() {
                 <form onSubmit={handleUpload} className="flex flex-col md:flex-row gap-4 items-start md:items-center">
                     <input
                         type="file"
-                        accept=".xlsx,.xls"
+                        accept=".xlsx,.xls,.csv,.tsv"
                         onChange={(e) => setFile(e.target.files?.[0] ?? null)}
                         className="text-sm file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-medium file:bg-blue-50 file:text-blue-600 hover:file:bg-blue-100"
                     />
@@ -393,6 +393,27 @@ export default function StudentsPage() {
                 )}
             </section>
 
+            {/* Background import still running */}
+            {bulkUploadStudents.processingJob && (
+                <section
+                    className="flex items-center justify-between gap-4 bg-blue-50 border border-blue-200 rounded-xl py-3 px-5 text-sm text-blue-900">
+                    <p>
+                        {bulkUploadStudents.processingJob.timedOut
+                            ? 'The import is still processing in the background. Check the student list later.'
+                            : 'Importing students…'}{' '}
+                        {bulkUploadStudents.processingJob.rows_processed} rows processed,{' '}
+                        {bulkUploadStudents.processingJob.created} created.
+                    </p>
+                    <button
+                        type="button"
+                        onClick={bulkUploadStudents.dismissProcessing}
+                        className="px-3 py-1 rounded-lg text-xs font-medium text-blue-700 hover:bg-blue-100 transition"
+                    >
+                        Close
+                    </button>
+                </section>
+            )}
+
             {/* Students Table */}
             <section className="bg-white rounded-xl border border-gray-200  overflow-hidden">
                 <div className="p-5 border-b border-gray-100">
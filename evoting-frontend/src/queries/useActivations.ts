@@ -82,3 +82,33 @@ export const useActivateStudent = () => {
         },
     });
 };
+
+export interface BulkActivationResult {
+    detail: string;
+    changed: number;
+    counts: Record<string, number>;
+    outcomes: Record<string, 'activated' | 'deactivated' | 'already_active' | 'already_inactive' | 'already_voted' | 'not_found'>;
+}
+
+export const useBulkActivateStudents = () => {
+    const queryClient = useQueryClient();
+
+    return useMutation({
+        mutationFn: async (data: {
+            election_id: number;
+            class_name?: string;
+            student_ids?: string[];
+            is_active?: boolean;
+        }): Promise<BulkActivationResult> => {
+            const res = await api.post('api/students/activate/bulk/', data);
+            return res.data;
+        },
+
+        onSuccess: (data, { election_id }) => {
+            showSuccess(data.detail);
+
+            queryClient.invalidateQueries({ queryKey: queryKeys.students(election_id) });
+            queryClient.invalidateQueries({ queryKey: queryKeys.activations(election_id) });
+        },
+    });
+};
@@ -2,6 +2,14 @@ import { useQuery } from '@tanstack/react-query';
 import api from '../apiConfig';
 import { queryKeys } from './queryKeys';
 
+export interface ClassTurnout {
+  class_name: string;
+  total: number;
+  activated: number;
+  voted: number;
+  turnout_percentage: number;
+}
+
 export interface DashboardStats {
   total_students: number;
   active_students: number;
@@ -9,60 +17,39 @@ export interface DashboardStats {
   pending_activations: number;
   total_positions: number;
   total_candidates: number;
+  turnout_percentage: number;
+  last_vote_at: string | null;
+  by_class: ClassTurnout[];
 }
 
-export const useDashboardStats = (electionId: number | null) => {
+const emptyStats: DashboardStats = {
+  total_students: 0,
+  active_students: 0,
+  voted_students: 0,
+  pending_activations: 0,
+  total_positions: 0,
+  total_candidates: 0,
+  turnout_percentage: 0,
+  last_vote_at: null,
+  by_class: [],
+};
+
+export const useDashboardStats = (electionId: number | null, live = false) => {
   return useQuery({
     queryKey: queryKeys.dashboard(electionId),
     queryFn: async (): Promise<DashboardStats> => {
       if (!electionId) {
         // Return empty stats when no election is selected
-        return {
-          total_students: 0,
-          active_students: 0,
-          voted_students: 0,
-          pending_activations: 0,
-          total_positions: 0,
-          total_candidates: 0,
-        };
+        return emptyStats;
       }
 
-      // Fetch stats for the selected election
-      const [studentsRes, positionsRes] = await Promise.all([
-        api.get(`api/students/?election_id=${electionId}`),
-        api.get(`api/positions/?election_id=${electionId}`),
-      ]);
-
-      const students = Array.isArray(studentsRes.data) 
-        ? studentsRes.data 
-        : (studentsRes.data.results || []);
-      
-      const positions = Array.isArray(positionsRes.data)
-        ? positionsRes.data
-        : (positionsRes.data.results || []);
-
-      // Calculate stats
-      const total_students = students.length;
-      const active_students = students.filter((s: any) => s.is_active).length;
-      const voted_students = students.filter((s: any) => s.has_voted).length;
-      const pending_activations = total_students - active_students;
-      const total_positions = positions.length;
-
-      // For candidates, we'd need to fetch from all positions or create a dedicated endpoint
-      // For now, we'll return 0 and can implement this later
-      const total_candidates = 0;
-
-      return {
-        total_students,
-        active_students,
-        voted_students,
-        pending_activations,
-        total_positions,
-        total_candidates,
-      };
+      // Aggregates are computed server-side; no roster download needed
+      const res = await api.get(`api/elections/${electionId}/dashboard/`);
+      return res.data;
     },
     enabled: !!electionId,
     staleTime: 15 * 1000, // 15 seconds for dashboard stats
-    refetchInterval: 30 * 1000, // Auto-refresh every 30 seconds
+    // Auto-refresh every 30 seconds; totals arrive over the live stream when connected
+    refetchInterval: live ? 5 * 60 * 1000 : 30 * 1000,
   });
 };
@@ -0,0 +1,84 @@
+import { useEffect, useState } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import { queryKeys } from './queryKeys';
+import type { DashboardStats } from './useDashboard';
+
+const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000/';
+
+interface LiveState {
+  version?: number;
+  ballots_cast?: number;
+  last_vote_at?: string | null;
+  total?: number;
+  activated?: number;
+  voted?: number;
+  turnout_percentage?: number;
+  candidates?: Record<string, number>;
+}
+
+/**
+ * Subscribes to the election's live results/turnout stream (served under ASGI)
+ * and patches the dashboard totals with each delta. Results are refetched only
+ * when candidate counts change. Returns true while the stream is connected, so
+ * callers can poll less often (per-class figures aren't streamed); on WSGI
+ * deployments the endpoint answers 503 and polling continues as before.
+ */
+export const useLiveUpdates = (electionId: number | null): boolean => {
+  const queryClient = useQueryClient();
+  const [connected, setConnected] = useState(false);
+
+  useEffect(() => {
+    if (!electionId) return;
+    const controller = new AbortController();
+
+    const apply = (data: LiveState) => {
+      queryClient.setQueryData<DashboardStats>(queryKeys.dashboard(electionId), (stats) => {
+        if (!stats) return stats;
+        const next = { ...stats };
+        if (data.total !== undefined) next.total_students = data.total;
+        if (data.activated !== undefined) next.active_students = data.activated;
+        if (data.voted !== undefined) next.voted_students = data.voted;
+        if (data.turnout_percentage !== undefined) next.turnout_percentage = data.turnout_percentage;
+        if (data.last_vote_at !== undefined) next.last_vote_at = data.last_vote_at;
+        next.pending_activations = next.total_students - next.active_students;
+        return next;
+      });
+      if (data.candidates) {
+        queryClient.invalidateQueries({ queryKey: queryKeys.results(electionId) });
+      }
+    };
+
+    const run = async () => {
+      const token = localStorage.getItem('access_token');
+      // EventSource can't send the Bearer header, so read the stream with fetch.
+      const res = await fetch(`${API_BASE_URL}api/elections/${electionId}/live/`, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
+        signal: controller.signal,
+      });
+      if (!res.ok || !res.body) return;
+      setConnected(true);
+
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        let end;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+          const message = buffer.slice(0, end);
+          buffer = buffer.slice(end + 2);
+          const data = message.split('\n').find((line) => line.startsWith('data: '));
+          if (data) apply(JSON.parse(data.slice(6)));
+        }
+      }
+    };
+
+    run()
+      .catch(() => undefined)
+      .finally(() => setConnected(false));
+    return () => controller.abort();
+  }, [electionId, queryClient]);
+
+  return connected;
+};
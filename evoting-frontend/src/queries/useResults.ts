@@ -31,7 +31,7 @@ export interface ElectionResult {
     positions: PositionResult[];
 }
 
-export const useResults = (electionId: number | null) => {
+export const useResults = (electionId: number | null, live = false) => {
     return useQuery({
         queryKey: queryKeys.results(electionId),
         queryFn: async (): Promise<ElectionResult | null> => {
@@ -70,6 +70,6 @@ export const useResults = (electionId: number | null) => {
         },
         enabled: !!electionId,
         staleTime: 30 * 1000, // 30 seconds
-        refetchInterval: 60 * 1000, // Auto-refresh every minute
+        refetchInterval: live ? false : 60 * 1000, // Auto-refresh every minute unless streamed
     });
 };
@@ -1,7 +1,8 @@
+import {useCallback, useEffect, useRef, useState} from 'react';
 import {useMutation, useQuery, useQueryClient} from '@tanstack/react-query';
 import api from '../apiConfig';
 import {queryKeys} from './queryKeys';
-import {showError, showSuccess} from '../utils/toast';
+import {showError, showInfo, showSuccess} from '../utils/toast';
 import {useElections} from "./useElections.ts";
 
 export interface Student {
@@ -143,10 +144,43 @@ export const useDeleteStudent = () => {
     });
 };
 
+// Background imports are polled with backoff until they finish, for at most
+// IMPORT_POLL_TIMEOUT_MS; after that, on unmount or when the user closes the
+// notice, the upload stops waiting and reports the job as still processing.
+const IMPORT_POLL_TIMEOUT_MS = 10 * 60 * 1000;
+const IMPORT_POLL_MAX_DELAY_MS = 15 * 1000;
+
+export interface ImportJobProgress {
+    job_id: number;
+    status: 'pending' | 'running' | 'succeeded' | 'failed';
+    rows_processed: number;
+    created: number;
+    detail?: string;
+    timedOut?: boolean;
+}
+
+const wait = (ms: number, signal: AbortSignal) => new Promise<void>((resolve) => {
+    const timer = setTimeout(resolve, ms);
+    signal.addEventListener('abort', () => {
+        clearTimeout(timer);
+        resolve();
+    }, {once: true});
+});
+
 export const useBulkUploadStudents = () => {
     const queryClient = useQueryClient();
+    const pollRef = useRef<AbortController | null>(null);
+    const [processingJob, setProcessingJob] = useState<ImportJobProgress | null>(null);
 
-    return useMutation({
+    // Stop polling when the page goes away
+    useEffect(() => () => pollRef.current?.abort(), []);
+
+    const dismissProcessing = useCallback(() => {
+        pollRef.current?.abort();
+        setProcessingJob(null);
+    }, []);
+
+    const mutation = useMutation({
         mutationFn: async (data: { file: File; election_id: number }) => {
             const formData = new FormData();
             formData.append('file', data.file);
@@ -155,14 +189,91 @@ export const useBulkUploadStudents = () => {
             const res = await api.post('api/students/bulk-upload/', formData, {
                 headers: {'Content-Type': 'multipart/form-data'},
             });
-            return res.data;
+            if (res.status !== 202) {
+                return res.data;
+            }
+
+            // Large files are imported by a background job; poll until it finishes
+            pollRef.current?.abort();
+            const controller = new AbortController();
+            pollRef.current = controller;
+            const jobId = res.data.job_id;
+            const deadline = Date.now() + IMPORT_POLL_TIMEOUT_MS;
+            let progress: ImportJobProgress = {job_id: jobId, status: 'pending', rows_processed: 0, created: 0};
+            setProcessingJob(progress);
+            let delay = 1000;
+            while (Date.now() < deadline && !controller.signal.aborted) {
+                await wait(delay, controller.signal);
+                delay = Math.min(delay * 2, IMPORT_POLL_MAX_DELAY_MS);
+                let job;
+                try {
+                    job = await api.get(`api/students/import-jobs/${jobId}/`, {signal: controller.signal});
+                } catch (err) {
+                    if (controller.signal.aborted) break;
+                    throw err;
+                }
+                if (job.data.status === 'succeeded') {
+                    setProcessingJob(null);
+                    return {...job.data, detail: `${job.data.detail} (${job.data.created} created)`};
+                }
+                if (job.data.status === 'failed') {
+                    setProcessingJob(null);
+                    throw {response: {data: job.data}};
+                }
+                progress = {...job.data, job_id: jobId};
+                setProcessingJob(progress);
+            }
+
+            // Gave up waiting; the job carries on in the background
+            if (!controller.signal.aborted) {
+                setProcessingJob({...progress, timedOut: true});
+            }
+            return {
+                ...progress,
+                still_processing: true,
+                detail: `The import is still processing (${progress.rows_processed} rows so far). Check the student list later.`,
+            };
         },
         onSuccess: (data, variables) => {
-            showSuccess(data.detail || 'Upload completed');
+            if (data.still_processing) {
+                showInfo(data.detail);
+            } else {
+                showSuccess(data.detail || 'Upload completed');
+            }
             queryClient.invalidateQueries({queryKey: queryKeys.students(variables.election_id)});
         },
         onError: (err: any) => {
             showError(err.response?.data?.detail || 'Bulk upload failed');
         },
     });
+
+    return {...mutation, processingJob, dismissProcessing};
+};
+
+export interface StudentMatch {
+    id: number;
+    student_id: string;
+    full_name: string;
+    class_name: string;
+    is_active: boolean;
+    has_voted: boolean;
+}
+
+// Server-side autocomplete (ID prefix, name words, typos) for the activation desk.
+// With eligibleOnly the server keeps only students who can still be activated
+// (before applying the limit), and an empty query lists them by ID.
+export const useStudentSearch = (electionId: number | null, query: string, limit: number = 25, eligibleOnly: boolean = false) => {
+    const q = query.trim();
+    return useQuery({
+        queryKey: ['studentSearch', electionId, q, limit, eligibleOnly],
+        queryFn: async (): Promise<StudentMatch[]> => {
+            const res = await api.get(`api/elections/${electionId}/students/search/`, {
+                params: eligibleOnly ? {q, limit, eligible: true} : {q, limit},
+            });
+            return res.data.results;
+        },
+        enabled: !!electionId && (q.length > 0 || eligibleOnly),
+        staleTime: 5 * 1000,
+        placeholderData: (previous) => previous,
+    });
 };
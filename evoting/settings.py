@@ -114,9 +114,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'core.middleware.HealthCheckSSLRedirectMiddleware',
-    'core.middleware.CustomSecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.HealthCheckMiddleware',
+    'core.middleware.QueryTimingMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -144,6 +144,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'evoting.wsgi.application'
+ASGI_APPLICATION = 'evoting.asgi.application'
+
+# 'wsgi' (gunicorn) or 'asgi' (uvicorn, async views run on the event loop);
+# start.sh picks the server from it
+SERVER_MODE = get_env('SERVER_MODE', default='wsgi')
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -154,7 +159,9 @@ database_url = os.environ.get('DATABASE_URL')
 if database_url:
     # Use DATABASE_URL if available (Railway provides this)
     DATABASES = {
-        'default': dj_database_url.parse(database_url, conn_max_age=600)
+        # Under ASGI every request runs its queries on a new thread, so
+        # persistent connections would pile up; reconnect per request there.
+        'default': dj_database_url.parse(database_url, conn_max_age=0 if SERVER_MODE == 'asgi' else 600)
     }
 elif os.environ.get('PGDATABASE') and os.environ.get('PGHOST'):
     # Use individual PG* environment variables if set
@@ -349,36 +356,56 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Log handlers only queue records; a background thread writes them in
+# batches as JSON lines (core.logging_handlers). Files rotate at
+# LOG_MAX_BYTES (renamed to .1, older ones gzipped) without truncating the
+# file other workers are appending to.
+LOG_MAX_BYTES = get_env('LOG_MAX_BYTES', default=50 * 1024 * 1024, cast=int)
+LOG_BACKUP_COUNT = get_env('LOG_BACKUP_COUNT', default=10, cast=int)
+LOG_BATCH_SIZE = get_env('LOG_BATCH_SIZE', default=500, cast=int)
+LOG_FLUSH_INTERVAL = get_env('LOG_FLUSH_INTERVAL', default=0.5, cast=float)
+# Records beyond this many waiting to be written are dropped and counted in
+# evoting_log_records_dropped_total
+LOG_QUEUE_SIZE = get_env('LOG_QUEUE_SIZE', default=10000, cast=int)
+# Seconds a security.log record may wait for room in a full queue before it
+# is dropped; bounds how long an audit line can stall a request
+LOG_SECURITY_QUEUE_TIMEOUT = get_env('LOG_SECURITY_QUEUE_TIMEOUT', default=0.1, cast=float)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
+        'json': {
+            '()': 'core.logging_handlers.JsonFormatter',
         },
-        'security': {
-                'format': '{levelname} {asctime} {message}',
-                'style': '{',
-            },
     },
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'core.logging_handlers.BatchingFileHandler',
             'filename': 'django.log',
-            'formatter': 'verbose',
+            'max_bytes': LOG_MAX_BYTES,
+            'backup_count': LOG_BACKUP_COUNT,
+            'formatter': 'json',
         },
         'security_file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'core.logging_handlers.BatchingFileHandler',
             'filename': 'security.log',
-            'formatter': 'security',
+            'max_bytes': LOG_MAX_BYTES,
+            'backup_count': LOG_BACKUP_COUNT,
+            'formatter': 'json',
+            # Audit trail: wait briefly for room in the log queue before dropping.
+            'timeout': LOG_SECURITY_QUEUE_TIMEOUT,
         },
         'console': {
             'level': 'INFO',
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'class': 'core.logging_handlers.BatchingStreamHandler',
+            'formatter': 'json',
+        },
+        'security_metrics': {
+            'level': 'INFO',
+            'class': 'core.metrics.SecurityEventHandler',
         },
     },
     'loggers': {
@@ -388,10 +415,15 @@ LOGGING = {
             'propagate': True,
         },
         'security': {
-            'handlers': ['security_file', 'console'],
+            'handlers': ['security_file', 'console', 'security_metrics'],
             'level': 'INFO',
             'propagate': False,
         },
+        'performance': {
+            'handlers': ['file', 'console'],
+            'level': get_env('PERFORMANCE_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
     },
 }
 
@@ -416,3 +448,86 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 CLOUDINARY_CLOUD_NAME = get_env('CLOUDINARY_CLOUD_NAME', '')
 CLOUDINARY_API_KEY = get_env('CLOUDINARY_API_KEY', '')
 CLOUDINARY_API_SECRET = get_env('CLOUDINARY_API_SECRET', '')
+
+# Vote tallies: each counter is split across this many rows so concurrent
+# ballots don't serialize on a single row lock.
+VOTE_TALLY_SHARDS = get_env('VOTE_TALLY_SHARDS', default=8, cast=int)
+
+# Seconds a worker may reuse its cached ballot structure (elections, positions
+# and candidates) before reloading it. Edits invalidate it immediately.
+BALLOT_STRUCTURE_TTL = get_env('BALLOT_STRUCTURE_TTL', default=30, cast=int)
+
+# How MultiVoteView records a ballot: "conditional" (single conditional UPDATE
+# claim + unique constraint) or "locking" (SELECT FOR UPDATE + pre-checks).
+VOTE_COMMIT_STRATEGY = get_env('VOTE_COMMIT_STRATEGY', default='conditional')
+
+# Ballot intake: "direct" writes Vote rows in the request; "journal" appends
+# the ballot to an fsync'd local journal and a background writer flushes it
+# to the database in batches (see core/intake.py).
+VOTE_INTAKE_MODE = get_env('VOTE_INTAKE_MODE', default='direct')
+VOTE_JOURNAL_DIR = get_env('VOTE_JOURNAL_DIR', default=os.path.join(BASE_DIR, 'vote_journal'))
+VOTE_JOURNAL_BATCH_SIZE = get_env('VOTE_JOURNAL_BATCH_SIZE', default=500, cast=int)
+VOTE_JOURNAL_FLUSH_INTERVAL = get_env('VOTE_JOURNAL_FLUSH_INTERVAL', default=1.0, cast=float)
+
+# Seconds a worker may reuse the cached active flag and voting window of an
+# election when authenticating voters. ElectionManageView and the admin
+# invalidate it immediately.
+ELECTION_WINDOW_TTL = get_env('ELECTION_WINDOW_TTL', default=30, cast=int)
+
+# Without a shared cache (DummyCache, LocMemCache) invalidations don't reach
+# other workers, so they reuse ballot structures and windows for at most this
+# many seconds instead.
+BALLOT_CACHE_UNSHARED_TTL = get_env('BALLOT_CACHE_UNSHARED_TTL', default=2, cast=int)
+
+# Rows per chunk when importing a student roster
+ROSTER_IMPORT_CHUNK_SIZE = get_env('ROSTER_IMPORT_CHUNK_SIZE', default=1000, cast=int)
+
+# Roster uploads larger than this many bytes are imported by a background job
+ROSTER_IMPORT_BACKGROUND_THRESHOLD = get_env('ROSTER_IMPORT_BACKGROUND_THRESHOLD', default=512 * 1024, cast=int)
+# Start an in-process worker thread for queued imports; otherwise run `manage.py run_roster_imports`
+ROSTER_IMPORT_BACKGROUND_WORKER = get_env('ROSTER_IMPORT_BACKGROUND_WORKER', default=True, cast=bool)
+ROSTER_IMPORT_DIR = get_env('ROSTER_IMPORT_DIR', default=os.path.join(BASE_DIR, 'roster_imports'))
+# Row-level errors kept per import
+ROSTER_IMPORT_MAX_ERRORS = get_env('ROSTER_IMPORT_MAX_ERRORS', default=200, cast=int)
+
+# Student autocomplete: "auto" searches in PostgreSQL (pg_trgm) and uses an in-process index elsewhere
+STUDENT_SEARCH_BACKEND = get_env('STUDENT_SEARCH_BACKEND', default='auto')
+STUDENT_SEARCH_INDEX_TTL = get_env('STUDENT_SEARCH_INDEX_TTL', default=300, cast=int)
+# Share of the query's trigrams a misspelled name must contain to match (0-1)
+STUDENT_SEARCH_TRIGRAM_THRESHOLD = get_env('STUDENT_SEARCH_TRIGRAM_THRESHOLD', default=0.5, cast=float)
+
+# Live results/turnout stream (ASGI): seconds between change-feed reads and between keep-alive comments
+LIVE_UPDATES_INTERVAL = get_env('LIVE_UPDATES_INTERVAL', default=0.5, cast=float)
+LIVE_UPDATES_KEEPALIVE = get_env('LIVE_UPDATES_KEEPALIVE', default=15, cast=int)
+
+# Per-request query/timing report (core.middleware.QueryTimingMiddleware).
+# Requests running more queries than their budget are logged at WARNING;
+# QUERY_BUDGETS overrides the default per URL name.
+SERVER_TIMING_HEADER = get_env('SERVER_TIMING_HEADER', default=True, cast=bool)
+QUERY_BUDGET = get_env('QUERY_BUDGET', default=25, cast=int)
+QUERY_BUDGETS = {
+    'voter-login': 6,
+    # Measured on a cold ballot cache and turnout counter
+    # (QueryTimingTests.test_vote_stays_within_its_measured_query_budget).
+    'multi-vote': 17,
+    'election-ballot': 5,
+    'election-results': 12,
+    'election-stats': 8,
+    'election-dashboard': 10,
+    'candidates-for-position': 5,
+}
+
+# Prometheus metrics at /api/metrics/ (core.metrics). Each worker writes its
+# metrics to METRICS_DIR every METRICS_FLUSH_INTERVAL seconds and a scrape
+# sums them. The endpoint requires "Authorization: Bearer <METRICS_TOKEN>";
+# without a token it is closed (under DEBUG: private addresses only).
+METRICS_DIR = get_env('METRICS_DIR', default=os.path.join(BASE_DIR, 'metrics'))
+METRICS_FLUSH_INTERVAL = get_env('METRICS_FLUSH_INTERVAL', default=5, cast=int)
+METRICS_TOKEN = get_env('METRICS_TOKEN', default='')
+
+# Health probes answered by core.middleware.HealthCheckMiddleware ahead of
+# every other middleware. Liveness never touches the database; readiness
+# checks the database and cache and reuses its result for a few seconds.
+HEALTH_CHECK_PATHS = ['/', '/health/', '/healthz/', '/api/health/', '/api/healthz/']
+READINESS_PATHS = ['/readyz/', '/api/readyz/']
+HEALTH_READINESS_CACHE_SECONDS = get_env('HEALTH_READINESS_CACHE_SECONDS', default=5, cast=int)
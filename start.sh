@@ -21,6 +21,35 @@ echo "DATABASE_URL: ${DATABASE_URL:0:20}..."
 echo "PGHOST: $PGHOST"
 echo "PGDATABASE: $PGDATABASE"
 
+# SERVER_MODE=asgi serves evoting.asgi under uvicorn (async read views run
+# on the event loop); the default is evoting.wsgi under gunicorn.
+SERVER_MODE=${SERVER_MODE:-wsgi}
+WORKERS=${WEB_CONCURRENCY:-1}
+
+start_server() {
+    if [ "$SERVER_MODE" = "asgi" ]; then
+        echo "Starting Uvicorn (ASGI) on port $PORT..."
+        exec uvicorn evoting.asgi:application \
+            --host 0.0.0.0 \
+            --port $PORT \
+            --workers $WORKERS \
+            --proxy-headers \
+            --forwarded-allow-ips '*' \
+            --log-level info
+    fi
+    echo "Starting Gunicorn on port $PORT..."
+    exec gunicorn evoting.wsgi:application \
+        --bind 0.0.0.0:$PORT \
+        --workers $WORKERS \
+        --timeout 120 \
+        --log-level debug \
+        --access-logfile - \
+        --error-logfile -
+}
+
+# Per-worker metrics files of a previous run (see core/metrics.py)
+rm -rf "${METRICS_DIR:-metrics}"
+
 # Wait longer for database to be ready
 echo "Waiting for database to be ready..."
 sleep 5  # Increase from 3
@@ -35,6 +64,15 @@ if [ $? -eq 0 ]; then
     echo "Running migrations..."
     python manage.py migrate --noinput
 
+    # Replay ballots journaled by a previous run (VOTE_INTAKE_MODE=journal)
+    echo "Replaying unflushed ballot journals..."
+    python manage.py drain_vote_journal
+
+    # Finish roster imports queued or left running by a previous run; their
+    # in-memory queue didn't survive it (see core/roster.py)
+    echo "Resuming interrupted roster imports..."
+    python manage.py run_roster_imports --retry-running
+
     # Collect static files
     echo "Collecting static files..."
     python manage.py collectstatic --noinput
@@ -42,18 +80,11 @@ if [ $? -eq 0 ]; then
     # Extra sleep to ensure everything is settled
     sleep 2
 
-    echo "Starting Gunicorn on port $PORT..."
-    exec gunicorn evoting.wsgi:application \
-        --bind 0.0.0.0:$PORT \
-        --workers 1 \
-        --timeout 120 \
-        --log-level debug \
-        --access-logfile - \
-        --error-logfile -
+    start_server
 else
     echo "Database connection failed, but proceeding anyway..."
     # Give extra time
     sleep 10  # Increase from 5
     echo "PORT: $PORT"
-    exec gunicorn evoting.wsgi:application --bind 0.0.0.0:${PORT:-8080} --workers 1 --timeout 120 --log-level debug --access-logfile - --error-logfile -
-fi
\ No newline at end of file
+    start_server
+fi